@@ -1,117 +1,209 @@
-import pandas as pd
-import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-import difflib
-
-# CONFIGURATION
-TRAINING_FILE = 'npfl_training_data.csv'
-
-def load_and_train():
-    print("🧠 Loading Smart Data and Training Brain...")
-    try:
-        df = pd.read_csv(TRAINING_FILE)
-    except FileNotFoundError:
-        print(f"❌ Error: {TRAINING_FILE} not found. Run feature_engineering.py first!")
-        return None, None, None
-
-    # 1. PREPARE FEATURES
-    # We are no longer using "Team Name" (ID). We are using "Team Strength".
-    # Features: [Home_Attack, Home_Defense, Away_Attack, Away_Defense]
-    feature_cols = ['Home_Attack', 'Home_Defense', 'Away_Attack', 'Away_Defense']
-    
-    X = df[feature_cols]
-    y = df['Outcome']
-
-    # 2. TRAIN MODEL (Using Random Forest for better complexity handling)
-    # Random Forest is better at finding non-linear patterns than Logistic Regression
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X, y)
-    
-    # 3. BUILD STATS LOOKUP TABLE
-    # We need to know the stats for every team so we can predict future games.
-    # Since the stats are constant in our current file, we just grab the first row for each team.
-    
-    team_stats = {}
-    
-    # Get Home Stats
-    home_group = df.groupby('Home_Team')[['Home_Attack', 'Home_Defense']].first()
-    for team, row in home_group.iterrows():
-        if team not in team_stats: team_stats[team] = {}
-        team_stats[team]['Home_Attack'] = row['Home_Attack']
-        team_stats[team]['Home_Defense'] = row['Home_Defense']
-
-    # Get Away Stats
-    away_group = df.groupby('Away_Team')[['Away_Attack', 'Away_Defense']].first()
-    for team, row in away_group.iterrows():
-        if team not in team_stats: team_stats[team] = {}
-        team_stats[team]['Away_Attack'] = row['Away_Attack']
-        team_stats[team]['Away_Defense'] = row['Away_Defense']
-
-    teams_list = list(team_stats.keys())
-    return model, team_stats, teams_list
-
-def get_closest_team(user_input, team_list):
-    matches = difflib.get_close_matches(user_input, team_list, n=1, cutoff=0.4)
-    return matches[0] if matches else None
-
-def main():
-    model, team_stats, team_list = load_and_train()
-    if not model: return
-
-    print("\n" + "="*50)
-    print("🚀 NPFL ADVANCED PREDICTOR (STATS ENGINE) 🚀")
-    print("="*50)
-    print(f"Loaded Stats for {len(team_list)} teams.")
-    print("Type 'done' to exit.\n")
-
-    while True:
-        print("-" * 30)
-        h_input = input("🏠 Home Team: ").strip()
-        if h_input.lower() == 'done': break
-        
-        home = get_closest_team(h_input, team_list)
-        if not home: 
-            print("❌ Team not found."); continue
-        print(f"   Selected: {home}")
-
-        a_input = input("✈️ Away Team: ").strip()
-        away = get_closest_team(a_input, team_list)
-        if not away: 
-            print("❌ Team not found."); continue
-        print(f"   Selected: {away}")
-
-        # RETRIEVE STATS
-        try:
-            h_att = team_stats[home]['Home_Attack']
-            h_def = team_stats[home]['Home_Defense']
-            a_att = team_stats[away]['Away_Attack']
-            a_def = team_stats[away]['Away_Defense']
-            
-            # Predict
-            features = pd.DataFrame([[h_att, h_def, a_att, a_def]], 
-                                  columns=['Home_Attack', 'Home_Defense', 'Away_Attack', 'Away_Defense'])
-            
-            probs = model.predict_proba(features)[0]
-            classes = model.classes_
-            result_probs = dict(zip(classes, probs))
-            
-            winner = max(result_probs, key=result_probs.get)
-            conf = result_probs[winner]
-
-            # CALCULATE EXPECTED GOALS (For "Why")
-            exp_home_goals = (h_att + a_def) / 2
-            exp_away_goals = (a_att + h_def) / 2
-            
-            print(f"\n📊 MATCH ANALYSIS:")
-            print(f"   {home} Attack Rating: {h_att:.2f}")
-            print(f"   {away} Defense Rating: {a_def:.2f}")
-            print(f"   Expected Score: {home} {exp_home_goals:.1f} - {exp_away_goals:.1f} {away}")
-            
-            print(f"\n🔮 PREDICTION: {winner} ({conf:.1%})")
-            
-        except KeyError as e:
-            print(f"❌ Error: Missing stats for one of these teams. (Maybe they haven't played enough games yet?)")
-
-if __name__ == "__main__":
+import argparse
+import os
+
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+import batch_predict
+import goals_model
+import instrumentation
+import leagues
+import model_registry
+import pair_table
+import team_resolver
+
+# CONFIGURATION
+TRAINING_FILE = 'npfl_training_data.csv'
+
+# Features: [Home_Attack, Home_Defense, Away_Attack, Away_Defense]
+FEATURE_COLS = ['Home_Attack', 'Home_Defense', 'Away_Attack', 'Away_Defense']
+# Defaults. Each league's tuned settings from hyperparam_search.py (league.best_params_file)
+# override them. The params are part of the saved-model key, so a new winner retrains automatically.
+MODEL_PARAMS = {'model': 'RandomForestClassifier', 'n_estimators': 100, 'random_state': 42}
+
+def model_params(league=None):
+    league = leagues.get_league(league)
+    return {**MODEL_PARAMS, **model_registry.load_best_params('stats_rf', league.best_params_file)}
+
+def train_model(training_file=TRAINING_FILE, params=MODEL_PARAMS):
+    df = pd.read_csv(training_file)
+
+    # 1. PREPARE FEATURES
+    # We are no longer using "Team Name" (ID). We are using "Team Strength".
+    X = df[FEATURE_COLS]
+    y = df['Outcome']
+
+    # 2. TRAIN MODEL (Using Random Forest for better complexity handling)
+    # Random Forest is better at finding non-linear patterns than Logistic Regression
+    model = RandomForestClassifier(**{k: v for k, v in params.items() if k != 'model'})
+    with instrumentation.stage('train.advanced_rf', rows=len(X)):
+        model.fit(X, y)
+    
+    # 3. BUILD STATS LOOKUP TABLE
+    # We need to know the stats for every team so we can predict future games.
+    # Since the stats are constant in our current file, we just grab the first row for each team.
+    
+    team_stats = {}
+    
+    # Get Home Stats
+    home_group = df.groupby('Home_Team')[['Home_Attack', 'Home_Defense']].first()
+    for team, row in home_group.iterrows():
+        if team not in team_stats: team_stats[team] = {}
+        team_stats[team]['Home_Attack'] = row['Home_Attack']
+        team_stats[team]['Home_Defense'] = row['Home_Defense']
+
+    # Get Away Stats
+    away_group = df.groupby('Away_Team')[['Away_Attack', 'Away_Defense']].first()
+    for team, row in away_group.iterrows():
+        if team not in team_stats: team_stats[team] = {}
+        team_stats[team]['Away_Attack'] = row['Away_Attack']
+        team_stats[team]['Away_Defense'] = row['Away_Defense']
+
+    return {'model': model, 'team_stats': team_stats}
+
+@instrumentation.stage('load.advanced_rf')
+def load_and_train(league=None):
+    league = leagues.get_league(league)
+    training_file = league.training_file
+    print("🧠 Loading Smart Data and Training Brain...")
+    if not os.path.exists(training_file):
+        print(f"❌ Error: {training_file} not found. Run feature_engineering.py first!")
+        return None, None, None, None
+
+    # Reuse the saved model (and its stats table) if the training file hasn't changed
+    params = model_params(league)
+    model_key, artifact = model_registry.load_or_train(
+        'advanced_rf', [training_file], FEATURE_COLS, params,
+        lambda: train_model(training_file, params), league.registry_dir)
+
+    model = artifact['model']
+    team_stats = artifact['team_stats']
+    teams_list = list(team_stats.keys())
+
+    # Score every possible fixture once, so lookups are just array indexing
+    with instrumentation.stage('load.pair_table', rows=len(teams_list) ** 2):
+        pairs = pair_table.load_or_build(
+            model_key, model, teams_list,
+            make_features=lambda homes, aways: build_features(team_stats, homes, aways),
+            exp_goals_fn=expected_goals, registry_dir=league.registry_dir)
+    return model, team_stats, teams_list, pairs
+
+def build_features(team_stats, homes, aways):
+    """Feature matrix for many fixtures at once (NaN where a team has no home/away stats)."""
+    stats = pd.DataFrame.from_dict(team_stats, orient='index')
+    homes, aways = pd.Series(homes), pd.Series(aways)
+    return pd.DataFrame({
+        'Home_Attack': homes.map(stats['Home_Attack']).to_numpy(),
+        'Home_Defense': homes.map(stats['Home_Defense']).to_numpy(),
+        'Away_Attack': aways.map(stats['Away_Attack']).to_numpy(),
+        'Away_Defense': aways.map(stats['Away_Defense']).to_numpy(),
+    })[FEATURE_COLS]
+
+def expected_goals(X):
+    # CALCULATE EXPECTED GOALS (For "Why")
+    # (Home Attack + Away Defense) / 2  vs  (Away Attack + Home Defense) / 2
+    return np.column_stack([
+        (X['Home_Attack'] + X['Away_Defense']) / 2,
+        (X['Away_Attack'] + X['Home_Defense']) / 2,
+    ])
+
+@instrumentation.stage('predict.batch')
+def predict_batch(pairs, fixtures, goals=None):
+    """
+    Looks every fixture up in the precomputed table (no model calls at all).
+    Fixtures where a team is missing home/away stats are dropped (with a warning).
+    With a goals model, the expected score comes from its fitted rates (as in the interactive
+    predictor) and the scoreline markets for all fixtures come from one batched grid.
+    """
+    probs, exp_goals = pairs.lookup_many(fixtures['Home'], fixtures['Away'])
+
+    missing = np.isnan(probs).any(axis=1)
+    if missing.any():
+        print(f"⚠️ Skipped {int(missing.sum())} fixtures with missing stats.")
+    fixtures = fixtures[~missing].reset_index(drop=True)
+
+    predictions = batch_predict.add_prediction_columns(fixtures, probs[~missing], pairs.classes)
+    predictions['Exp_Home_Goals'] = exp_goals[~missing, 0].round(2)
+    predictions['Exp_Away_Goals'] = exp_goals[~missing, 1].round(2)
+
+    if goals is not None:
+        exp_home, exp_away = goals.rates(predictions['Home'], predictions['Away'])
+        predictions['Exp_Home_Goals'] = exp_home.round(2)
+        predictions['Exp_Away_Goals'] = exp_away.round(2)
+        markets = goals_model.market_probs(goals.scoreline_grid(predictions['Home'], predictions['Away']))
+        for col in ['Likely_Score', 'Over_2.5', 'BTTS', 'Home_Clean_Sheet', 'Away_Clean_Sheet']:
+            predictions[col] = markets[col].round(3) if col != 'Likely_Score' else markets[col]
+    return predictions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NPFL advanced predictor (attack/defense stats model).")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    args = batch_predict.add_batch_arguments(parser).parse_args(argv)
+    if not batch_predict.fixtures_exist(args.fixtures): return
+
+    league = leagues.get_league(args.league)
+    model, team_stats, team_list, pairs = load_and_train(league)
+    if not model: return
+    # Fixes typos (e.g. "Remo" -> "Remo Stars")
+    resolver = team_resolver.load_resolver(team_list, alias_file=league.alias_file)
+    goals = goals_model.load_or_fit(league)  # Dixon-Coles scorelines (fits in milliseconds)
+
+    # --- BATCH MODE (no prompts) ---
+    if args.fixtures:
+        batch_predict.run_batch(
+            args.fixtures,
+            resolve_fn=resolver.resolve,
+            predict_fn=lambda fixtures: predict_batch(pairs, fixtures, goals),
+            output_path=args.output, report_path=args.report)
+        return
+
+    print("\n" + "="*50)
+    print("🚀 NPFL ADVANCED PREDICTOR (STATS ENGINE) 🚀")
+    print("="*50)
+    print(f"Loaded Stats for {len(team_list)} teams.")
+    print("Type 'done' to exit.\n")
+
+    while True:
+        print("-" * 30)
+        h_input = input("🏠 Home Team: ").strip()
+        if h_input.lower() == 'done': break
+        
+        home = resolver.resolve(h_input)
+        if not home: 
+            print("❌ Team not found."); continue
+        print(f"   Selected: {home}")
+
+        a_input = input("✈️ Away Team: ").strip()
+        away = resolver.resolve(a_input)
+        if not away: 
+            print("❌ Team not found."); continue
+        print(f"   Selected: {away}")
+
+        # RETRIEVE STATS & PRECOMPUTED PREDICTION
+        try:
+            h_att = team_stats[home]['Home_Attack']
+            a_def = team_stats[away]['Away_Defense']
+            
+            result_probs, _ = pairs.lookup(home, away)
+            markets = goals_model.market_probs(goals.scoreline_grid([home], [away])).iloc[0]
+            exp_home_goals, exp_away_goals = (r[0] for r in goals.rates([home], [away]))
+            
+            winner = max(result_probs, key=result_probs.get)
+            conf = result_probs[winner]
+            
+            print(f"\n📊 MATCH ANALYSIS:")
+            print(f"   {home} Attack Rating: {h_att:.2f}")
+            print(f"   {away} Defense Rating: {a_def:.2f}")
+            print(f"   Expected Score: {home} {exp_home_goals:.1f} - {exp_away_goals:.1f} {away}")
+            print(f"   Most Likely Score: {markets['Likely_Score']} ({markets['Likely_Score_Prob']:.0%})")
+            print(f"   Over 2.5 Goals: {markets['Over_2.5']:.0%} | Both Teams Score: {markets['BTTS']:.0%}")
+            print(f"   Clean Sheet: {home} {markets['Home_Clean_Sheet']:.0%}, {away} {markets['Away_Clean_Sheet']:.0%}")
+            
+            print(f"\n🔮 PREDICTION: {winner} ({conf:.1%})")
+            
+        except KeyError as e:
+            print(f"❌ Error: Missing stats for one of these teams. (Maybe they haven't played enough games yet?)")
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
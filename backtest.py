@@ -0,0 +1,290 @@
+"""
+Walk-forward backtesting: replay the league in order, always training on the past only.
+
+    python backtest.py                              (stats model, one fold per season)
+    python backtest.py --model team_id_logreg --workers 4
+    python backtest.py --league gpl
+
+For every block of matches (a season, or a slice of one), the model is trained on
+everything before it and scored on the block itself. Slicing a season needs a Date or
+Matchday column: results matrices list matches by home team, not in the order played. Ratings are rebuilt from the
+training window only, so no fold ever sees the results it is predicting.
+Each fold's feature matrices are cached in backtest_cache/ and folds run in a process pool.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import feature_engineering
+import instrumentation
+import leagues
+import match_store
+
+# CONFIGURATION
+CACHE_DIR = 'backtest_cache'
+CLASSES = ['Away Win', 'Draw', 'Home Win']   # Same order as sklearn's classes_
+BLOCKS_PER_SEASON = 1    # 1 = train on earlier seasons, test on the next one
+MIN_TRAIN_BLOCKS = None  # Default: the whole first season is training data only
+FEATURES_VERSION = 1     # Bump when a featurizer changes, so old cached folds are ignored
+
+# Model name: which features it uses and how it is built
+MODEL_SPECS = {
+    'stats_rf': {
+        'features': 'ratings',
+        'model': 'RandomForestClassifier',
+        'params': {'n_estimators': 100, 'max_depth': 5, 'random_state': 42},
+    },
+    'team_id_logreg': {
+        'features': 'team_codes',
+        'model': 'LogisticRegression',
+        'params': {'max_iter': 1000},
+    },
+}
+
+_MATCHES = None   # The full match table, handed to each worker process once
+
+
+# --- FEATURES (built from the training window only) ---
+
+def ratings_features(train, test):
+    """Attack/Defense ratings from the training matches, looked up for both sets."""
+    state = feature_engineering.build_state(train)
+    home_stats, away_stats, averages = feature_engineering.ratings_from_state(state)
+    cols = feature_engineering.RATING_COLS
+    X_train = feature_engineering.compute_features(train, home_stats, away_stats, averages)[cols]
+    X_test = feature_engineering.compute_features(test, home_stats, away_stats, averages)[cols]
+    return X_train.to_numpy(np.float64), X_test.to_numpy(np.float64)
+
+
+def team_code_features(train, test):
+    """Team IDs as numbers (the baseline model). One shared code per team for both sides."""
+    teams = sorted(set(pd.concat([train['Home_Team'], train['Away_Team'], test['Home_Team'], test['Away_Team']])))
+    codes = {team: code for code, team in enumerate(teams)}
+    encode = lambda df: np.column_stack([df['Home_Team'].map(codes), df['Away_Team'].map(codes)]).astype(np.float64)
+    return encode(train), encode(test)
+
+
+FEATURIZERS = {
+    'ratings': ratings_features,
+    'team_codes': team_code_features,
+}
+
+
+def make_model(spec, params=None):
+    settings = {**spec['params'], **(params or {})}
+    if spec['model'] == 'RandomForestClassifier':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(n_jobs=1, **settings)
+    if spec['model'] == 'LogisticRegression':
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(**settings)
+    raise ValueError(f"Unknown model type: {spec['model']}")
+
+
+# --- FOLDS ---
+
+def check_blocks_per_season(matches, blocks_per_season):
+    """Raises ValueError if seasons would be sliced without knowing the order the matches were played in."""
+    if blocks_per_season > 1 and match_store.time_column(matches) is None:
+        raise ValueError(f"blocks_per_season={blocks_per_season} needs a Date or Matchday column. "
+                         "Results matrices are in home-team order, so slices of a season wouldn't be "
+                         "walk-forward. Use 1 block per season.")
+
+
+def assign_blocks(matches, blocks_per_season=BLOCKS_PER_SEASON):
+    """
+    Block number for every match, oldest first. Each season is cut into equal slices
+    along Date / Matchday boundaries (more than one block per season needs one of them).
+    """
+    check_blocks_per_season(matches, blocks_per_season)
+    matches = match_store.sort_chronologically(matches).reset_index(drop=True)
+    season_idx = matches['Season'].rank(method='dense').astype(int) - 1
+
+    time_col = match_store.time_column(matches)
+    if time_col:
+        step = matches.groupby('Season')[time_col].rank(method='dense') - 1
+        steps = matches.groupby('Season')[time_col].transform('nunique')
+    else:   # One block per season: every match is step 0
+        step = pd.Series(0, index=matches.index)
+        steps = pd.Series(1, index=matches.index)
+
+    within = (step * blocks_per_season // steps).astype(int)
+    return matches.assign(Block=season_idx * blocks_per_season + within)
+
+
+def fold_key(name, train, test):
+    """Cache key from the featurizer and the exact rows in the fold (not file paths)."""
+    digest = hashlib.sha256(f"{name}:v{FEATURES_VERSION}".encode('utf-8'))
+    cols = match_store.KEY_COLUMNS + ['Home_Goals', 'Away_Goals']
+    for part in (train, test):
+        digest.update(pd.util.hash_pandas_object(part[cols], index=False).to_numpy().tobytes())
+        digest.update(b'|')
+    return f"{name}-{digest.hexdigest()[:16]}"
+
+
+def fold_matrices(featurizer, train, test, cache_dir=CACHE_DIR):
+    """Returns (X_train, y_train, X_test, y_test), from the cache when this exact fold was seen before."""
+    path = os.path.join(cache_dir, fold_key(featurizer, train, test) + '.npz') if cache_dir else None
+    if path and os.path.exists(path):
+        with np.load(path) as data:
+            return data['X_train'], data['y_train'], data['X_test'], data['y_test']
+
+    X_train, X_test = FEATURIZERS[featurizer](train, test)
+    y_train = train['Outcome'].map(CLASSES.index).to_numpy(np.int8)
+    y_test = test['Outcome'].map(CLASSES.index).to_numpy(np.int8)
+
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test)
+        os.replace(tmp_path, path)
+    return X_train, y_train, X_test, y_test
+
+
+# --- SCORING ---
+
+def full_proba(model, X):
+    """predict_proba with one column per entry in CLASSES (a fold may lack a class)."""
+    probs = np.zeros((len(X), len(CLASSES)))
+    probs[:, model.classes_] = model.predict_proba(X)
+    return probs
+
+
+def score(probs, y):
+    """Accuracy, log-loss and (multi-class) Brier score."""
+    onehot = np.eye(len(CLASSES))[y]
+    picked = np.clip(probs[np.arange(len(y)), y], 1e-15, 1)
+    return {
+        'accuracy': float((probs.argmax(axis=1) == y).mean()),
+        'log_loss': float(-np.log(picked).mean()),
+        'brier': float(((probs - onehot) ** 2).sum(axis=1).mean()),
+    }
+
+
+def _init_worker(matches):
+    global _MATCHES
+    _MATCHES = matches
+
+
+def run_fold(model_name, block, params=None, cache_dir=CACHE_DIR, matches=None):
+    """Trains on every block before `block`, then scores `block`."""
+    matches = _MATCHES if matches is None else matches
+    spec = MODEL_SPECS[model_name]
+    start = time.perf_counter()
+
+    train = matches[matches['Block'] < block]
+    test = matches[matches['Block'] == block]
+    X_train, y_train, X_test, y_test = fold_matrices(spec['features'], train, test, cache_dir)
+
+    model = make_model(spec, params)
+    with instrumentation.stage('backtest.fit', rows=len(y_train), model=model_name, block=int(block)):
+        model.fit(X_train, y_train)
+
+    # "Guess the league's usual outcome split" is the bar the model has to beat
+    base_rates = np.bincount(y_train, minlength=len(CLASSES)) / len(y_train)
+
+    return {
+        'block': int(block),
+        'season': test['Season'].iloc[0],
+        'n_train': len(y_train),
+        'n_test': len(y_test),
+        'train_accuracy': float((model.predict(X_train) == y_train).mean()),
+        **score(full_proba(model, X_test), y_test),
+        'baseline_log_loss': score(np.tile(base_rates, (len(y_test), 1)), y_test)['log_loss'],
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def summarize(folds):
+    """Test-size-weighted averages over all folds."""
+    weights = np.array([f['n_test'] for f in folds], dtype=float)
+    summary = {'folds': len(folds), 'n_test': int(weights.sum())}
+    for metric in ('accuracy', 'log_loss', 'brier', 'train_accuracy', 'baseline_log_loss'):
+        summary[metric] = float(np.average([f[metric] for f in folds], weights=weights))
+    return summary
+
+
+def run_backtest(model_name='stats_rf', params=None, matches=None, blocks_per_season=BLOCKS_PER_SEASON,
+                 min_train_blocks=MIN_TRAIN_BLOCKS, workers=None, cache_dir=CACHE_DIR, verbose=True, league=None):
+    """
+    Walk-forward backtest. Returns {'model', 'params', 'folds': [...], 'summary': {...}}.
+    Folds are independent, so they run in parallel (one process per core by default).
+    """
+    if matches is None:
+        league = leagues.get_league(league)
+        matches = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    matches = assign_blocks(matches, blocks_per_season)
+
+    first = blocks_per_season if min_train_blocks is None else min_train_blocks
+    blocks = sorted(b for b in matches['Block'].unique() if b >= first)
+    if not blocks:
+        raise ValueError("Not enough seasons to backtest (need at least one to train on).")
+
+    workers = min(workers or os.cpu_count() or 1, len(blocks))
+    if verbose:
+        print(f"🔁 Walk-forward backtest of {model_name}: {len(blocks)} folds on {workers} worker(s)...")
+
+    start = time.perf_counter()
+    with instrumentation.stage('backtest', rows=len(matches), model=model_name, folds=len(blocks)):
+        if workers == 1:
+            folds = [run_fold(model_name, b, params, cache_dir, matches) for b in blocks]
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(matches,)) as pool:
+                futures = [pool.submit(run_fold, model_name, b, params, cache_dir) for b in blocks]
+                folds = [f.result() for f in futures]
+
+    result = {'model': model_name, 'params': {**MODEL_SPECS[model_name]['params'], **(params or {})},
+              'blocks_per_season': blocks_per_season, 'folds': folds, 'summary': summarize(folds),
+              'seconds': round(time.perf_counter() - start, 2)}
+    if verbose:
+        print_report(result)
+    return result
+
+
+def print_report(result):
+    print(f"\n{'Season':<9} {'Block':>5} {'Train':>6} {'Test':>5} {'Acc':>7} {'LogLoss':>8} {'Brier':>6}")
+    for f in result['folds']:
+        print(f"{f['season']:<9} {f['block']:>5} {f['n_train']:>6} {f['n_test']:>5} "
+              f"{f['accuracy']:>7.1%} {f['log_loss']:>8.3f} {f['brier']:>6.3f}")
+    s = result['summary']
+    print("-" * 50)
+    print(f"📊 {result['model']}: accuracy {s['accuracy']:.2%}, log-loss {s['log_loss']:.3f} "
+          f"(base rates {s['baseline_log_loss']:.3f}), Brier {s['brier']:.3f}  [{result['seconds']} s]")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the NPFL models.")
+    parser.add_argument('--model', choices=sorted(MODEL_SPECS), default='stats_rf')
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    parser.add_argument('--blocks-per-season', type=int, default=BLOCKS_PER_SEASON,
+                        help="Test blocks per season (> 1 needs a Date or Matchday column).")
+    parser.add_argument('--workers', type=int, help="Processes to use (default: all cores).")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every fold's features.")
+    parser.add_argument('--output', help="Save the fold results as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        result = run_backtest(args.model, blocks_per_season=args.blocks_per_season, workers=args.workers,
+                              cache_dir=None if args.no_cache else CACHE_DIR, league=args.league)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Saved backtest results to {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
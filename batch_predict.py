@@ -0,0 +1,133 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+# Column names we accept for the two teams in a fixtures file
+HOME_ALIASES = ['Home', 'Home_Team', 'home', 'home_team']
+AWAY_ALIASES = ['Away', 'Away_Team', 'away', 'away_team']
+
+
+def load_fixtures(path):
+    """
+    Reads fixtures from CSV or JSON into a DataFrame with 'Home' and 'Away' columns.
+    JSON can be a list of {"home": ..., "away": ...} objects or {"fixtures": [...]}.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('fixtures', [])
+        fixtures = pd.DataFrame(data)
+    else:
+        fixtures = pd.read_csv(path)
+
+    home_col = next((c for c in HOME_ALIASES if c in fixtures.columns), None)
+    away_col = next((c for c in AWAY_ALIASES if c in fixtures.columns), None)
+    if home_col is None or away_col is None:
+        raise ValueError(f"{path} needs 'Home' and 'Away' columns (found: {list(fixtures.columns)})")
+
+    fixtures = fixtures.rename(columns={home_col: 'Home', away_col: 'Away'})
+    fixtures['Home'] = fixtures['Home'].astype(str).str.strip()
+    fixtures['Away'] = fixtures['Away'].astype(str).str.strip()
+    return fixtures
+
+
+def resolve_fixture_teams(fixtures, resolve_fn):
+    """
+    Maps every typed name to a known team, resolving each distinct name only once.
+    Returns (fixtures with resolved names, list of names that matched nothing).
+    """
+    names = pd.unique(pd.concat([fixtures['Home'], fixtures['Away']]))
+    lookup = {name: resolve_fn(name) for name in names}
+    unknown = [name for name, team in lookup.items() if team is None]
+
+    resolved = fixtures.assign(Home=fixtures['Home'].map(lookup), Away=fixtures['Away'].map(lookup))
+    resolved = resolved.dropna(subset=['Home', 'Away']).reset_index(drop=True)
+    return resolved, unknown
+
+
+def add_prediction_columns(fixtures, probs, classes):
+    """Adds one probability column per outcome, plus the pick and its confidence."""
+    out = fixtures.copy()
+    for i, outcome in enumerate(classes):
+        out[outcome] = probs[:, i]
+    best = probs.argmax(axis=1)
+    out['Prediction'] = [classes[i] for i in best]
+    out['Confidence'] = probs[range(len(out)), best]
+    return out
+
+
+def format_social_report(predictions, title="🤖 AI PREDICTIONS (NPFL Week X)"):
+    """The copy-paste block for social media (predictions needs Home, Away, Prediction, Confidence)."""
+    lines = [
+        "=" * 50,
+        "📢 COPY THIS FOR SOCIAL MEDIA:",
+        "=" * 50,
+        title,
+        "Model Accuracy: ~68% (Historical Baseline)\n",
+    ]
+    for p in predictions:
+        # Add an emoji based on confidence
+        emoji = "🔒" if p['Confidence'] > 0.7 else "⚠️" if p['Confidence'] < 0.5 else "✅"
+
+        # Format: Home vs Away: Winner (XX%)
+        lines.append(f"{p['Home']} vs {p['Away']}: {p['Prediction']} {p['Confidence']:.0%} {emoji}")
+
+    lines.append("\n#NPFL #NaijaBallboy #DataScience")
+    lines.append("=" * 50)
+    return "\n".join(lines)
+
+
+def write_predictions(predictions, path):
+    if path.lower().endswith('.json'):
+        predictions.to_json(path, orient='records', indent=2)
+    else:
+        predictions.to_csv(path, index=False)
+
+
+def run_batch(fixtures_path, resolve_fn, predict_fn, output_path=None, report_path=None):
+    """
+    Shared batch driver for both predictors.
+    predict_fn(resolved_fixtures) must score every fixture with ONE predict_proba call.
+    """
+    fixtures = load_fixtures(fixtures_path)
+    print(f"📋 Loaded {len(fixtures)} fixtures from {fixtures_path}")
+
+    start = time.perf_counter()
+    resolved, unknown = resolve_fixture_teams(fixtures, resolve_fn)
+    predictions = predict_fn(resolved)
+    elapsed = time.perf_counter() - start
+
+    if unknown:
+        print(f"⚠️ Skipped fixtures with unknown teams: {', '.join(unknown)}")
+    rate = len(predictions) / elapsed if elapsed > 0 else float('inf')
+    print(f"⚡ Scored {len(predictions)} fixtures in {elapsed * 1000:.1f} ms ({rate:,.0f} fixtures/sec)")
+
+    if output_path:
+        write_predictions(predictions, output_path)
+        print(f"💾 Saved probabilities to {output_path}")
+
+    report = format_social_report(predictions.to_dict('records'))
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+        print(f"💾 Saved social media report to {report_path}")
+    else:
+        print("\n" + report)
+    return predictions
+
+
+def add_batch_arguments(parser):
+    parser.add_argument('--fixtures', help="CSV or JSON file of fixtures (Home, Away). Runs without prompts.")
+    parser.add_argument('--output', help="Where to write the probabilities (.csv or .json).")
+    parser.add_argument('--report', help="Where to write the social media report (default: print it).")
+    return parser
+
+
+def fixtures_exist(path):
+    if path and not os.path.exists(path):
+        print(f"❌ Error: {path} not found.")
+        return False
+    return True
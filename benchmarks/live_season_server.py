@@ -0,0 +1,145 @@
+"""
+A local stand-in for the live season's Wikipedia page, for trying out season_watch.py.
+
+    python benchmarks/live_season_server.py --port 8765 --edit-every 5
+    python npfl.py watch --interval 2 --base-url http://127.0.0.1:8765
+
+Serves the league's current season (read from its match store) as a Wikipedia-style page
+on every path. Every --edit-every seconds the page gets a new revision: odd revisions only
+change the prose (the results table stays the same), even ones add a matchday of made-up
+results for fixtures not played yet. Responses carry an ETag and Last-Modified and
+answer 304 Not Modified to conditional requests, like Wikipedia does. Run it from a copy
+of the project: the watcher writes the new results into the match store.
+"""
+import argparse
+import email.utils
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import leagues
+import match_store
+import synthetic_league
+
+HOST = '127.0.0.1'
+PORT = 8765
+EDIT_EVERY = 5.0
+
+
+class LiveSeason:
+    """The page at each revision: the stored matches plus one more made-up matchday every other edit."""
+
+    def __init__(self, league, edit_every=EDIT_EVERY, seed=0):
+        self.league = league
+        self.edit_every = edit_every
+        self.started = time.time()
+        label, _ = league.current_season
+        played = match_store.read_partition(label, league.store_dir)
+        if played is None or played.empty:
+            raise SystemExit(f"❌ No matches stored for {league.id} {label} yet.")
+        self.played = played
+
+        # Every fixture not played yet, with a random score, in a random order
+        teams = sorted(set(played['Home_Team']) | set(played['Away_Team']))
+        done = set(zip(played['Home_Team'], played['Away_Team']))
+        todo = [(h, a) for h in teams for a in teams if h != a and (h, a) not in done]
+        rng = np.random.default_rng(seed)
+        rng.shuffle(todo)
+        home_goals, away_goals = rng.poisson(1.4, len(todo)), rng.poisson(0.8, len(todo))
+        self.upcoming = pd.DataFrame({
+            'Season': label,
+            'Home_Team': [h for h, _ in todo],
+            'Away_Team': [a for _, a in todo],
+            'Home_Goals': home_goals,
+            'Away_Goals': away_goals,
+            'Outcome': np.select([home_goals > away_goals, home_goals < away_goals], ['Home Win', 'Away Win'], 'Draw'),
+        })
+        self.per_matchday = max(len(teams) // 2, 1)
+        self._pages = {}
+
+    def revision(self):
+        return int((time.time() - self.started) // self.edit_every)
+
+    def last_modified(self, revision):
+        return email.utils.formatdate(self.started + revision * self.edit_every, usegmt=True)
+
+    def page(self, revision):
+        if revision not in self._pages:
+            new = self.upcoming.head((revision // 2) * self.per_matchday)
+            html = synthetic_league.season_html(pd.concat([self.played, new], ignore_index=True),
+                                                title=f"{self.league.name} {self.league.current_season[0]}")
+            prose = f"<p>Revision {revision}: {len(new)} results added since the store was copied.</p>"
+            self._pages = {revision: html.replace('</body>', f"{prose}</body>").encode('utf-8')}
+        return self._pages[revision]
+
+
+def make_handler(season, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'   # Keep-alive, like the real site
+
+        def do_GET(self):
+            revision = season.revision()
+            etag = f'"rev-{revision}"'
+            stats['requests'] += 1
+            if self.headers.get('If-None-Match'):
+                fresh = self.headers['If-None-Match'] == etag
+            else:
+                fresh = self.headers.get('If-Modified-Since') == season.last_modified(revision)
+            if fresh:
+                stats['not_modified'] += 1
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            body = season.page(revision)
+            stats['full'] += 1
+            stats['bytes'] += len(body)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', season.last_modified(revision))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass   # Quiet; the summary is printed on exit
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a changing live-season page for season_watch.py.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--edit-every', type=float, default=EDIT_EVERY, help="Seconds between page revisions.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    season = LiveSeason(leagues.get_league(args.league), args.edit_every, args.seed)
+    stats = {'requests': 0, 'full': 0, 'not_modified': 0, 'bytes': 0}
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(season, stats))
+    print(f"🌐 Live {season.league.name} page on http://{args.host}:{args.port} "
+          f"({len(season.played)} played, {len(season.upcoming)} to come, a new revision every {args.edit_every:g} s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📋 {stats['requests']} requests: {stats['full']} full pages ({stats['bytes'] / 1e3:.0f} kB), "
+              f"{stats['not_modified']} not modified")
+
+
+if __name__ == "__main__":
+    main()
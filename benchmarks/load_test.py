@@ -0,0 +1,130 @@
+"""
+Hammers a running prediction server with concurrent clients.
+
+    python prediction_server.py &
+    python benchmarks/load_test.py --clients 50 --requests 200
+
+Each client keeps one connection open and sends GET /predict requests back to back
+for random fixtures. Reports throughput, client-side p50/p99 latency and the
+server's own /metrics (including the average micro-batch size).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from urllib.parse import urlencode
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'bench_results')
+
+HOST = '127.0.0.1'
+PORT = 8000
+CLIENTS = 50
+REQUESTS_PER_CLIENT = 200
+
+
+async def http_get(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def fetch(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await http_get(reader, writer, path)
+    finally:
+        writer.close()
+
+
+async def client(host, port, teams, n_requests, latencies, failures, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            home, away = rng.sample(teams, 2)
+            start = time.perf_counter()
+            status, _ = await http_get(reader, writer, '/predict?' + urlencode({'home': home, 'away': away}))
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+async def run(host, port, clients, requests_per_client, seed=42):
+    _, body = await fetch(host, port, '/teams')
+    teams = body['teams']
+    _, before = await fetch(host, port, '/metrics')
+
+    latencies, failures = [], []
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, teams, requests_per_client, latencies, failures,
+                                  random.Random(rng.random()))
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    _, after = await fetch(host, port, '/metrics')
+    lat_ms = sorted(x * 1000 for x in latencies)
+    batches = after['batches'] - before['batches']
+    scored = after['fixtures_scored'] - before['fixtures_scored']
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'failures': len(failures),
+        'seconds': round(elapsed, 3),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'client_latency_ms': {
+            'p50': round(statistics.median(lat_ms), 2),
+            'p99': round(lat_ms[min(len(lat_ms) - 1, int(len(lat_ms) * 0.99))], 2),
+        },
+        'server_batches': batches,
+        'server_mean_batch_size': round(scored / batches, 2) if batches else 0,
+        'server_metrics': after,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the local prediction server.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--clients', type=int, default=CLIENTS)
+    parser.add_argument('--requests', type=int, default=REQUESTS_PER_CLIENT, help="Requests per client.")
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'load_test.json'))
+    args = parser.parse_args(argv)
+
+    try:
+        result = asyncio.run(run(args.host, args.port, args.clients, args.requests))
+    except ConnectionRefusedError:
+        print(f"❌ No server on {args.host}:{args.port}. Start it with: python prediction_server.py")
+        sys.exit(1)
+
+    print(f"⚡ {result['requests']} requests from {result['clients']} clients in {result['seconds']} s "
+          f"({result['requests_per_sec']:,.0f} req/s)")
+    print(f"   Client latency: p50 {result['client_latency_ms']['p50']} ms, p99 {result['client_latency_ms']['p99']} ms")
+    print(f"   Server: {result['server_batches']} batches, {result['server_mean_batch_size']} fixtures per batch")
+    if result['failures']:
+        print(f"⚠️ {result['failures']} requests failed.")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Performance suite for the main pipeline, run on a synthetic league of any size.
+
+    python benchmarks/run_benchmarks.py                          (20 teams x 10 seasons)
+    python benchmarks/run_benchmarks.py --teams 40 --seasons 50 --only parse,features
+    python benchmarks/run_benchmarks.py --baseline bench_results/benchmarks-<commit>.json
+
+Everything runs inside a temporary working directory holding the synthetic data, so the
+real match store, training file and saved models are never touched. Results are saved as
+JSON (bench_results/benchmarks-<git commit>.json) so runs can be compared across commits.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import synthetic_league
+
+RESULTS_DIR = os.path.join(REPO_ROOT, 'bench_results')
+REPEATS = 3
+TOLERANCE = 0.25          # Allowed slowdown vs the baseline
+BATCH_FIXTURES = 1000
+SINGLE_CALLS = 200
+
+
+def timed(fn, repeats=REPEATS, setup=None):
+    """Median wall time of fn() in ms (setup() runs before each repeat, untimed)."""
+    times = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):   # The pipeline is chatty
+            fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 3)
+
+
+# --- CASES ---
+# Each takes the benchmark context and returns {metric: value}. Metrics ending in _ms are compared.
+
+def bench_parse(ctx):
+    import matrix_parser
+    import npfl_scraper
+
+    season = max(ctx['pages'])
+    with open(ctx['pages'][season], encoding='utf-8') as f:
+        html = f.read()
+    tables = pd.read_html(StringIO(html))
+    matrix = max(tables, key=lambda t: t.shape[0] * t.shape[1])
+    n = len(matrix_parser.melt_results_matrix(matrix, season))
+
+    melt_ms = timed(lambda: matrix_parser.melt_results_matrix(matrix, season), repeats=ctx['repeats'] * 5)
+    return {
+        'matches': n,
+        'melt_ms': melt_ms,
+        'read_html_plus_melt_ms': timed(lambda: npfl_scraper.parse_season_html(html, season), ctx['repeats']),
+        'melt_matches_per_sec': round(n / (melt_ms / 1000)),
+    }
+
+
+def bench_load(ctx):
+    """The string-column CSV path vs the compact frame (cold = parse and build the cache, warm = cache hit)."""
+    import compact_matches
+    import match_store
+
+    def clear_cache():
+        for path in [os.path.join(match_store.STORE_DIR, compact_matches.CACHE_FILE), 'npfl_team_ids.json']:
+            if os.path.exists(path):
+                os.remove(path)
+
+    strings = match_store.load_matches()
+    compact = compact_matches.load_compact()
+    return {
+        'csv_ms': timed(match_store.load_matches, ctx['repeats']),
+        'compact_cold_ms': timed(compact_matches.load_compact, ctx['repeats'], setup=clear_cache),
+        'compact_warm_ms': timed(compact_matches.load_compact, ctx['repeats']),
+        'csv_mb': round(float(strings.memory_usage(deep=True).sum()) / 1e6, 2),
+        'compact_mb': round(float(compact.memory_usage(deep=True).sum()) / 1e6, 2),
+    }
+
+
+def bench_validate(ctx):
+    import data_validation
+    import match_store
+    df = match_store.load_matches()
+    return {'rows': len(df),
+            'gate_ms': timed(lambda: data_validation.check(df), ctx['repeats']),
+            'all_checks_ms': timed(lambda: data_validation.validate(df), ctx['repeats'])}
+
+
+def bench_features(ctx):
+    import feature_engineering
+    return {'rows': ctx['rows'], 'add_features_ms': timed(feature_engineering.add_features, ctx['repeats'])}
+
+
+def bench_train(ctx):
+    import advanced_predictor
+    import model_registry
+
+    def clear_registry():
+        shutil.rmtree(model_registry.REGISTRY_DIR, ignore_errors=True)
+
+    cold = timed(advanced_predictor.load_and_train, ctx['repeats'], setup=clear_registry)
+    warm = timed(advanced_predictor.load_and_train, ctx['repeats'])
+    return {'train_cold_ms': cold, 'load_warm_ms': warm}
+
+
+def bench_predict(ctx):
+    import advanced_predictor
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, team_stats, teams, pairs = advanced_predictor.load_and_train()
+    rng = np.random.default_rng(0)
+    homes = rng.choice(teams, BATCH_FIXTURES)
+    aways = np.array([rng.choice([t for t in teams if t != h]) for h in homes])
+    fixtures = pd.DataFrame({'Home': homes, 'Away': aways})
+
+    def single_sklearn():
+        # The old per-fixture path: one DataFrame and one predict_proba per match
+        for h, a in zip(homes[:SINGLE_CALLS], aways[:SINGLE_CALLS]):
+            model.predict_proba(advanced_predictor.build_features(team_stats, [h], [a]))
+
+    def single_table():
+        for h, a in zip(homes[:SINGLE_CALLS], aways[:SINGLE_CALLS]):
+            try:
+                pairs.lookup(h, a)
+            except KeyError:
+                pass
+
+    sklearn_ms = timed(single_sklearn, ctx['repeats'])
+    table_ms = timed(single_table, ctx['repeats'])
+    batch_ms = timed(lambda: model.predict_proba(advanced_predictor.build_features(team_stats, homes, aways)),
+                     ctx['repeats'])
+    return {
+        'single_predict_proba_ms': round(sklearn_ms / SINGLE_CALLS, 4),
+        'single_table_lookup_ms': round(table_ms / SINGLE_CALLS, 4),
+        f'batch_{BATCH_FIXTURES}_predict_proba_ms': batch_ms,
+        f'batch_{BATCH_FIXTURES}_table_ms': timed(lambda: advanced_predictor.predict_batch(pairs, fixtures),
+                                                  ctx['repeats']),
+    }
+
+
+def bench_forest(ctx):
+    """sklearn predict_proba vs the packed NumPy forest: one row at a time and one batch."""
+    import advanced_predictor
+    import forest_export
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, _, _, pairs = advanced_predictor.load_and_train()
+        forest = forest_export.load_or_export(pairs.model_key, model)
+    X = forest_export.probe_rows(forest, BATCH_FIXTURES)
+    big = forest_export.probe_rows(forest, 4 * BATCH_FIXTURES)   # Over SKLEARN_ROWS: goes to sklearn
+    frame = pd.DataFrame(X, columns=advanced_predictor.FEATURE_COLS)
+
+    def single_sklearn():
+        for i in range(SINGLE_CALLS):
+            model.predict_proba(frame.iloc[[i]])
+
+    def single_packed():
+        for i in range(SINGLE_CALLS):
+            forest.predict_proba(X[i])
+
+    return {
+        'nodes': len(forest.left),
+        'max_abs_diff': forest_export.parity_error(model, forest, X),
+        'single_sklearn_ms': round(timed(single_sklearn, ctx['repeats']) / SINGLE_CALLS, 4),
+        'single_packed_ms': round(timed(single_packed, ctx['repeats']) / SINGLE_CALLS, 4),
+        f'batch_{BATCH_FIXTURES}_sklearn_ms': timed(lambda: model.predict_proba(frame), ctx['repeats']),
+        f'batch_{BATCH_FIXTURES}_packed_ms': timed(lambda: forest.packed_proba(X), ctx['repeats']),
+        f'batch_{4 * BATCH_FIXTURES}_routed_ms': timed(lambda: forest.predict_proba(big), ctx['repeats']),
+        f'batch_{4 * BATCH_FIXTURES}_packed_ms': timed(lambda: forest.packed_proba(big), ctx['repeats']),
+    }
+
+
+def bench_update(ctx):
+    """A new matchday arriving: upsert into the store, then the incremental feature update."""
+    import feature_engineering
+    import match_store
+
+    season = match_store.list_seasons()[-1]
+    full = match_store.read_partition(season)
+    new = full.tail(max(1, len(full) // 38))
+
+    def rewind():
+        with contextlib.redirect_stdout(io.StringIO()):
+            match_store.write_partition(full.iloc[:len(full) - len(new)], season)
+            feature_engineering.add_features()
+
+    def update():
+        match_store.upsert_matches(new)
+        feature_engineering.update_features(new)
+
+    upsert_ms = timed(lambda: match_store.upsert_matches(new), ctx['repeats'], setup=rewind)
+    return {'new_matches': len(new), 'upsert_ms': upsert_ms,
+            'upsert_plus_features_ms': timed(update, ctx['repeats'], setup=rewind)}
+
+
+def bench_goals(ctx):
+    import goals_model
+    import match_store
+
+    matches = match_store.load_matches()
+    model = goals_model.GoalsModel.fit(matches)
+    last = matches[matches['Season'] == matches['Season'].max()]
+    return {
+        'fit_ms': timed(lambda: goals_model.GoalsModel.fit(matches), ctx['repeats']),
+        'season_grid_ms': timed(lambda: goals_model.market_probs(
+            model.scoreline_grid(last['Home_Team'], last['Away_Team'])), ctx['repeats']),
+    }
+
+
+def bench_rank(ctx):
+    """The old dense get_dummies + lbfgs fit vs the sparse saga fit, and the warm-started season series."""
+    import compact_matches
+    import power_rankings
+    from sklearn.linear_model import LogisticRegression
+
+    df = compact_matches.load_compact()
+    home, away = compact_matches.team_codes(df)
+    y = df['Outcome'].cat.codes.to_numpy()
+
+    def dense():
+        teams = df[['Home_Team', 'Away_Team']].apply(lambda col: col.cat.remove_unused_categories())
+        LogisticRegression(max_iter=1000).fit(pd.get_dummies(teams, prefix=['Home', 'Away']), y)
+
+    def sparse():
+        X = power_rankings.design_matrix(home, away, len(df['Home_Team'].cat.categories))
+        LogisticRegression(**power_rankings.MODEL_PARAMS).fit(X, y)
+
+    def clear_series():
+        if os.path.exists('npfl_rankings.npz'):
+            os.remove('npfl_rankings.npz')
+
+    return {
+        'dense_fit_ms': timed(dense, ctx['repeats']),
+        'sparse_fit_ms': timed(sparse, ctx['repeats']),
+        'series_cold_ms': timed(power_rankings.fit_rankings, ctx['repeats'], setup=clear_series),
+        'series_warm_ms': timed(power_rankings.fit_rankings, ctx['repeats']),
+    }
+
+
+def bench_simulate(ctx):
+    import season_simulator
+    n = 20_000
+    ms = timed(lambda: season_simulator.simulate(n_sims=n, workers=1), ctx['repeats'])
+    return {'sims': n, 'simulate_ms': ms, 'seasons_per_sec': round(n / (ms / 1000))}
+
+
+CASES = {
+    'parse': bench_parse,
+    'load': bench_load,
+    'validate': bench_validate,
+    'features': bench_features,
+    'train': bench_train,
+    'predict': bench_predict,
+    'forest': bench_forest,
+    'update': bench_update,
+    'goals': bench_goals,
+    'rank': bench_rank,
+    'simulate': bench_simulate,
+}
+
+
+# --- RUNNER ---
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def environment():
+    import sklearn
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'sklearn': sklearn.__version__, 'cpus': os.cpu_count(), 'machine': platform.machine()}
+
+
+def run(teams, seasons, cases, repeats=REPEATS, seed=42):
+    matches = synthetic_league.generate_league(teams, seasons, seed=seed, last_season_played=0.5)  # A live season
+    workdir = tempfile.mkdtemp(prefix='npfl_bench_')
+    cwd = os.getcwd()
+    try:
+        pages = synthetic_league.write_league(matches, workdir)
+        os.chdir(workdir)   # Every pipeline path is relative, so this points it all at the synthetic data
+        ctx = {'pages': pages, 'rows': len(matches), 'repeats': repeats}
+
+        results = {}
+        for name in cases:
+            start = time.perf_counter()
+            results[name] = CASES[name](ctx)
+            print(f"   {name:<9} {time.perf_counter() - start:6.1f} s  {results[name]}")
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Metrics ending in _ms that got more than `tolerance` slower than the baseline."""
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(case, {}).get(metric)
+            if metric.endswith('_ms') and old and value > old * (1 + tolerance) + 1:   # +1 ms for timer noise
+                regressions.append(f"{case}.{metric}: {old} ms -> {value} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NPFL pipeline on synthetic data.")
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--only', help=f"Comma-separated cases (default: all of {', '.join(CASES)}).")
+    parser.add_argument('--output', help="Where to save the JSON (default: bench_results/benchmarks-<commit>.json).")
+    parser.add_argument('--baseline', help="Earlier results to compare against.")
+    args = parser.parse_args(argv)
+
+    cases = args.only.split(',') if args.only else list(CASES)
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    commit = git_commit()
+    print(f"⏱️ Benchmarking {args.teams} teams x {args.seasons} seasons (commit {commit})...")
+    results = run(args.teams, args.seasons, cases, args.repeats)
+
+    report = {
+        'meta': {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                 'teams': args.teams, 'seasons': args.seasons, 'repeats': args.repeats, **environment()},
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmarks-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved benchmark results to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if (baseline['meta']['teams'], baseline['meta']['seasons']) != (args.teams, args.seasons):
+            print("⚠️ The baseline was run on a different league size; comparing anyway.")
+        regressions = compare(results, baseline['results'])
+        if regressions:
+            print("❌ Regressions:\n   " + "\n   ".join(regressions))
+            sys.exit(1)
+        print("✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Tracks how long each `npfl` subcommand spends importing modules before doing any work.
+
+    python benchmarks/startup_time.py                      # measure, save bench_results/startup_time.json
+    python benchmarks/startup_time.py --baseline old.json  # also fail if a command got >25% slower
+
+Each command is measured in a fresh interpreter with `python -X importtime`,
+loading the subcommand exactly like the CLI does (without running it).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import npfl  # Cheap on purpose: only argparse + importlib
+
+RESULTS_DIR = os.path.join(REPO_ROOT, 'bench_results')
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'startup_time.json')
+REPEATS = 3
+TOLERANCE = 0.25   # Allowed slowdown vs the baseline before we call it a regression
+
+
+def measure(snippet):
+    """Runs `snippet` under -X importtime. Returns (total import ms, {top-level module: cumulative ms})."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', snippet],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+
+    total_us = 0
+    top_level = {}
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |   cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        if not name.startswith('  '):   # Not indented = imported directly, not as a dependency
+            top_level[name.strip()] = int(cumulative_us) / 1000
+    return total_us / 1000, top_level
+
+
+def command_snippet(name, advanced=False):
+    return f"import npfl; npfl.load_command({name!r}, advanced={advanced})"
+
+
+def run(repeats=REPEATS):
+    targets = {'(cli only)': "import npfl; npfl.build_parser()"}
+    for name in npfl.COMMANDS:
+        targets[name] = command_snippet(name)
+    targets['predict --advanced'] = command_snippet('predict', advanced=True)
+
+    results = {}
+    for label, snippet in targets.items():
+        runs = [measure(snippet) for _ in range(repeats)]
+        totals = [total for total, _ in runs]
+        heaviest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:5]
+        results[label] = {
+            'import_ms': round(statistics.median(totals), 1),
+            'heaviest': {module: round(ms, 1) for module, ms in heaviest},
+        }
+        print(f"{label:<22} {results[label]['import_ms']:>8.1f} ms   "
+              + ", ".join(f"{m} {ms:.0f}ms" for m, ms in heaviest[:3]))
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Returns the list of commands whose import time grew by more than `tolerance`."""
+    regressions = []
+    for label, entry in results.items():
+        old = baseline.get(label)
+        if old is None:
+            continue
+        if entry['import_ms'] > old['import_ms'] * (1 + tolerance) + 5:   # +5 ms for timer noise
+            regressions.append(f"{label}: {old['import_ms']:.1f} ms -> {entry['import_ms']:.1f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import cost of each npfl subcommand.")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to save the JSON results.")
+    parser.add_argument('--baseline', help="Earlier results to compare against.")
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    args = parser.parse_args(argv)
+
+    results = run(args.repeats)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Saved startup times to {args.output}")
+
+    # The bare CLI must never drag in the data science stack
+    heavy = {'pandas', 'numpy', 'sklearn', 'matplotlib', 'seaborn'} & set(results['(cli only)']['heaviest'])
+    if heavy:
+        print(f"❌ `npfl` imports {', '.join(sorted(heavy))} before choosing a subcommand.")
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print("❌ Startup regressions:\n   " + "\n   ".join(regressions))
+            sys.exit(1)
+        print("✅ No startup regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Synthetic leagues for scale testing: any number of teams and seasons, in the real data's format.
+
+    python benchmarks/synthetic_league.py --teams 40 --seasons 30 --out /tmp/big_league
+
+Writes, under --out:
+    npfl_match_store/<season>.csv     (the match store layout)
+    npfl_historical_data.csv          (the old single-file layout)
+    html/<season>.html                (Wikipedia-style season pages with a results matrix)
+
+Goals are Poisson with per-team attack/defense that drift between seasons, a home
+advantage like the NPFL's, and promotion/relegation (new names, weaker sides).
+"""
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import match_store
+import matrix_parser
+
+CITIES = ['Aba', 'Abeokuta', 'Abuja', 'Akure', 'Asaba', 'Awka', 'Bauchi', 'Benin', 'Calabar', 'Damaturu',
+          'Enugu', 'Gombe', 'Gusau', 'Ibadan', 'Ijebu', 'Ikorodu', 'Ilorin', 'Jos', 'Kaduna', 'Kano',
+          'Katsina', 'Lafia', 'Lagos', 'Lokoja', 'Maiduguri', 'Makurdi', 'Minna', 'Nnewi', 'Ogbomoso',
+          'Onitsha', 'Osogbo', 'Owerri', 'Port Harcourt', 'Sagamu', 'Sokoto', 'Umuahia', 'Uyo', 'Warri',
+          'Yenagoa', 'Yola', 'Zaria']
+SUFFIXES = ['United', 'Rangers', 'Stars', 'Warriors', 'City', 'Tornadoes', 'Pillars', 'Sharks',
+            'Lions', 'Rovers', 'Academicals', 'Insurance', 'Wolves', 'Queens', 'Strikers']
+
+HOME_ADVANTAGE = 0.45   # log-rate; NPFL home sides score far more than away sides
+BASE_RATE = 0.0         # log-rate of an average away side (exp(0) = 1 goal)
+STRENGTH_SD = 0.25
+DRIFT_SD = 0.10         # How much a team's strength changes between seasons
+MEAN_REVERSION = 0.2    # Share of a team's strength lost each season (keeps long leagues realistic)
+PROMOTED_PENALTY = 0.15
+
+
+def team_names(seed=0):
+    """An endless stream of distinct, realistic-looking team names."""
+    rng = np.random.default_rng(seed)
+    pairs = [f"{c} {s}" for c, s in itertools.product(CITIES, SUFFIXES)]
+    rng.shuffle(pairs)
+    yield from pairs
+    for n in itertools.count(2):
+        for name in pairs:
+            yield f"{name} {n}"
+
+
+def season_label(year):
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def generate_league(n_teams=20, n_seasons=5, relegated=4, seed=42, start_year=2000, last_season_played=1.0):
+    """
+    Returns matches in the store's schema (Season, Home_Team, Away_Team, Home_Goals, Away_Goals, Outcome).
+    last_season_played < 1 leaves the final season unfinished, like a live one.
+    """
+    rng = np.random.default_rng(seed)
+    names = team_names(seed)
+    teams = [next(names) for _ in range(n_teams)]
+    attack = dict(zip(teams, rng.normal(0, STRENGTH_SD, n_teams)))
+    defense = dict(zip(teams, rng.normal(0, STRENGTH_SD, n_teams)))
+
+    h_idx, a_idx = np.divmod(np.arange(n_teams * n_teams), n_teams)
+    off_diagonal = h_idx != a_idx
+    h_idx, a_idx = h_idx[off_diagonal], a_idx[off_diagonal]
+
+    seasons = []
+    for s in range(n_seasons):
+        label = season_label(start_year + s)
+        att = np.array([attack[t] for t in teams])
+        dfn = np.array([defense[t] for t in teams])
+
+        home_rate = np.exp(BASE_RATE + HOME_ADVANTAGE + att[h_idx] - dfn[a_idx])
+        away_rate = np.exp(BASE_RATE + att[a_idx] - dfn[h_idx])
+        hg = rng.poisson(home_rate).astype(matrix_parser.GOAL_DTYPE)
+        ag = rng.poisson(away_rate).astype(matrix_parser.GOAL_DTYPE)
+
+        season = pd.DataFrame({
+            'Season': label,
+            'Home_Team': np.array(teams, dtype=object)[h_idx],
+            'Away_Team': np.array(teams, dtype=object)[a_idx],
+            'Home_Goals': hg,
+            'Away_Goals': ag,
+            'Outcome': np.select([hg > ag, hg < ag], ['Home Win', 'Away Win'], default='Draw'),
+        })
+        if s == n_seasons - 1 and last_season_played < 1:
+            season = season.sample(frac=last_season_played, random_state=seed).sort_index()
+        seasons.append(season)
+
+        # Between seasons: everyone drifts, the bottom sides go down, new names come up
+        for t in teams:
+            attack[t] = attack[t] * (1 - MEAN_REVERSION) + rng.normal(0, DRIFT_SD)
+            defense[t] = defense[t] * (1 - MEAN_REVERSION) + rng.normal(0, DRIFT_SD)
+        points = (3 * (hg > ag) + (hg == ag)).astype(int)
+        table = (pd.Series(points).groupby(h_idx).sum()
+                 + pd.Series((3 * (ag > hg) + (hg == ag)).astype(int)).groupby(a_idx).sum())
+        for i in table.sort_values().index[:relegated]:
+            new = next(names)
+            attack[new] = rng.normal(-PROMOTED_PENALTY, STRENGTH_SD)
+            defense[new] = rng.normal(-PROMOTED_PENALTY, STRENGTH_SD)
+            teams[i] = new
+
+    return pd.concat(seasons, ignore_index=True)[matrix_parser.MATCH_COLUMNS]
+
+
+def abbreviation(team, taken):
+    base = ''.join(ch for ch in team.upper() if ch.isalpha())[:3]
+    abbr, n = base, 1
+    while abbr in taken:
+        abbr, n = f"{base[:2]}{n}", n + 1
+    taken.add(abbr)
+    return abbr
+
+
+def season_html(season_matches, title=None):
+    """
+    A Wikipedia-like season page: a standings table (which the scraper must skip)
+    and the results matrix (Home down, abbreviations across, "—" on the diagonal, a footnote or two).
+    """
+    teams = sorted(set(season_matches['Home_Team']) | set(season_matches['Away_Team']))
+    label = season_matches['Season'].iloc[0]
+    taken = set()
+    abbrs = [abbreviation(t, taken) for t in teams]
+    scores = {(h, a): f"{hg}–{ag}" for h, a, hg, ag in season_matches[
+        ['Home_Team', 'Away_Team', 'Home_Goals', 'Away_Goals']].itertuples(index=False)}
+
+    # Standings (numbers only)
+    played = pd.concat([season_matches['Home_Team'], season_matches['Away_Team']]).value_counts()
+    standings = ["<table class='wikitable'><tr><th>Pos</th><th>Team</th><th>Pld</th><th>Pts</th></tr>"]
+    for pos, team in enumerate(teams, start=1):
+        standings.append(f"<tr><td>{pos}</td><td>{team}</td><td>{played.get(team, 0)}</td><td>{pos * 2}</td></tr>")
+    standings.append("</table>")
+
+    rows = ["<table class='wikitable'><tr><th>Home \\ Away</th>" + ''.join(f"<th>{a}</th>" for a in abbrs) + "</tr>"]
+    for i, home in enumerate(teams):
+        cells = []
+        for j, away in enumerate(teams):
+            if i == j:
+                cells.append("<td>—</td>")
+            else:
+                score = scores.get((home, away), '')
+                if score and (i * 7 + j) % 41 == 0:
+                    score += "[a]"   # The odd footnote, like the real pages
+                cells.append(f"<td>{score}</td>")
+        rows.append(f"<tr><th>{home}</th>{''.join(cells)}</tr>")
+    rows.append("</table>")
+
+    return (f"<html><head><title>{title or label}</title></head><body>"
+            f"<h2>League table</h2>{''.join(standings)}<h2>Results</h2>{''.join(rows)}</body></html>")
+
+
+def write_league(matches, out_dir):
+    """Writes the store, the single CSV and one HTML page per season. Returns {season: html path}."""
+    store_dir = os.path.join(out_dir, match_store.STORE_DIR)
+    html_dir = os.path.join(out_dir, 'html')
+    os.makedirs(html_dir, exist_ok=True)
+
+    pages = {}
+    for season, season_df in matches.groupby('Season', sort=True):
+        match_store.write_partition(season_df, season, store_dir)
+        pages[season] = os.path.join(html_dir, f"{season}.html")
+        with open(pages[season], 'w', encoding='utf-8') as f:
+            f.write(season_html(season_df))
+    matches.to_csv(os.path.join(out_dir, match_store.LEGACY_FILE), index=False)
+    return pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic league in the project's data formats.")
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--last-season-played', type=float, default=1.0,
+                        help="Share of the final season already played (e.g. 0.4 for a live season).")
+    parser.add_argument('--out', required=True, help="Output directory.")
+    args = parser.parse_args(argv)
+
+    matches = generate_league(args.teams, args.seasons, seed=args.seed, last_season_played=args.last_season_played)
+    pages = write_league(matches, args.out)
+    print(f"✅ Generated {len(matches):,} matches ({args.teams} teams x {args.seasons} seasons) in {args.out}")
+    print(f"   {len(pages)} season pages in {os.path.join(args.out, 'html')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,35 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
-
-# Load the SMART data (with Attack/Defense ratings)
-df = pd.read_csv('npfl_training_data.csv')
-
-# Features: Strength Ratings
-X = df[['Home_Attack', 'Home_Defense', 'Away_Attack', 'Away_Defense']]
-y = df['Outcome']
-
-# Split 80/20
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Train Random Forest
-# limiting max_depth prevents the model from "memorizing" too much detail
-model = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
-model.fit(X_train, y_train)
-
-# --- THE OVERFITTING CHECK ---
-train_preds = model.predict(X_train)
-test_preds = model.predict(X_test)
-
-train_acc = accuracy_score(y_train, train_preds)
-test_acc = accuracy_score(y_test, test_preds)
-
-print(f"📘 TRAINING Accuracy (Memorization): {train_acc:.2%}")
-print(f"🔮 TESTING Accuracy (Real World):    {test_acc:.2%}")
-print("-" * 40)
-
-gap = train_acc - test_acc
-if gap > 0.10:
-    print(f"⚠️ DANGER: Overfitting detected! (Gap: {gap:.1%})")
-    print("   The model is memorizing the data. We need to simplify it.")
-elif gap < 0.05:
-    print(f"✅ EXCELLENT: The model is robust. (Gap: {gap:.1%})")
-    print("   It performs just as well on new data as old data.")
-else:
-    print(f"ℹ️ ACCEPTABLE: Slight gap, but normal. (Gap: {gap:.1%})")
-
-print("-" * 40)
-print(f"📊 FINAL MODEL ACCURACY: {test_acc:.2%}")
\ No newline at end of file
+import backtest
+
+def main():
+    # Walk-forward instead of a random 80/20 split: the model is always trained on
+    # earlier matches (with ratings rebuilt from those matches only) and tested on the next season.
+    # limiting max_depth prevents the model from "memorizing" too much detail (see backtest.MODEL_SPECS)
+    result = backtest.run_backtest('stats_rf', verbose=False)
+    summary = result['summary']
+
+    # --- THE OVERFITTING CHECK ---
+    train_acc = summary['train_accuracy']
+    test_acc = summary['accuracy']
+
+    print(f"📘 TRAINING Accuracy (Memorization): {train_acc:.2%}")
+    print(f"🔮 TESTING Accuracy (Real World):    {test_acc:.2%}")
+    print("-" * 40)
+
+    gap = train_acc - test_acc
+    if gap > 0.10:
+        print(f"⚠️ DANGER: Overfitting detected! (Gap: {gap:.1%})")
+        print("   The model is memorizing the data. We need to simplify it.")
+    elif gap < 0.05:
+        print(f"✅ EXCELLENT: The model is robust. (Gap: {gap:.1%})")
+        print("   It performs just as well on new data as old data.")
+    else:
+        print(f"ℹ️ ACCEPTABLE: Slight gap, but normal. (Gap: {gap:.1%})")
+
+    print("-" * 40)
+    print(f"📊 FINAL MODEL ACCURACY: {test_acc:.2%} over {summary['folds']} walk-forward folds")
+    print(f"   Log-loss: {summary['log_loss']:.3f} (guessing the usual outcome split: {summary['baseline_log_loss']:.3f})")
+    print(f"   Brier score: {summary['brier']:.3f}")
+    return result
+
+if __name__ == "__main__":
+    main()
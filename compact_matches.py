@@ -0,0 +1,169 @@
+"""
+Compact, typed match data with team IDs that never change between runs.
+
+    df = compact_matches.load_compact()
+    df['Home_Team'].cat.codes       # Global team IDs (same ID on both sides)
+    df['Season'].cat.codes          # Season index, 0 = oldest
+    df['Outcome'].cat.codes         # Outcome enum values (AWAY_WIN / DRAW / HOME_WIN)
+
+Team columns are categoricals over one shared team dictionary (npfl_team_ids.json), so
+a team's code is the same on the home and away side and in every run. New teams are
+appended to the dictionary; existing IDs are never reassigned. Goals are int8.
+"""
+import enum
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import leagues
+import match_store
+
+# CONFIGURATION
+GOAL_DTYPE = 'int8'   # No league has seen a team score 128
+CACHE_FILE = '.compact.npz'   # Parsed arrays, kept inside each match store
+
+
+class Outcome(enum.IntEnum):
+    """Same order as sklearn's classes_ for the outcome labels."""
+    AWAY_WIN = 0
+    DRAW = 1
+    HOME_WIN = 2
+
+    @property
+    def label(self):
+        return OUTCOME_LABELS[self]
+
+
+OUTCOME_LABELS = ['Away Win', 'Draw', 'Home Win']
+OUTCOME_DTYPE = pd.CategoricalDtype(OUTCOME_LABELS)
+
+
+class TeamDictionary:
+    """Team name <-> ID. IDs are list positions in the saved file, so they only ever grow."""
+
+    def __init__(self, teams=(), path=None):
+        self.teams = list(teams)
+        self.ids = {team: i for i, team in enumerate(self.teams)}
+        self.path = path
+
+    def __len__(self):
+        return len(self.teams)
+
+    def add(self, names):
+        """Gives IDs to names we haven't seen (alphabetical within a batch). Returns how many were new."""
+        new = sorted(set(names) - self.ids.keys())
+        for team in new:
+            self.ids[team] = len(self.teams)
+            self.teams.append(team)
+        return len(new)
+
+    def encode(self, names):
+        return np.array([self.ids[name] for name in names], dtype=np.int32)
+
+    def decode(self, ids):
+        return [self.teams[i] for i in ids]
+
+    @property
+    def dtype(self):
+        return pd.CategoricalDtype(self.teams)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(json.load(f)['teams'], path)
+        except FileNotFoundError:
+            return cls(path=path)
+
+    def save(self, path=None):
+        path = path or self.path
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'teams': self.teams}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def load_team_dictionary(league=None):
+    return TeamDictionary.load(leagues.get_league(league).team_ids_file)
+
+
+def _partition_stamp(paths):
+    """Name, size and mtime of every partition: cheap to check, changes on any rewrite."""
+    return json.dumps([(os.path.basename(p), os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths])
+
+
+def _read_cache(path, stamp, teams):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            cached_teams = data['teams'].tolist()
+            if str(data['stamp']) != stamp or cached_teams != teams.teams[:len(cached_teams)]:
+                return None
+            return {name: data[name] for name in data.files}
+    except (FileNotFoundError, ValueError, KeyError, OSError):
+        return None
+
+
+def _build_arrays(league, teams):
+    """Parses the CSV partitions once and turns them into code arrays."""
+    df = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    if teams.add(pd.unique(np.concatenate([df['Home_Team'].to_numpy(), df['Away_Team'].to_numpy()]))):
+        teams.save()
+
+    seasons = sorted(df['Season'].unique())
+    return {
+        'seasons': np.array(seasons),
+        'teams': np.array(teams.teams),
+        'season': pd.Categorical(df['Season'], categories=seasons).codes.astype(np.int16),
+        'home': teams.encode(df['Home_Team']).astype(np.int16),
+        'away': teams.encode(df['Away_Team']).astype(np.int16),
+        'home_goals': df['Home_Goals'].to_numpy(GOAL_DTYPE),
+        'away_goals': df['Away_Goals'].to_numpy(GOAL_DTYPE),
+        'outcome': pd.Categorical(df['Outcome'], dtype=OUTCOME_DTYPE).codes.astype(np.int8),
+    }
+
+
+def load_compact(seasons=None, league=None):
+    """
+    Matches from the store as a compact frame:
+    Season (ordered category), Home_Team/Away_Team (category over the team dictionary),
+    Home_Goals/Away_Goals (int8), Outcome (category whose codes are Outcome values).
+
+    The parsed arrays are cached in <store>/.compact.npz and reused until a partition
+    changes, so repeat loads skip CSV parsing altogether.
+    """
+    league = leagues.get_league(league)
+    paths = match_store.partition_files(league.store_dir, league.legacy_file)
+    if not paths:
+        raise FileNotFoundError(f"No match data found in {league.store_dir}/")
+
+    teams = load_team_dictionary(league)
+    stamp = _partition_stamp(paths)
+    cache_path = os.path.join(league.store_dir, CACHE_FILE)
+    arrays = _read_cache(cache_path, stamp, teams)
+    if arrays is None:
+        arrays = _build_arrays(league, teams)
+        tmp_path = f"{cache_path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, stamp=np.array(stamp), **arrays)
+        os.replace(tmp_path, cache_path)
+
+    # Codes go straight into categoricals: no strings are created for the match rows
+    team_dtype = teams.dtype
+    df = pd.DataFrame({
+        'Season': pd.Categorical.from_codes(arrays['season'], dtype=pd.CategoricalDtype(arrays['seasons'].tolist(), ordered=True)),
+        'Home_Team': pd.Categorical.from_codes(arrays['home'], dtype=team_dtype),
+        'Away_Team': pd.Categorical.from_codes(arrays['away'], dtype=team_dtype),
+        'Home_Goals': arrays['home_goals'],
+        'Away_Goals': arrays['away_goals'],
+        'Outcome': pd.Categorical.from_codes(arrays['outcome'], dtype=OUTCOME_DTYPE),
+    })
+    if seasons is not None:
+        df = df[df['Season'].isin(seasons)].reset_index(drop=True)
+        df['Season'] = df['Season'].cat.remove_unused_categories()
+    return df
+
+
+def team_codes(df):
+    """(home IDs, away IDs) as int arrays."""
+    return df['Home_Team'].cat.codes.to_numpy(), df['Away_Team'].cat.codes.to_numpy()
@@ -1,50 +1,72 @@
-import pandas as pd
-
-# --- CONFIGURATION ---
-CSV_FILENAME = 'npfl_historical_data.csv'
-
-def text_audit():
-    print(f"Loading {CSV_FILENAME}...")
-    try:
-        df = pd.read_csv(CSV_FILENAME)
-    except FileNotFoundError:
-        print("❌ Error: CSV file not found.")
-        return
-
-    # --- CHECK 1: THE HOME ADVANTAGE MATH ---
-    print("\n--- 📊 THE REALITY CHECK ---")
-    total_games = len(df)
-    
-    # Count outcomes
-    outcomes = df['Outcome'].value_counts()
-    percentages = df['Outcome'].value_counts(normalize=True) * 100
-    
-    print(f"Total Matches Analyzed: {total_games}")
-    print("\nOutcome Probabilities:")
-    for result, pct in percentages.items():
-        count = outcomes[result]
-        print(f"  {result}: {pct:.2f}%  ({count} games)")
-
-    # LOGIC CHECK
-    home_win_pct = percentages.get('Home Win', 0)
-    if home_win_pct > 65:
-        print("\n✅ VERDICT: This looks like the NPFL. (Home Wins > 65%)")
-    elif home_win_pct > 45:
-        print("\n⚠️ VERDICT: Looks like the Premier League. (Home Wins 45-65%)")
-    else:
-        print("\n❌ VERDICT: Something is wrong. Home Advantage is too low.")
-
-    # --- CHECK 2: THE NAME LIST ---
-    print("\n--- 🔍 TEAM NAME AUDIT ---")
-    all_teams = pd.concat([df['Home_Team'], df['Away_Team']]).unique()
-    all_teams.sort() # Sorting helps spot "Akwa Utd" next to "Akwa United"
-    
-    print(f"Found {len(all_teams)} unique team names.")
-    print("Scan this list for duplicates:")
-    print("-" * 30)
-    for team in all_teams:
-        print(f"  {team}")
-    print("-" * 30)
-
-if __name__ == "__main__":
-    text_audit()
\ No newline at end of file
+import argparse
+
+import pandas as pd
+
+import leagues
+import match_store
+import team_resolver
+
+def text_audit(seasons=None, league=None):
+    league = leagues.get_league(league)
+    print(f"Loading {league.store_dir}/...")
+    try:
+        df = match_store.load_matches(seasons, store_dir=league.store_dir, legacy_file=league.legacy_file)
+    except FileNotFoundError:
+        print("❌ Error: Match data not found.")
+        return
+
+    # --- CHECK 1: THE HOME ADVANTAGE MATH ---
+    print("\n--- 📊 THE REALITY CHECK ---")
+    total_games = len(df)
+    
+    # Count outcomes
+    outcomes = df['Outcome'].value_counts()
+    percentages = df['Outcome'].value_counts(normalize=True) * 100
+    
+    print(f"Total Matches Analyzed: {total_games}")
+    print("\nOutcome Probabilities:")
+    for result, pct in percentages.items():
+        count = outcomes[result]
+        print(f"  {result}: {pct:.2f}%  ({count} games)")
+
+    # LOGIC CHECK
+    home_win_pct = percentages.get('Home Win', 0)
+    if home_win_pct > 65:
+        print("\n✅ VERDICT: This looks like the NPFL. (Home Wins > 65%)")
+    elif home_win_pct > 45:
+        print("\n⚠️ VERDICT: Looks like the Premier League. (Home Wins 45-65%)")
+    else:
+        print("\n❌ VERDICT: Something is wrong. Home Advantage is too low.")
+
+    # --- CHECK 2: THE NAME LIST ---
+    print("\n--- 🔍 TEAM NAME AUDIT ---")
+    all_teams = sorted(pd.concat([df['Home_Team'], df['Away_Team']]).unique()) # Sorting helps spot "Akwa Utd" next to "Akwa United"
+    
+    print(f"Found {len(all_teams)} unique team names.")
+    print("Scan this list for duplicates:")
+    print("-" * 30)
+    for team in all_teams:
+        print(f"  {team}")
+    print("-" * 30)
+
+    # --- CHECK 3: ALIAS COLLISIONS (automatic) ---
+    print("\n--- 🧩 ALIAS COLLISIONS ---")
+    resolver = team_resolver.load_resolver(alias_file=league.alias_file)
+    collisions = resolver.collisions(all_teams)
+    near_duplicates = resolver.near_duplicates(all_teams)
+
+    if not collisions and not near_duplicates:
+        print("✅ No duplicate spellings found.")
+    for team, spellings in sorted(collisions.items()):
+        print(f"  ❌ {team}: {', '.join(spellings)}  (same team, several spellings)")
+    for known, similar in near_duplicates:
+        print(f"  ⚠️ '{similar}' looks like '{known}'. Add it to {league.alias_file} if it is the same team.")
+    return collisions, near_duplicates
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sanity-check the match data and team names.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    return text_audit(league=parser.parse_args(argv).league)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,293 @@
+"""
+Integrity gate for the match table, run before any features are built.
+
+    python data_validation.py                 (check the NPFL match store, exit 1 on errors)
+    python data_validation.py --league gpl --json
+
+    report = data_validation.validate(df)      (every check, never raises)
+    data_validation.check(df)                  (raises DataIntegrityError on any error)
+    data_validation.check_upsert(new_matches)  (the same, on the store as it will be after an upsert)
+
+Every check works on integer codes for the whole table at once (no per-row Python), so
+the gate costs milliseconds even on dozens of seasons. Every updater calls check_upsert()
+before writing new matches to the store, and add_features / update_features call check()
+again before writing any features.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+import compact_matches
+import instrumentation
+import leagues
+import match_store
+import matrix_parser
+import team_resolver
+
+# CONFIGURATION
+MAX_GOALS = 15            # More than this in one match is a parsing error, not a result
+TEAM_COUNT_RANGE = (8, 40)
+EXAMPLES = 5              # Offending rows kept per check in the report
+
+
+class DataIntegrityError(ValueError):
+    """Raised by check(); .report holds every problem found."""
+
+    def __init__(self, report):
+        super().__init__(report.summary())
+        self.report = report
+
+
+class ValidationReport:
+    def __init__(self, league_id, rows, seasons):
+        self.league = league_id
+        self.rows = rows
+        self.seasons = list(seasons)
+        self.issues = []   # {'check', 'severity', 'count', 'message', 'examples'}
+
+    def add(self, check, severity, count, message, examples=None):
+        if count:
+            self.issues.append({'check': check, 'severity': severity, 'count': int(count),
+                                'message': message, 'examples': examples or []})
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue['severity'] == 'error']
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue['severity'] == 'warning']
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def summary(self):
+        if self.ok:
+            warned = f" ({len(self.warnings)} warning(s))" if self.warnings else ''
+            return f"{self.league}: {self.rows} matches in {len(self.seasons)} seasons passed every check{warned}"
+        failed = ', '.join(f"{i['check']} ({i['count']})" for i in self.errors) or 'none'
+        return f"{self.league}: {len(self.errors)} failed check(s): {failed}"
+
+    def to_dict(self):
+        return {'league': self.league, 'rows': self.rows, 'seasons': self.seasons,
+                'ok': self.ok, 'issues': self.issues}
+
+    def print_report(self):
+        print(f"🔎 {self.summary()}")
+        for issue in self.issues:
+            icon = '❌' if issue['severity'] == 'error' else '⚠️'
+            print(f"  {icon} {issue['check']}: {issue['message']}")
+            for example in issue['examples']:
+                print(f"      {example}")
+
+
+# --- PREPARED ARRAYS (shared by every check) ---
+
+class MatchArrays:
+    """The match table as integer codes: seasons, teams (one dictionary for both sides), goals."""
+
+    def __init__(self, df, league):
+        self.df = df.reset_index(drop=True)
+        n = len(self.df)
+        self.season, self.seasons = pd.factorize(self.df['Season'].astype(str), sort=True)
+        teams, self.teams = pd.factorize(np.concatenate([self.df['Home_Team'].astype(str).to_numpy(),
+                                                         self.df['Away_Team'].astype(str).to_numpy()]))
+        self.home, self.away = teams[:n], teams[n:]
+        self.n_teams = len(self.teams)
+        self.home_goals = pd.to_numeric(self.df['Home_Goals'], errors='coerce').to_numpy(float)
+        self.away_goals = pd.to_numeric(self.df['Away_Goals'], errors='coerce').to_numpy(float)
+
+        # One int64 per fixture, and the same for its reverse (away side at home)
+        self.fixture = (self.season.astype(np.int64) * self.n_teams + self.home) * self.n_teams + self.away
+        self.reverse = (self.season.astype(np.int64) * self.n_teams + self.away) * self.n_teams + self.home
+
+        # The latest season may still be in progress, unless the league lists it as finished
+        finished_labels = {label for label, _ in league.seasons}
+        finished = np.ones(len(self.seasons), dtype=bool)
+        if len(self.seasons) and self.seasons[-1] not in finished_labels:
+            finished[-1] = False
+        self.finished_seasons = finished
+        self.finished = finished[self.season]
+
+    def examples(self, mask, columns=('Season', 'Home_Team', 'Away_Team', 'Home_Goals', 'Away_Goals', 'Outcome')):
+        if not mask.any():
+            return []
+        rows = self.df.loc[mask, list(columns)].head(EXAMPLES)
+        return [' | '.join(str(v) for v in row) for row in rows.itertuples(index=False)]
+
+
+# --- CHECKS ---
+# Each takes (arrays, league) and returns (count, message, examples).
+
+def duplicate_fixtures(m, league):
+    _, inverse, counts = np.unique(m.fixture, return_inverse=True, return_counts=True)
+    mask = counts[inverse] > 1
+    return mask.sum(), f"{mask.sum()} rows share a (Season, Home_Team, Away_Team) with another row", m.examples(mask)
+
+
+def self_matches(m, league):
+    mask = m.home == m.away
+    return mask.sum(), f"{mask.sum()} matches have the same team on both sides", m.examples(mask)
+
+
+def missing_reverse_fixtures(m, league):
+    """In a finished double round-robin season every A vs B has a B vs A."""
+    mask = m.finished & ~np.isin(m.reverse, m.fixture) & (m.home != m.away)
+    return mask.sum(), f"{mask.sum()} fixtures in finished seasons have no reverse fixture", m.examples(mask)
+
+
+def impossible_scores(m, league):
+    goals = np.column_stack([m.home_goals, m.away_goals])
+    bad = np.isnan(goals) | (goals < 0) | (goals > MAX_GOALS) | (goals != np.round(goals))
+    mask = bad.any(axis=1)
+    return mask.sum(), f"{mask.sum()} matches have missing, negative, fractional or > {MAX_GOALS} goals", m.examples(mask)
+
+
+def outcome_mismatches(m, league):
+    valid = ~np.isnan(m.home_goals) & ~np.isnan(m.away_goals)
+    # Outcome codes are sign(home goals - away goals) + 1 (Away Win, Draw, Home Win)
+    expected = np.sign(np.nan_to_num(m.home_goals - m.away_goals)).astype(int) + 1
+    outcome = pd.Categorical(m.df['Outcome'], categories=compact_matches.OUTCOME_LABELS).codes   # -1 = unknown label
+    mask = valid & (outcome != expected)
+    return mask.sum(), f"{mask.sum()} matches whose Outcome doesn't match the score", m.examples(mask)
+
+
+def team_counts(m, league):
+    """Per season: teams in range, nobody with more than (teams - 1) home or away games, and
+    (in finished seasons) the same teams at home as away."""
+    n_seasons = len(m.seasons)
+    home_games = np.zeros((n_seasons, m.n_teams), dtype=np.int64)
+    away_games = np.zeros((n_seasons, m.n_teams), dtype=np.int64)
+    np.add.at(home_games, (m.season, m.home), 1)
+    np.add.at(away_games, (m.season, m.away), 1)
+    played = (home_games + away_games) > 0
+    teams = played.sum(axis=1)
+
+    low, high = TEAM_COUNT_RANGE
+    problems = []
+    for i in np.flatnonzero((teams < low) | (teams > high)):
+        problems.append(f"{m.seasons[i]}: {teams[i]} teams (expected {low}-{high})")
+    too_many = (home_games > teams[:, None] - 1) | (away_games > teams[:, None] - 1)
+    for i, t in zip(*np.nonzero(too_many)):
+        problems.append(f"{m.seasons[i]}: {m.teams[t]} has {home_games[i, t]} home / {away_games[i, t]} away "
+                        f"games in a {teams[i]}-team season")
+    one_sided = m.finished_seasons[:, None] & played & ((home_games == 0) | (away_games == 0))
+    for i, t in zip(*np.nonzero(one_sided)):
+        side = 'home' if away_games[i, t] == 0 else 'away'
+        problems.append(f"{m.seasons[i]}: {m.teams[t]} only appears as the {side} team")
+
+    counts = ', '.join(f"{season}: {n}" for season, n in zip(m.seasons, teams))
+    return len(problems), f"{len(problems)} team-count problems (teams per season: {counts})", problems[:EXAMPLES]
+
+
+def alias_collisions(m, league):
+    """Two spellings of one team in the data (e.g. "Enyimba" and "Enyimba Int'l")."""
+    collisions = team_resolver.load_resolver(alias_file=league.alias_file).collisions(list(m.teams))
+    examples = [f"{team}: {', '.join(spellings)}" for team, spellings in sorted(collisions.items())]
+    return len(collisions), f"{len(collisions)} teams appear under several spellings", examples[:EXAMPLES]
+
+
+def near_duplicate_names(m, league):
+    pairs = team_resolver.load_resolver(alias_file=league.alias_file).near_duplicates(list(m.teams))
+    examples = [f"'{similar}' looks like '{known}'" for known, similar in pairs]
+    return len(pairs), f"{len(pairs)} names look like another team (add them to {league.alias_file} if so)", examples[:EXAMPLES]
+
+
+# name: (check, severity). Errors stop the pipeline; warnings are only reported.
+CHECKS = {
+    'duplicate_fixtures': (duplicate_fixtures, 'error'),
+    'self_matches': (self_matches, 'error'),
+    'missing_reverse_fixtures': (missing_reverse_fixtures, 'error'),
+    'impossible_scores': (impossible_scores, 'error'),
+    'outcome_mismatches': (outcome_mismatches, 'error'),
+    'team_counts': (team_counts, 'error'),
+    'alias_collisions': (alias_collisions, 'error'),
+    'near_duplicate_names': (near_duplicate_names, 'warning'),
+}
+GATE_CHECKS = [name for name, (_, severity) in CHECKS.items() if severity == 'error']   # What check() runs
+
+
+def validate(df, league=None, checks=None):
+    """Runs every check (or just `checks`) over the match table. Never raises on bad data."""
+    league = leagues.get_league(league)
+    with instrumentation.stage('validate', rows=len(df)):
+        arrays = MatchArrays(df, league)
+        report = ValidationReport(league.id, len(df), arrays.seasons.tolist())
+        for name in checks or CHECKS:
+            fn, severity = CHECKS[name]
+            count, message, examples = fn(arrays, league)
+            report.add(name, severity, count, message, examples)
+    return report
+
+
+def check(df, league=None, checks=GATE_CHECKS):
+    """
+    The pipeline gate: prints any problems and returns the report,
+    or raises DataIntegrityError if an error-level check fails.
+    Warning-only checks (the fuzzy name scan) are left to the CLI, so the gate stays fast.
+    """
+    report = validate(df, league, checks)
+    if report.issues:
+        report.print_report()
+    if not report.ok:
+        raise DataIntegrityError(report)
+    return report
+
+
+def validate_store(league=None):
+    league = leagues.get_league(league)
+    df = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    return validate(df, league)
+
+
+def check_store(league=None):
+    """check() on everything in the league's match store (the orchestrator's 'validate' stage)."""
+    league = leagues.get_league(league)
+    report = check(match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file), league)
+    print(f"✅ {report.summary()}")
+    return report
+
+
+def check_upsert(new_matches, league=None):
+    """
+    check() on the store as it will be after upsert_matches(new_matches).
+    Call it before the upsert: if it raises, the store is left untouched.
+    """
+    league = leagues.get_league(league)
+    try:
+        stored = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    except FileNotFoundError:   # First run: the new matches are the whole store
+        stored = matrix_parser.empty_matches()
+    return check(match_store.merge_matches(stored, new_matches), league)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check a league's match data before building features.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        report = validate_store(args.league)
+    except FileNotFoundError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2, default=str))
+    else:
+        report.print_report()
+    if not report.ok:
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Elo ratings for every team, computed in one pass over all matches.
+
+    python elo_ratings.py      (rebuild ratings, save npfl_elo.npz, draw npfl_elo_rankings.png)
+    python elo_ratings.py --league gpl   (gpl_elo.npz, gpl_elo_rankings.png)
+
+- Home advantage: the home side plays as if it were HOME_ADVANTAGE points stronger.
+- Margin: bigger wins move ratings more (World Football Elo goal-difference multiplier).
+- New season: every rating is pulled SEASON_REGRESSION of the way back to the league mean.
+- Snapshots: after every matchday the whole ratings array is stored, so
+  "ratings as of 2023-24, matchday 12" is a lookup instead of a replay.
+- No dates: results matrices list a season's matches by home team, not in the order they
+  were played. Without a Date or Matchday column every match of a season is rated from
+  the ratings at the start of the season, the season's changes are applied together at
+  its end, and only end-of-season snapshots are kept.
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+import leagues
+import match_store
+
+# CONFIGURATION
+ELO_FILE = 'npfl_elo.npz'
+INITIAL_RATING = 1500.0
+NEW_TEAM_RATING = 1450.0    # Promoted sides usually start weaker than the league average
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 80.0       # NPFL home sides win far more often than away sides
+SEASON_REGRESSION = 1 / 3   # Share of the gap to the mean removed between seasons
+ELO_COLS = ['Home_Elo', 'Away_Elo', 'Elo_Diff', 'Elo_Home_Prob']
+ELO_PARAMS = {'k': K_FACTOR, 'home_advantage': HOME_ADVANTAGE, 'regression': SEASON_REGRESSION,
+              'new_team': NEW_TEAM_RATING}
+END_OF_SEASON = 0           # Matchday label of the one snapshot per season when there are no matchdays
+
+
+def assign_matchdays(matches):
+    """
+    Matchday number for every match (matches must already be oldest first), from the
+    Matchday column or the rank of the Date within its season.
+    Results matrices have neither, so they get END_OF_SEASON for every match.
+    """
+    col = match_store.time_column(matches)
+    if col is None:
+        return np.full(len(matches), END_OF_SEASON, dtype=np.int32)
+    if col == 'Matchday':
+        return matches['Matchday'].to_numpy(dtype=np.int32)
+    return matches.groupby('Season')['Date'].rank(method='dense').to_numpy(dtype=np.int32)
+
+
+def margin_multiplier(goal_diff):
+    gd = abs(goal_diff)
+    if gd <= 1:
+        return 1.0
+    if gd == 2:
+        return 1.5
+    return (11 + gd) / 8
+
+
+class EloTracker:
+    """
+    Running ratings in one numpy array (one slot per team), updated once per matchday.
+    Walk matches oldest-first: read both ratings (as of the start of the matchday),
+    then apply the matchday's results together.
+    """
+
+    def __init__(self, params=ELO_PARAMS, capacity=32):
+        self.params = dict(params)
+        self.team_index = {}
+        self.ratings = np.full(capacity, np.nan)
+        self.first_season = None
+        self.season = None
+        self.matchday = None
+        # Snapshots: (season, matchday) labels and a copy of the ratings after that matchday
+        self.snapshot_keys = []
+        self.snapshots = []
+
+    def _row(self, team):
+        row = self.team_index.get(team)
+        if row is None:
+            row = len(self.team_index)
+            if row == len(self.ratings):
+                self.ratings = np.concatenate([self.ratings, np.full(len(self.ratings), np.nan)])
+            self.team_index[team] = row
+            # Everyone starts level in the first season; later arrivals are promoted sides
+            self.ratings[row] = INITIAL_RATING if self.season == self.first_season else self.params['new_team']
+        return row
+
+    def _new_season(self, season):
+        if self.season is not None:
+            known = self.ratings[:len(self.team_index)]
+            mean = np.nanmean(known)
+            known += (mean - known) * self.params['regression']
+        else:
+            self.first_season = season
+        self.season = season
+
+    def snapshot(self):
+        if self.season is not None and self.matchday is not None:
+            self.snapshot_keys.append((self.season, int(self.matchday)))
+            self.snapshots.append(self.ratings[:len(self.team_index)].astype(np.float32))
+
+    def _apply(self, changes):
+        for h, a, change in changes:
+            self.ratings[h] += change
+            self.ratings[a] -= change
+        changes.clear()
+
+    def process(self, seasons, matchdays, home_teams, away_teams, home_goals, away_goals):
+        """
+        One O(n) pass over matches that are already in chronological order.
+        Returns (n x 4) pre-match [home rating, away rating, difference, home expected score].
+        With END_OF_SEASON matchdays (no dates) a whole season counts as one matchday.
+        """
+        k, hfa = self.params['k'], self.params['home_advantage']
+        out = np.empty((len(home_teams), len(ELO_COLS)))
+        changes = []
+
+        for i, (season, md, home, away, hg, ag) in enumerate(
+                zip(seasons, matchdays, home_teams, away_teams, home_goals, away_goals)):
+            if season != self.season or md != self.matchday:
+                self._apply(changes)
+                self.snapshot()   # The previous matchday is complete
+                if season != self.season:
+                    self._new_season(season)
+                self.matchday = md
+
+            h, a = self._row(home), self._row(away)
+            diff = self.ratings[h] + hfa - self.ratings[a]
+            expected = 1 / (1 + 10 ** (-diff / 400))
+            out[i] = (self.ratings[h], self.ratings[a], diff, expected)
+
+            actual = 1.0 if hg > ag else 0.0 if hg < ag else 0.5
+            changes.append((h, a, k * margin_multiplier(hg - ag) * (actual - expected)))
+        self._apply(changes)
+        return out
+
+    def current(self):
+        n = len(self.team_index)
+        return pd.Series(self.ratings[:n], index=list(self.team_index)).sort_values(ascending=False)
+
+    def history(self):
+        """All snapshots so far, including the matchday in progress."""
+        keys, snaps = list(self.snapshot_keys), list(self.snapshots)
+        if self.season is not None and (not keys or keys[-1] != (self.season, int(self.matchday))):
+            keys.append((self.season, int(self.matchday)))
+            snaps.append(self.ratings[:len(self.team_index)].astype(np.float32))
+        return EloHistory.from_snapshots(list(self.team_index), keys, snaps)
+
+    def state_dict(self):
+        """Everything needed to carry on from where the last pass stopped (JSON friendly)."""
+        n = len(self.team_index)
+        return {
+            'params': self.params,
+            'teams': list(self.team_index),
+            'ratings': self.ratings[:n].tolist(),
+            'first_season': self.first_season,
+            'season': self.season,
+            'matchday': None if self.matchday is None else int(self.matchday),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        tracker = cls(state['params'], capacity=max(len(state['teams']), 1))
+        n = len(state['teams'])
+        tracker.team_index = {team: i for i, team in enumerate(state['teams'])}
+        tracker.ratings[:n] = state['ratings']
+        tracker.first_season = state['first_season']
+        tracker.season = state['season']
+        tracker.matchday = state['matchday']
+        return tracker
+
+
+class EloHistory:
+    """
+    Ratings after every matchday (or every season, without dates) as one
+    (snapshots x teams) float32 array. NaN = the team had not played yet. Keys sort oldest first.
+    """
+
+    def __init__(self, teams, seasons, matchdays, ratings):
+        self.teams = list(teams)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.seasons = np.asarray(seasons)
+        self.matchdays = np.asarray(matchdays, dtype=np.int16)
+        self.ratings = np.asarray(ratings, dtype=np.float32)
+        # One sortable number per snapshot: season order * 1000 + matchday
+        season_order = {s: i for i, s in enumerate(sorted(set(self.seasons.tolist())))}
+        self._season_order = season_order
+        self._keys = np.array([season_order[s] * 1000 + md for s, md in zip(self.seasons, self.matchdays)])
+
+    @classmethod
+    def from_snapshots(cls, teams, keys, snapshots):
+        ratings = np.full((len(snapshots), len(teams)), np.nan, dtype=np.float32)
+        for i, snap in enumerate(snapshots):
+            ratings[i, :len(snap)] = snap
+        return cls(teams, [s for s, _ in keys], [md for _, md in keys], ratings)
+
+    def extend(self, newer):
+        """
+        This history followed by a newer one (e.g. from a tracker resumed after this one was saved).
+        Snapshots the newer history also has (the matchday that was in progress) are replaced.
+        """
+        teams = self.teams + [t for t in newer.teams if t not in self.team_index]
+        order = {s: i for i, s in enumerate(sorted(set(self.seasons.tolist()) | set(newer.seasons.tolist())))}
+        old_keys = np.array([order[s] * 1000 + md for s, md in zip(self.seasons, self.matchdays)])
+        keep = old_keys < order[newer.seasons[0]] * 1000 + newer.matchdays[0]
+
+        ratings = np.full((int(keep.sum()) + len(newer.seasons), len(teams)), np.nan, dtype=np.float32)
+        ratings[:keep.sum(), :len(self.teams)] = self.ratings[keep]
+        cols = [teams.index(t) for t in newer.teams]
+        ratings[keep.sum():, cols] = newer.ratings
+        return EloHistory(teams, np.concatenate([self.seasons[keep], newer.seasons]),
+                          np.concatenate([self.matchdays[keep], newer.matchdays]), ratings)
+
+    def as_of(self, season, matchday=None):
+        """Ratings after `matchday` of `season` (default: the end of that season). O(log n) lookup."""
+        if season not in self._season_order:
+            raise KeyError(f"No ratings for season {season}")
+        if matchday is not None and END_OF_SEASON in self.matchdays[self.seasons == season]:
+            raise KeyError(f"{season} has no Date or Matchday column, so there are only end-of-season ratings")
+        key = self._season_order[season] * 1000 + (999 if matchday is None else matchday)
+        row = np.searchsorted(self._keys, key, side='right') - 1
+        if row < 0:
+            raise KeyError(f"No ratings before {season} matchday {matchday}")
+        return pd.Series(self.ratings[row], index=self.teams).dropna().sort_values(ascending=False)
+
+    def latest(self):
+        return pd.Series(self.ratings[-1], index=self.teams).dropna().sort_values(ascending=False)
+
+    def team_series(self, team):
+        """One team's rating after every snapshot (for charts)."""
+        return pd.DataFrame({'Season': self.seasons, 'Matchday': self.matchdays,
+                             'Rating': self.ratings[:, self.team_index[team]]}).dropna()
+
+    def save(self, path=ELO_FILE):
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez_compressed(tmp_path, teams=np.array(self.teams), seasons=self.seasons,
+                            matchdays=self.matchdays, ratings=self.ratings)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=ELO_FILE):
+        with np.load(path) as data:
+            return cls(data['teams'].tolist(), data['seasons'], data['matchdays'], data['ratings'])
+
+
+def add_elo_features(df, params=ELO_PARAMS, tracker=None, only=None):
+    """
+    Returns (pre-match Elo features aligned to df's index, tracker).
+    To continue a tracker from a previous run, pass it with `only` = the index of the new rows
+    (matchdays are still numbered over the whole of df, so the new rows line up with the old ones).
+    """
+    tracker = tracker or EloTracker(params)
+    ordered = match_store.sort_chronologically(df)
+    matchdays = assign_matchdays(ordered)
+    if only is not None:
+        keep = ordered.index.isin(only)
+        ordered, matchdays = ordered[keep], matchdays[keep]
+
+    values = tracker.process(
+        ordered['Season'].to_numpy(),
+        matchdays,
+        ordered['Home_Team'].to_numpy(),
+        ordered['Away_Team'].to_numpy(),
+        ordered['Home_Goals'].to_numpy(),
+        ordered['Away_Goals'].to_numpy(),
+    )
+    features = pd.DataFrame(values, index=ordered.index, columns=ELO_COLS)
+    features[['Home_Elo', 'Away_Elo', 'Elo_Diff']] = features[['Home_Elo', 'Away_Elo', 'Elo_Diff']].round(1)
+    features['Elo_Home_Prob'] = features['Elo_Home_Prob'].round(3)
+    return features.reindex(df.index if only is None else ordered.index), tracker
+
+
+def chart_file(league=None):
+    return f"{leagues.get_league(league).id}_elo_rankings.png"
+
+
+def build_history(matches=None, params=ELO_PARAMS, league=None, save=True):
+    """Replays every match once and saves the snapshots to the league's elo file."""
+    league = leagues.get_league(league)
+    if matches is None:
+        matches = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    _, tracker = add_elo_features(matches, params)
+    history = tracker.history()
+    if save:
+        history.save(league.elo_file)
+    return history
+
+
+def plot_elo(history, top_n=15, filename=None):
+    # Plotting libraries are only loaded when we actually draw the chart
+    import matplotlib
+    matplotlib.use('Agg')  # Headless: no window needed
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    latest = history.latest()
+    current_season = history.seasons[-1]
+    in_season = history.as_of(current_season).index
+    top = latest[latest.index.isin(in_season)].head(top_n)
+
+    fig, (bar_ax, line_ax) = plt.subplots(1, 2, figsize=(18, 9), gridspec_kw={'width_ratios': [1, 2]})
+    sns.barplot(x=top.values, y=top.index, hue=top.index, palette='viridis', legend=False, ax=bar_ax)
+    bar_ax.set_xlim(math.floor(top.min() / 50) * 50 - 50, math.ceil(top.max() / 50) * 50)
+    bar_ax.set_title(f'Elo Ratings ({current_season})')
+    bar_ax.set_xlabel('Elo')
+
+    step = np.arange(len(history.seasons))
+    for team in top.index[:8]:
+        line_ax.plot(step, history.ratings[:, history.team_index[team]], label=team)
+    boundaries = [i for i in range(1, len(step)) if history.seasons[i] != history.seasons[i - 1]]
+    for b in boundaries:
+        line_ax.axvline(b, color='grey', linestyle=':', linewidth=0.8)
+    line_ax.set_xticks([0] + boundaries)
+    line_ax.set_xticklabels([history.seasons[i] for i in [0] + boundaries], rotation=30)
+    line_ax.set_title('Elo After Every Season' if (history.matchdays == END_OF_SEASON).all() else 'Elo After Every Matchday')
+    line_ax.legend(fontsize=8, loc='lower left')
+
+    plt.tight_layout()
+    filename = filename or chart_file()
+    plt.savefig(filename)
+    plt.close(fig)
+    print(f"✅ Graph saved as '{filename}' in your folder.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the Elo ratings and draw the Elo chart.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    league = leagues.get_league(parser.parse_args(argv).league)
+
+    print("📈 Replaying every match for Elo ratings...")
+    history = build_history(league=league)
+    print(f"💾 Saved {len(history.seasons)} snapshots for {len(history.teams)} teams to {league.elo_file}")
+    plot_elo(history, filename=chart_file(league))
+
+    print("\n🏆 TOP 5 (ELO):")
+    print(history.latest().head(5).round(0).to_string())
+    return history
+
+
+if __name__ == "__main__":
+    main()
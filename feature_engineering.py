@@ -1,82 +1,291 @@
-import pandas as pd
-import numpy as np
-
-# CONFIGURATION
-INPUT_FILE = 'npfl_historical_data.csv'
-OUTPUT_FILE = 'npfl_training_data.csv'
-
-def add_features():
-    print(f"🔄 Loading {INPUT_FILE}...")
-    try:
-        df = pd.read_csv(INPUT_FILE)
-    except FileNotFoundError:
-        print("❌ Error: Input file not found.")
-        return
-
-    print("🧠 Calculating Attack & Defense Ratings...")
-
-    # --- STEP 1: CALCULATE GLOBAL AVERAGES (The "League Average") ---
-    # We need a baseline. e.g., The average NPFL home team scores 1.5 goals.
-    avg_home_goals_league = df['Home_Goals'].mean()
-    avg_away_goals_league = df['Away_Goals'].mean()
-    
-    # --- STEP 2: CALCULATE TEAM AVERAGES ---
-    # Group by Home Team to get their Home Stats
-    home_stats = df.groupby('Home_Team')[['Home_Goals', 'Away_Goals']].mean()
-    home_stats.columns = ['Home_Attack', 'Home_Defense'] # Rename for clarity
-
-    # Group by Away Team to get their Away Stats
-    away_stats = df.groupby('Away_Team')[['Home_Goals', 'Away_Goals']].mean()
-    away_stats.columns = ['Away_Defense', 'Away_Attack'] # Note the flip: Home Goals = Away Defense weakness
-    
-    # --- STEP 3: MERGE STATS BACK INTO MATCHES ---
-    # For every match, we look up the stats of the teams playing
-    
-    # Merge Home Stats
-    df = df.merge(home_stats, left_on='Home_Team', right_index=True, how='left')
-    
-    # Merge Away Stats
-    df = df.merge(away_stats, left_on='Away_Team', right_index=True, how='left')
-
-    # --- STEP 4: CALCULATE RELATIVE STRENGTH ---
-    # We create features that show the MISMATCH.
-    # e.g., If Enyimba Home Attack (2.0) plays Pillars Away Defense (1.5)
-    
-    # Feature 1: Goal Expectancy (Home Team)
-    # (Home Attack) vs (Away Defense)
-    df['Home_Exp_Goals'] = (df['Home_Attack'] + df['Away_Defense']) / 2
-    
-    # Feature 2: Goal Expectancy (Away Team)
-    # (Away Attack) vs (Home Defense)
-    df['Away_Exp_Goals'] = (df['Away_Attack'] + df['Home_Defense']) / 2
-    
-    # Feature 3: The "Power Diff"
-    # Positive number = Home Team is stronger. Negative = Away Team is stronger.
-    df['Power_Diff'] = df['Home_Exp_Goals'] - df['Away_Exp_Goals']
-
-    # Rounding for cleanliness
-    cols_to_round = ['Home_Attack', 'Home_Defense', 'Away_Attack', 'Away_Defense', 
-                     'Home_Exp_Goals', 'Away_Exp_Goals', 'Power_Diff']
-    df[cols_to_round] = df[cols_to_round].round(2)
-
-    # --- HANDLING NEW TEAMS (The "Cold Start" Fix) ---
-    # If a team is new, they might have NaN (empty) stats. Fill with League Average.
-    df.fillna(value={
-        'Home_Attack': avg_home_goals_league,
-        'Home_Defense': avg_away_goals_league, # Home Defense = resisting Away Goals
-        'Away_Attack': avg_away_goals_league,
-        'Away_Defense': avg_home_goals_league
-    }, inplace=True)
-
-    # 5. SAVE
-    print(f"✅ Calculated features for {len(df)} matches.")
-    df.to_csv(OUTPUT_FILE, index=False)
-    print(f"💾 Saved smart data to {OUTPUT_FILE}")
-    
-    # 6. PREVIEW (The "Sanity Check")
-    print("\n👀 Preview: Enyimba's Home Strength vs Opponent's Weakness")
-    sample = df[df['Home_Team'].str.contains('Enyimba', na=False)].head(5)
-    print(sample[['Home_Team', 'Away_Team', 'Outcome', 'Home_Attack', 'Away_Defense', 'Power_Diff']])
-
-if __name__ == "__main__":
-    add_features()
\ No newline at end of file
+import json
+import os
+
+import pandas as pd
+import numpy as np
+
+import data_validation
+import elo_ratings
+import form_features
+import instrumentation
+import leagues
+import match_store
+
+# CONFIGURATION
+INPUT_DIR = match_store.STORE_DIR
+OUTPUT_FILE = 'npfl_training_data.csv'
+STATE_FILE = 'npfl_feature_state.json'   # Running sums & counts behind the ratings
+
+FORM_WINDOWS = form_features.FORM_WINDOWS   # Last-N-games Form Guide
+FORM_DECAY = form_features.FORM_DECAY
+ELO_PARAMS = elo_ratings.ELO_PARAMS         # Pre-match Elo ratings (see elo_ratings.py)
+
+RATING_COLS = ['Home_Attack', 'Home_Defense', 'Away_Attack', 'Away_Defense']
+FEATURE_COLS = ['Home_Attack', 'Home_Defense', 'Away_Defense', 'Away_Attack',
+                'Home_Exp_Goals', 'Away_Exp_Goals', 'Power_Diff']
+
+def build_state(df):
+    """
+    The ratings are just averages, so all we need to keep are sums and counts:
+    - home[team] = [goals scored at home, goals conceded at home, home games]
+    - away[team] = [goals conceded away, goals scored away, away games]
+    - league     = [home goals, away goals, games]
+    """
+    state = {'home': {}, 'away': {}, 'league': [0.0, 0.0, 0]}
+    _add_to_state(state, df, sign=1)
+    return state
+
+def _add_to_state(state, matches, sign=1):
+    # Only touches the teams in `matches`, so the cost is proportional to the new rows
+    if matches.empty:
+        return
+
+    for side, team_col in [('home', 'Home_Team'), ('away', 'Away_Team')]:
+        sums = matches.groupby(team_col)[['Home_Goals', 'Away_Goals']].agg(['sum', 'count'])
+        for team, row in sums.iterrows():
+            totals = state[side].setdefault(team, [0.0, 0.0, 0])
+            totals[0] += sign * float(row[('Home_Goals', 'sum')])
+            totals[1] += sign * float(row[('Away_Goals', 'sum')])
+            totals[2] += sign * int(row[('Home_Goals', 'count')])
+            if totals[2] <= 0:
+                del state[side][team]
+
+    league = state['league']
+    league[0] += sign * float(matches['Home_Goals'].sum())
+    league[1] += sign * float(matches['Away_Goals'].sum())
+    league[2] += sign * len(matches)
+
+def ratings_from_state(state):
+    """Turns the running sums back into the rating tables (plus league averages)."""
+    home = pd.DataFrame.from_dict(state['home'], orient='index', columns=['Home_Goals', 'Away_Goals', 'Games'])
+    away = pd.DataFrame.from_dict(state['away'], orient='index', columns=['Home_Goals', 'Away_Goals', 'Games'])
+
+    home_stats = pd.DataFrame({
+        'Home_Attack': home['Home_Goals'] / home['Games'],
+        'Home_Defense': home['Away_Goals'] / home['Games'],
+    })
+    # Note the flip: Home Goals = Away Defense weakness
+    away_stats = pd.DataFrame({
+        'Away_Defense': away['Home_Goals'] / away['Games'],
+        'Away_Attack': away['Away_Goals'] / away['Games'],
+    })
+
+    home_total, away_total, games = state['league']
+    averages = (home_total / games, away_total / games) if games else (np.nan, np.nan)
+    return home_stats, away_stats, averages
+
+def compute_features(matches, home_stats, away_stats, averages):
+    """Looks up each team's ratings for a set of matches and builds the mismatch features."""
+    avg_home_goals_league, avg_away_goals_league = averages
+    features = pd.DataFrame(index=matches.index)
+
+    # For every match, we look up the stats of the teams playing
+    features['Home_Attack'] = matches['Home_Team'].map(home_stats['Home_Attack'])
+    features['Home_Defense'] = matches['Home_Team'].map(home_stats['Home_Defense'])
+    features['Away_Defense'] = matches['Away_Team'].map(away_stats['Away_Defense'])
+    features['Away_Attack'] = matches['Away_Team'].map(away_stats['Away_Attack'])
+
+    # Feature 1: Goal Expectancy (Home Team)
+    # (Home Attack) vs (Away Defense)
+    features['Home_Exp_Goals'] = (features['Home_Attack'] + features['Away_Defense']) / 2
+
+    # Feature 2: Goal Expectancy (Away Team)
+    # (Away Attack) vs (Home Defense)
+    features['Away_Exp_Goals'] = (features['Away_Attack'] + features['Home_Defense']) / 2
+
+    # Feature 3: The "Power Diff"
+    # Positive number = Home Team is stronger. Negative = Away Team is stronger.
+    features['Power_Diff'] = features['Home_Exp_Goals'] - features['Away_Exp_Goals']
+
+    # Rounding for cleanliness
+    features = features.round(2)
+
+    # --- HANDLING NEW TEAMS (The "Cold Start" Fix) ---
+    # If a team is new, they might have NaN (empty) stats. Fill with League Average.
+    features.fillna(value={
+        'Home_Attack': avg_home_goals_league,
+        'Home_Defense': avg_away_goals_league, # Home Defense = resisting Away Goals
+        'Away_Attack': avg_away_goals_league,
+        'Away_Defense': avg_home_goals_league
+    }, inplace=True)
+    return features
+
+def load_state(state_file=STATE_FILE):
+    try:
+        with open(state_file, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_state(state, state_file=STATE_FILE):
+    tmp_path = f"{state_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_file)
+
+@instrumentation.stage('features.rebuild')
+def add_features(league=None):
+    league = leagues.get_league(league)
+    print(f"🔄 Loading {league.store_dir}/...")
+    try:
+        with instrumentation.stage('features.load'):
+            df = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    except FileNotFoundError:
+        print("❌ Error: Input file not found.")
+        return
+
+    # Stops here (DataIntegrityError) if the matches are broken, before anything is written
+    data_validation.check(df, league)
+
+    print("🧠 Calculating Attack & Defense Ratings...")
+
+    # --- STEP 1 & 2: LEAGUE AVERAGES AND TEAM AVERAGES ---
+    # We need a baseline. e.g., The average NPFL home team scores 1.5 goals.
+    # Then each team's Home Stats (as Home Team) and Away Stats (as Away Team).
+    with instrumentation.stage('features.ratings', rows=len(df)):
+        state = build_state(df)
+        home_stats, away_stats, averages = ratings_from_state(state)
+
+        # --- STEP 3 & 4: LOOK UP STATS AND CALCULATE RELATIVE STRENGTH ---
+        # We create features that show the MISMATCH.
+        # e.g., If Enyimba Home Attack (2.0) plays Pillars Away Defense (1.5)
+        df = pd.concat([df, compute_features(df, home_stats, away_stats, averages)], axis=1)
+
+    # --- STEP 5: FORM GUIDE (point-in-time, only uses earlier matches) ---
+    print(f"📈 Calculating Form Guide (last {', '.join(map(str, FORM_WINDOWS))} games)...")
+    with instrumentation.stage('features.form', rows=len(df)):
+        form, tracker = form_features.add_form_features(df, FORM_WINDOWS, FORM_DECAY)
+        df = pd.concat([df, form], axis=1)
+    state['form'] = tracker.state_dict()
+
+    # --- STEP 6: ELO RATINGS (also point-in-time, same single pass idea) ---
+    print("♟️ Calculating Elo ratings...")
+    with instrumentation.stage('features.elo', rows=len(df)):
+        elo, elo_tracker = elo_ratings.add_elo_features(df, ELO_PARAMS)
+        df = pd.concat([df, elo], axis=1)
+        state['elo'] = elo_tracker.state_dict()
+        elo_tracker.history().save(league.elo_file)
+
+    # 7. SAVE
+    print(f"✅ Calculated features for {len(df)} matches.")
+    with instrumentation.stage('features.save', rows=len(df)):
+        df.to_csv(league.training_file, index=False)
+        save_state(state, league.state_file)
+    print(f"💾 Saved smart data to {league.training_file}")
+
+    # 8. PREVIEW (The "Sanity Check")
+    print("\n👀 Preview: Enyimba's Home Strength vs Opponent's Weakness")
+    sample = df[df['Home_Team'].str.contains('Enyimba', na=False)].head(5)
+    print(sample[['Home_Team', 'Away_Team', 'Outcome', 'Home_Attack', 'Away_Defense', 'Power_Diff']])
+    return df
+
+@instrumentation.stage('features.update')
+def update_features(new_matches, league=None):
+    """
+    Incremental mode: folds new (or corrected) matches into the saved sums and counts,
+    then recomputes features only for rows involving teams whose ratings moved.
+    Falls back to a full rebuild if there is no saved state yet.
+    """
+    league = leagues.get_league(league)
+    state = load_state(league.state_file)
+    if state is None or not os.path.exists(league.training_file):
+        print("ℹ️ No saved feature state. Running a full rebuild...")
+        return add_features(league)
+
+    with instrumentation.stage('features.load'):
+        df = pd.read_csv(league.training_file)
+    key = match_store.KEY_COLUMNS
+    latest_season = df['Season'].max()
+
+    # 1. WHAT ACTUALLY CHANGED?
+    # A mid-season re-scrape returns every match again. Unchanged ones are no-ops.
+    with instrumentation.stage('features.diff', rows=len(new_matches)):
+        new_matches = new_matches.drop_duplicates(subset=key, keep='last')
+        merged = new_matches.merge(df[key + ['Home_Goals', 'Away_Goals']].reset_index(),
+                                   on=key, how='left', suffixes=('', '_Old'))
+        is_new = merged['index'].isna()
+        is_changed = ~is_new & ((merged['Home_Goals'] != merged['Home_Goals_Old']) |
+                                (merged['Away_Goals'] != merged['Away_Goals_Old']))
+
+        added = new_matches[is_new.to_numpy()]
+        corrected = merged[is_changed]
+    if added.empty and corrected.empty:
+        print("✅ Features already up to date.")
+        return df
+
+    # 2. UPDATE THE RUNNING SUMS (only the new/corrected rows are touched)
+    with instrumentation.stage('features.state', rows=len(added) + len(corrected)):
+        old_rows = df.loc[corrected['index'].astype(int)]
+        _add_to_state(state, old_rows, sign=-1)
+        _add_to_state(state, corrected, sign=1)
+        _add_to_state(state, added, sign=1)
+
+    # 3. APPLY THE CORRECTIONS & APPEND THE NEW ROWS
+    if not corrected.empty:
+        rows = corrected['index'].astype(int).to_numpy()
+        df.loc[rows, ['Home_Goals', 'Away_Goals', 'Outcome']] = corrected[['Home_Goals', 'Away_Goals', 'Outcome']].to_numpy()
+    df = pd.concat([df, added], ignore_index=True)
+    data_validation.check(df, league)   # The merged table must still be sound (nothing saved yet)
+
+    # 4. RECOMPUTE FEATURES FOR AFFECTED ROWS ONLY
+    delta = pd.concat([old_rows, corrected, added])
+    affected = df['Home_Team'].isin(set(delta['Home_Team'])) | df['Away_Team'].isin(set(delta['Away_Team']))
+
+    with instrumentation.stage('features.ratings', rows=int(affected.sum())):
+        home_stats, away_stats, averages = ratings_from_state(state)
+        df.loc[affected, FEATURE_COLS] = compute_features(df[affected], home_stats, away_stats, averages)[FEATURE_COLS]
+
+    # 5. FORM GUIDE
+    # New matches at the end of the timeline just continue from the saved ring buffers.
+    # Corrections (or back-filled old seasons) change history, so redo the O(n) pass.
+    # Without dates a season's form is fixed at its start and the saved buffers already
+    # hold this season's results, so only matches from a brand-new season can continue.
+    form_cols = form_features.form_feature_names(FORM_WINDOWS)
+    saved_form = state.get('form')
+    timed = match_store.time_column(df) is not None
+    can_continue = (saved_form is not None and corrected.empty
+                    and tuple(saved_form['windows']) == tuple(sorted(FORM_WINDOWS))
+                    and saved_form['decay'] == FORM_DECAY
+                    and all(col in df.columns for col in form_cols)
+                    and ((added['Season'] >= latest_season) if timed else (added['Season'] > latest_season)).all())
+    with instrumentation.stage('features.form', rows=len(added) if can_continue else len(df)):
+        if can_continue:
+            new_rows = df.index[len(df) - len(added):]
+            tracker = form_features.FormTracker.from_state(saved_form)
+            form, tracker = form_features.add_form_features(df.loc[new_rows], tracker=tracker)
+            df.loc[new_rows, form_cols] = form[form_cols]
+        else:
+            form, tracker = form_features.add_form_features(df, FORM_WINDOWS, FORM_DECAY)
+            df[form_cols] = form[form_cols]
+    state['form'] = tracker.state_dict()
+
+    # 6. ELO RATINGS (same rules: append-only continues, anything else replays, and
+    # without dates the saved ratings already hold this season's changes)
+    saved_elo = state.get('elo')
+    can_continue = (saved_elo is not None and corrected.empty
+                    and saved_elo['params'] == ELO_PARAMS
+                    and all(col in df.columns for col in elo_ratings.ELO_COLS)
+                    and os.path.exists(league.elo_file)
+                    and ((added['Season'] >= latest_season) if timed else (added['Season'] > latest_season)).all())
+    with instrumentation.stage('features.elo', rows=len(added) if can_continue else len(df)):
+        if can_continue:
+            new_rows = df.index[len(df) - len(added):]
+            elo_tracker = elo_ratings.EloTracker.from_state(saved_elo)
+            elo, elo_tracker = elo_ratings.add_elo_features(df, tracker=elo_tracker, only=new_rows)
+            df.loc[new_rows, elo_ratings.ELO_COLS] = elo[elo_ratings.ELO_COLS]
+            elo_ratings.EloHistory.load(league.elo_file).extend(elo_tracker.history()).save(league.elo_file)
+        else:
+            elo, elo_tracker = elo_ratings.add_elo_features(df, ELO_PARAMS)
+            df[elo_ratings.ELO_COLS] = elo[elo_ratings.ELO_COLS]
+            elo_tracker.history().save(league.elo_file)
+    state['elo'] = elo_tracker.state_dict()
+
+    print(f"✅ {len(added)} new / {len(corrected)} corrected matches. Recomputed {int(affected.sum())} rows.")
+    with instrumentation.stage('features.save', rows=len(df)):
+        df.to_csv(league.training_file, index=False)
+        save_state(state, league.state_file)
+    print(f"💾 Saved smart data to {league.training_file}")
+    return df
+
+if __name__ == "__main__":
+    add_features()
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+import match_store
+
+# CONFIGURATION
+FORM_WINDOWS = (5,)   # "Last 5 games" Form Guide. Add more, e.g. (3, 5, 10)
+FORM_DECAY = None     # e.g. 0.8 = each older game counts 80% as much as the one after it
+
+POINTS = {'win': 3, 'draw': 1, 'loss': 0}
+
+
+def form_feature_names(windows=FORM_WINDOWS):
+    names = []
+    for side in ['Home', 'Away']:
+        for w in windows:
+            names += [f"{side}_Form{w}_GF", f"{side}_Form{w}_GA", f"{side}_Form{w}_Pts"]
+        names.append(f"{side}_Streak")
+    return names
+
+
+class FormTracker:
+    """
+    Keeps each team's last few results in a fixed-size ring buffer (one numpy row per team).
+    Walk matches oldest-first: read a team's form (as of kickoff), then record the result.
+
+    Buffer slots hold [goals for, goals against, points].
+    Streak is +n after n straight wins, -n after n straight losses, 0 after a draw.
+    """
+
+    def __init__(self, windows=FORM_WINDOWS, decay=FORM_DECAY, capacity=32):
+        self.windows = tuple(sorted(windows))
+        self.size = self.windows[-1]
+        self.decay = decay
+        self.team_index = {}
+        self.buffer = np.zeros((capacity, self.size, 3), dtype=np.float32)
+        self.pos = np.zeros(capacity, dtype=np.int32)     # Next slot to write
+        self.count = np.zeros(capacity, dtype=np.int32)   # Games seen (capped at buffer size)
+        self.streak = np.zeros(capacity, dtype=np.int32)
+
+        # Most recent game gets weight 1, the one before decay, then decay^2, ...
+        ages = np.arange(self.size)
+        self.weights = np.power(decay, ages) if decay is not None else np.ones(self.size)
+
+    def _row(self, team):
+        row = self.team_index.get(team)
+        if row is None:
+            row = len(self.team_index)
+            if row == len(self.pos):
+                self._grow()
+            self.team_index[team] = row
+        return row
+
+    def _grow(self):
+        extra = len(self.pos)
+        self.buffer = np.concatenate([self.buffer, np.zeros_like(self.buffer[:extra])])
+        self.pos = np.concatenate([self.pos, np.zeros(extra, dtype=np.int32)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int32)])
+        self.streak = np.concatenate([self.streak, np.zeros(extra, dtype=np.int32)])
+
+    def current_form(self, row):
+        """[GF, GA, Pts] for each window (NaN before a team's first game), then the streak."""
+        n = self.count[row]
+        out = np.full(3 * len(self.windows) + 1, np.nan)
+        out[-1] = self.streak[row]
+        if n == 0:
+            return out
+
+        # Slots ordered newest first
+        slots = (self.pos[row] - 1 - np.arange(n)) % self.size
+        recent = self.buffer[row, slots]
+        for i, w in enumerate(self.windows):
+            k = min(n, w)
+            weights = self.weights[:k]
+            out[3 * i:3 * i + 3] = weights @ recent[:k] / weights.sum()
+        return out
+
+    def record(self, row, goals_for, goals_against):
+        if goals_for > goals_against:
+            points = POINTS['win']
+            self.streak[row] = max(self.streak[row], 0) + 1
+        elif goals_for < goals_against:
+            points = POINTS['loss']
+            self.streak[row] = min(self.streak[row], 0) - 1
+        else:
+            points = POINTS['draw']
+            self.streak[row] = 0
+
+        self.buffer[row, self.pos[row]] = (goals_for, goals_against, points)
+        self.pos[row] = (self.pos[row] + 1) % self.size
+        self.count[row] = min(self.count[row] + 1, self.size)
+
+    def process(self, home_teams, away_teams, home_goals, away_goals, seasons=None):
+        """
+        One O(n) pass over matches that are already in chronological order.
+        Each row's features only use matches before it.
+
+        Pass seasons when the order inside a season isn't known (results matrices list
+        matches by home team, not by date): every row then gets its teams' form as of the
+        end of the previous season, and a season's results are only recorded after it.
+        """
+        n_cols = 3 * len(self.windows) + 1
+        n = len(home_teams)
+        out = np.empty((n, 2 * n_cols))
+        rows = [(self._row(home), self._row(away)) for home, away in zip(home_teams, away_teams)]
+
+        # Blocks of rows that can't see each other: one match each, or a whole season
+        if seasons is None:
+            starts = np.arange(n)
+        else:
+            seasons = np.asarray(seasons)
+            starts = np.flatnonzero(seasons[1:] != seasons[:-1]) + 1
+            starts = np.concatenate([[0], starts]) if n else starts
+        bounds = list(starts) + [n]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            for i in range(start, stop):
+                h_row, a_row = rows[i]
+                out[i, :n_cols] = self.current_form(h_row)
+                out[i, n_cols:] = self.current_form(a_row)
+            for i in range(start, stop):
+                h_row, a_row = rows[i]
+                self.record(h_row, home_goals[i], away_goals[i])
+                self.record(a_row, away_goals[i], home_goals[i])
+        return out
+
+    def state_dict(self):
+        """Everything needed to carry on from where the last pass stopped (JSON friendly)."""
+        n = len(self.team_index)
+        return {
+            'windows': list(self.windows),
+            'decay': self.decay,
+            'teams': list(self.team_index),
+            'buffer': self.buffer[:n].tolist(),
+            'pos': self.pos[:n].tolist(),
+            'count': self.count[:n].tolist(),
+            'streak': self.streak[:n].tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        tracker = cls(state['windows'], state['decay'], capacity=max(len(state['teams']), 1))
+        n = len(state['teams'])
+        tracker.team_index = {team: i for i, team in enumerate(state['teams'])}
+        if n:
+            tracker.buffer[:n] = np.array(state['buffer'], dtype=np.float32)
+            tracker.pos[:n] = state['pos']
+            tracker.count[:n] = state['count']
+            tracker.streak[:n] = state['streak']
+        return tracker
+
+
+def add_form_features(df, windows=FORM_WINDOWS, decay=FORM_DECAY, tracker=None):
+    """
+    Returns (form features aligned to df's index, tracker).
+    Pass a tracker from a previous run to continue with matches that come after it.
+
+    Form inside a season needs a Date or Matchday column. Without one (results matrices),
+    each season only sees the form its teams carried over from the season before.
+    """
+    tracker = tracker or FormTracker(windows, decay)
+    ordered = match_store.sort_chronologically(df)
+    seasons = None if match_store.time_column(ordered) else ordered['Season'].to_numpy()
+
+    values = tracker.process(
+        ordered['Home_Team'].to_numpy(),
+        ordered['Away_Team'].to_numpy(),
+        ordered['Home_Goals'].to_numpy(),
+        ordered['Away_Goals'].to_numpy(),
+        seasons,
+    )
+    features = pd.DataFrame(values, index=ordered.index, columns=form_feature_names(tracker.windows))
+    return features.round(2).reindex(df.index), tracker
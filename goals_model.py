@@ -0,0 +1,237 @@
+"""
+Poisson / Dixon-Coles goals model: scoreline probabilities, not just a winner.
+
+Each team gets an attack and a defense strength, plus one home-advantage term:
+    home goals ~ Poisson(exp(mu + home + attack[home] - defense[away]))
+    away goals ~ Poisson(exp(mu + attack[away] - defense[home]))
+Dixon-Coles adds `rho`, a correction for the low scores (0-0, 1-0, 0-1, 1-1)
+that plain Poisson gets wrong. The fit uses L-BFGS-B with an analytic gradient.
+
+    python goals_model.py        (fit on all seasons, print team strengths)
+    python goals_model.py --league gpl
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+import instrumentation
+import leagues
+import match_store
+import model_registry
+
+# CONFIGURATION
+MAX_GOALS = 10          # Scoreline grid is 0..MAX_GOALS for each side
+RIDGE = 1.0             # Shrinks attack/defense towards average (and pins them to mean zero)
+SEASON_DECAY = 0.25     # Older seasons count exp(-0.25) less per season back; 0 = all equal
+RHO_BOUNDS = (-0.2, 0.2)
+OVER_UNDER_LINES = (1.5, 2.5, 3.5)
+MODEL_PARAMS = {'model': 'DixonColes', 'ridge': RIDGE, 'season_decay': SEASON_DECAY, 'dixon_coles': True}
+
+
+def season_weights(seasons, decay=SEASON_DECAY):
+    """1.0 for the latest season, exp(-decay) for the one before, and so on."""
+    age = seasons.rank(method='dense', ascending=False).to_numpy() - 1
+    return np.exp(-decay * age)
+
+
+def _unpack(theta, n):
+    return theta[0], theta[1], theta[2:2 + n], theta[2 + n:2 + 2 * n], theta[2 + 2 * n]
+
+
+def _tau_terms(x, y, lam, mu, rho):
+    """
+    Dixon-Coles low-score factor tau and its derivatives (w.r.t. lam, mu, rho), per match.
+    tau = 1 for every scoreline other than 0-0, 0-1, 1-0 and 1-1.
+    """
+    tau = np.ones_like(lam)
+    d_lam, d_mu, d_rho = np.zeros_like(lam), np.zeros_like(lam), np.zeros_like(lam)
+
+    m00 = (x == 0) & (y == 0)
+    tau[m00] = 1 - lam[m00] * mu[m00] * rho
+    d_lam[m00], d_mu[m00], d_rho[m00] = -mu[m00] * rho, -lam[m00] * rho, -lam[m00] * mu[m00]
+
+    m01 = (x == 0) & (y == 1)
+    tau[m01] = 1 + lam[m01] * rho
+    d_lam[m01], d_rho[m01] = rho, lam[m01]
+
+    m10 = (x == 1) & (y == 0)
+    tau[m10] = 1 + mu[m10] * rho
+    d_mu[m10], d_rho[m10] = rho, mu[m10]
+
+    m11 = (x == 1) & (y == 1)
+    tau[m11] = 1 - rho
+    d_rho[m11] = -1
+
+    return np.maximum(tau, 1e-10), d_lam, d_mu, d_rho
+
+
+def negative_log_likelihood(theta, h, a, x, y, w, n, ridge=RIDGE, dixon_coles=True):
+    """Weighted NLL and its gradient (constant log(x!) terms dropped)."""
+    mu0, home, att, dfn, rho = _unpack(theta, n)
+    eta_h = mu0 + home + att[h] - dfn[a]
+    eta_a = mu0 + att[a] - dfn[h]
+    lam, mu = np.exp(eta_h), np.exp(eta_a)
+
+    nll = np.sum(w * (lam - x * eta_h + mu - y * eta_a))
+    # d(nll)/d(eta) for each side, per match
+    g_h = w * (lam - x)
+    g_a = w * (mu - y)
+    g_rho = 0.0
+
+    if dixon_coles:
+        tau, d_lam, d_mu, d_rho = _tau_terms(x, y, lam, mu, rho)
+        nll -= np.sum(w * np.log(tau))
+        g_h -= w * d_lam * lam / tau     # d(log tau)/d(eta_h) = (d tau/d lam) * lam / tau
+        g_a -= w * d_mu * mu / tau
+        g_rho = -np.sum(w * d_rho / tau)
+
+    nll += 0.5 * ridge * (att @ att + dfn @ dfn)
+
+    grad = np.empty_like(theta)
+    grad[0] = g_h.sum() + g_a.sum()
+    grad[1] = g_h.sum()
+    grad[2:2 + n] = np.bincount(h, g_h, n) + np.bincount(a, g_a, n) + ridge * att
+    grad[2 + n:2 + 2 * n] = -np.bincount(a, g_h, n) - np.bincount(h, g_a, n) + ridge * dfn
+    grad[2 + 2 * n] = g_rho
+    return nll, grad
+
+
+def poisson_pmf(rates, max_goals=MAX_GOALS):
+    """(F,) rates -> (F, max_goals + 1) probabilities of 0, 1, 2, ... goals."""
+    k = np.arange(max_goals + 1)
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, max_goals + 1)))])
+    return np.exp(k * np.log(rates)[:, None] - rates[:, None] - log_factorial)
+
+
+class GoalsModel:
+    def __init__(self, teams, mu, home, attack, defense, rho=0.0):
+        self.teams = list(teams)
+        self.index = {team: i for i, team in enumerate(self.teams)}
+        self.mu = float(mu)
+        self.home = float(home)
+        self.attack = np.asarray(attack, dtype=float)
+        self.defense = np.asarray(defense, dtype=float)
+        self.rho = float(rho)
+
+    @classmethod
+    def fit(cls, matches, ridge=RIDGE, season_decay=SEASON_DECAY, dixon_coles=True):
+        codes, teams = pd.factorize(pd.concat([matches['Home_Team'], matches['Away_Team']]), sort=True)
+        n, m = len(teams), len(matches)
+        h, a = codes[:m], codes[m:]
+        x = matches['Home_Goals'].to_numpy(float)
+        y = matches['Away_Goals'].to_numpy(float)
+        w = season_weights(matches['Season'], season_decay)
+
+        # Start from the league's average scoring rates
+        theta = np.zeros(2 * n + 3)
+        theta[0] = np.log(max(y.mean(), 0.1))
+        theta[1] = np.log(max(x.mean(), 0.1)) - theta[0]
+
+        bounds = [(None, None)] * (2 * n + 2) + [RHO_BOUNDS if dixon_coles else (0.0, 0.0)]
+        result = minimize(negative_log_likelihood, theta, jac=True, method='L-BFGS-B', bounds=bounds,
+                          args=(h, a, x, y, w, n, ridge, dixon_coles))
+        mu0, home, att, dfn, rho = _unpack(result.x, n)
+        return cls(teams, mu0, home, att, dfn, rho)
+
+    def rates(self, homes, aways):
+        """Expected goals for each fixture. Teams the model hasn't seen are treated as league average."""
+        h = np.array([self.index.get(t, -1) for t in homes])
+        a = np.array([self.index.get(t, -1) for t in aways])
+        att = np.append(self.attack, 0.0)   # Index -1 = the average team
+        dfn = np.append(self.defense, 0.0)
+        lam = np.exp(self.mu + self.home + att[h] - dfn[a])
+        mu = np.exp(self.mu + att[a] - dfn[h])
+        return lam, mu
+
+    def scoreline_grid(self, homes, aways, max_goals=MAX_GOALS):
+        """
+        (F, G, G) tensor: grid[f, i, j] = P(home scores i, away scores j) for fixture f.
+        All fixtures are scored together; rows are renormalized for the truncated tail.
+        """
+        lam, mu = self.rates(homes, aways)
+        grid = poisson_pmf(lam, max_goals)[:, :, None] * poisson_pmf(mu, max_goals)[:, None, :]
+
+        if self.rho:
+            grid[:, 0, 0] *= 1 - lam * mu * self.rho
+            grid[:, 0, 1] *= 1 + lam * self.rho
+            grid[:, 1, 0] *= 1 + mu * self.rho
+            grid[:, 1, 1] *= 1 - self.rho
+        return grid / grid.sum(axis=(1, 2), keepdims=True)
+
+    def strengths(self):
+        return pd.DataFrame({'Attack': self.attack, 'Defense': self.defense}, index=self.teams) \
+            .sort_values('Attack', ascending=False)
+
+
+def outcome_probs(grid):
+    """(F, 3) Away Win / Draw / Home Win probabilities (same order as the classifiers' classes_)."""
+    home = np.tril(np.ones(grid.shape[1:]), -1).astype(bool)   # i > j
+    return np.column_stack([
+        grid[:, home.T].sum(axis=1),
+        np.trace(grid, axis1=1, axis2=2),
+        grid[:, home].sum(axis=1),
+    ])
+
+
+def market_probs(grid, lines=OVER_UNDER_LINES):
+    """Everything derivable from the grid, as a DataFrame with one row per fixture."""
+    g = grid.shape[1]
+    total_goals = np.add.outer(np.arange(g), np.arange(g))
+    outcomes = outcome_probs(grid)
+
+    markets = {
+        'Home_Win': outcomes[:, 2],
+        'Draw': outcomes[:, 1],
+        'Away_Win': outcomes[:, 0],
+    }
+    for line in lines:
+        over = (grid * (total_goals > line)).sum(axis=(1, 2))
+        markets[f"Over_{line}"] = over
+        markets[f"Under_{line}"] = 1 - over
+    markets['Home_Clean_Sheet'] = grid[:, :, 0].sum(axis=1)
+    markets['Away_Clean_Sheet'] = grid[:, 0, :].sum(axis=1)
+    markets['BTTS'] = grid[:, 1:, 1:].sum(axis=(1, 2))
+
+    best = grid.reshape(len(grid), -1).argmax(axis=1)
+    markets['Likely_Score'] = [f"{i}-{j}" for i, j in zip(*np.divmod(best, g))]
+    markets['Likely_Score_Prob'] = grid.reshape(len(grid), -1)[np.arange(len(grid)), best]
+    return pd.DataFrame(markets)
+
+
+def train_model(league=None):
+    league = leagues.get_league(league)
+    matches = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    with instrumentation.stage('train.goals_dixon_coles', rows=len(matches)):
+        return GoalsModel.fit(matches, MODEL_PARAMS['ridge'], MODEL_PARAMS['season_decay'],
+                              MODEL_PARAMS['dixon_coles'])
+
+
+def load_or_fit(league=None):
+    """The fitted model for the current match data (refit only when the data changes)."""
+    league = leagues.get_league(league)
+    _, model = model_registry.load_or_train(
+        'goals_dixon_coles', match_store.partition_files(league.store_dir, league.legacy_file),
+        ['Home_Goals', 'Away_Goals'], MODEL_PARAMS, lambda: train_model(league), league.registry_dir)
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the Dixon-Coles goals model and show team strengths.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    league = leagues.get_league(parser.parse_args(argv).league)
+
+    matches = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    start = time.perf_counter()
+    model = GoalsModel.fit(matches)
+    print(f"⚽ Fitted Dixon-Coles goals model on {len(matches)} matches ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    print(f"   Home advantage: x{np.exp(model.home):.2f} goals, rho = {model.rho:+.3f}")
+    print("\n💪 Team strengths (higher Attack = scores more, higher Defense = concedes less):")
+    print(model.strengths().round(3).to_string())
+    return model
+
+
+if __name__ == "__main__":
+    main()
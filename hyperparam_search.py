@@ -0,0 +1,302 @@
+"""
+Hyperparameter search for the predictors, scored by walk-forward log-loss.
+
+    python hyperparam_search.py                                (successive halving, stats_rf)
+    python hyperparam_search.py --strategy grid --model team_id_logreg
+    python hyperparam_search.py --strategy random --trials 30 --workers 4
+    python hyperparam_search.py --league gpl                   (tuned on, and saved for, that league only)
+
+1. The walk-forward fold matrices are built once and saved as .npy files in search_cache/.
+   Every worker opens them with mmap_mode='r', so all processes share one copy in the page cache.
+2. Each finished trial is appended to search_results/<model>-<data key>.jsonl.
+   Re-running the same search skips trials that are already there (interrupted searches resume).
+3. The winner is written to the league's best-params file (best_params.json for the NPFL,
+   <id>_best_params.json otherwise), which advanced_predictor.py / predict_matchday.py read when they train.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import leagues
+import match_store
+import model_registry
+
+# CONFIGURATION
+CACHE_DIR = 'search_cache'
+RESULTS_DIR = 'search_results'
+BLOCKS_PER_SEASON = backtest.BLOCKS_PER_SEASON   # > 1 only with a Date / Matchday column (see backtest.py)
+HALVING_ETA = 3          # Keep the best 1/3 of configs at each rung
+RANDOM_TRIALS = 20
+SEED = 42
+
+SEARCH_SPACES = {
+    'stats_rf': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [3, 5, 8, 12, None],
+        'min_samples_leaf': [1, 5, 10, 25],
+        'max_features': ['sqrt', None],
+    },
+    'team_id_logreg': {
+        'C': [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0],
+        'max_iter': [1000],
+    },
+}
+
+_SHARED = {}   # Per-process cache of the memory-mapped matrices
+
+
+# --- SHARED FEATURE MATRICES ---
+
+def data_key(matches, model_name, blocks_per_season):
+    digest = hashlib.sha256(
+        f"{backtest.MODEL_SPECS[model_name]['features']}:v{backtest.FEATURES_VERSION}:{blocks_per_season}".encode('utf-8'))
+    cols = match_store.KEY_COLUMNS + ['Home_Goals', 'Away_Goals']
+    digest.update(pd.util.hash_pandas_object(matches[cols], index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def build_shared_matrices(model_name, matches=None, blocks_per_season=BLOCKS_PER_SEASON, cache_dir=CACHE_DIR,
+                          league=None):
+    """
+    Stacks every fold's train and test rows into one X.npy / y.npy pair (built once per dataset).
+    folds.json records which row ranges belong to each fold. Returns the directory.
+    """
+    if matches is None:
+        league = leagues.get_league(league)
+        matches = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    backtest.check_blocks_per_season(matches, blocks_per_season)   # Before the cache: old leaky matrices too
+    key = data_key(matches, model_name, blocks_per_season)
+    out_dir = os.path.join(cache_dir, f"{backtest.MODEL_SPECS[model_name]['features']}-{key}")
+    if os.path.exists(os.path.join(out_dir, 'folds.json')):
+        return out_dir
+
+    print("🧮 Building walk-forward feature matrices...")
+    matches = backtest.assign_blocks(matches, blocks_per_season)
+    featurizer = backtest.MODEL_SPECS[model_name]['features']
+
+    X_parts, y_parts, folds, offset = [], [], [], 0
+    for block in sorted(b for b in matches['Block'].unique() if b >= blocks_per_season):
+        train, test = matches[matches['Block'] < block], matches[matches['Block'] == block]
+        X_train, y_train, X_test, y_test = backtest.fold_matrices(featurizer, train, test)
+        folds.append({
+            'block': int(block),
+            'season': test['Season'].iloc[0],
+            'train': [offset, offset + len(y_train)],
+            'test': [offset + len(y_train), offset + len(y_train) + len(y_test)],
+        })
+        offset += len(y_train) + len(y_test)
+        X_parts += [X_train, X_test]
+        y_parts += [y_train, y_test]
+
+    # Written to a temp dir and renamed, so workers never see half-written files
+    tmp_dir = f"{out_dir}.tmp{os.getpid()}"
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        np.save(os.path.join(tmp_dir, 'X.npy'), np.ascontiguousarray(np.vstack(X_parts), dtype=np.float64))
+        np.save(os.path.join(tmp_dir, 'y.npy'), np.concatenate(y_parts))
+        with open(os.path.join(tmp_dir, 'folds.json'), 'w', encoding='utf-8') as f:
+            json.dump(folds, f)
+        # A directory without folds.json is left over from an interrupted run: replace it
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+    except OSError:
+        if not os.path.exists(os.path.join(out_dir, 'folds.json')):
+            raise
+        # Another search finished the same matrices first: use those
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out_dir
+
+
+def open_shared(matrix_dir):
+    """Memory-maps the matrices (once per process). Slicing a fold doesn't copy the whole file."""
+    if matrix_dir not in _SHARED:
+        with open(os.path.join(matrix_dir, 'folds.json'), encoding='utf-8') as f:
+            folds = json.load(f)
+        _SHARED[matrix_dir] = (np.load(os.path.join(matrix_dir, 'X.npy'), mmap_mode='r'),
+                               np.load(os.path.join(matrix_dir, 'y.npy'), mmap_mode='r'),
+                               folds)
+    return _SHARED[matrix_dir]
+
+
+# --- TRIALS ---
+
+def trial_id(params, fold_blocks):
+    blob = json.dumps({'params': params, 'folds': list(fold_blocks)}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+
+def run_trial(model_name, params, matrix_dir, fold_blocks):
+    """Fits one configuration on the chosen folds. Returns weighted walk-forward metrics."""
+    X, y, folds = open_shared(matrix_dir)
+    spec = backtest.MODEL_SPECS[model_name]
+    wanted = set(fold_blocks)
+    start = time.perf_counter()
+
+    totals, n_test = {'accuracy': 0.0, 'log_loss': 0.0, 'brier': 0.0}, 0
+    for fold in folds:
+        if fold['block'] not in wanted:
+            continue
+        (a, b), (c, d) = fold['train'], fold['test']
+        model = backtest.make_model(spec, params)
+        model.fit(X[a:b], y[a:b])
+        metrics = backtest.score(backtest.full_proba(model, X[c:d]), np.asarray(y[c:d]))
+        for name in totals:
+            totals[name] += metrics[name] * (d - c)
+        n_test += d - c
+
+    return {
+        'trial': trial_id(params, fold_blocks),
+        'params': params,
+        'folds': sorted(wanted),
+        'n_test': n_test,
+        **{name: total / n_test for name, total in totals.items()},
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+class ResultsStore:
+    """Append-only JSON-lines file of finished trials, keyed by trial id."""
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by an interrupted run
+                    self.results[record['trial']] = record
+
+    def get(self, trial):
+        return self.results.get(trial)
+
+    def add(self, record):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str) + "\n")
+        self.results[record['trial']] = record
+
+
+def evaluate(model_name, candidates, fold_blocks, matrix_dir, store, workers):
+    """Scores every candidate on `fold_blocks`, reusing stored results. Returns records in candidate order."""
+    todo = [p for p in candidates if store.get(trial_id(p, fold_blocks)) is None]
+    if len(todo) < len(candidates):
+        print(f"   ♻️ {len(candidates) - len(todo)} trials already in the results store")
+
+    if todo:
+        if workers == 1:
+            for params in todo:
+                store.add(run_trial(model_name, params, matrix_dir, fold_blocks))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(run_trial, model_name, p, matrix_dir, fold_blocks) for p in todo]
+                for future in as_completed(futures):
+                    store.add(future.result())   # Saved as soon as it finishes
+    return [store.get(trial_id(p, fold_blocks)) for p in candidates]
+
+
+# --- STRATEGIES ---
+
+def grid_candidates(space):
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_candidates(space, n_trials, seed=SEED):
+    grid = grid_candidates(space)
+    return random.Random(seed).sample(grid, min(n_trials, len(grid)))
+
+
+def halving_rungs(n_candidates, n_folds, eta=HALVING_ETA):
+    """Folds used at each rung (most recent folds first); the last rung uses all of them."""
+    rungs = max(1, min(int(math.log(max(n_candidates, 1), eta)) + 1, int(math.log(n_folds, eta)) + 1))
+    return [max(1, n_folds // eta ** (rungs - 1 - r)) for r in range(rungs)]
+
+
+def search(model_name='stats_rf', strategy='halving', n_trials=RANDOM_TRIALS, workers=None,
+           blocks_per_season=BLOCKS_PER_SEASON, matches=None, cache_dir=CACHE_DIR, results_dir=RESULTS_DIR,
+           save_best=True, league=None):
+    """Runs a search and returns the best record (lowest walk-forward log-loss on all folds)."""
+    league = leagues.get_league(league)
+    matrix_dir = build_shared_matrices(model_name, matches, blocks_per_season, cache_dir, league)
+    _, _, folds = open_shared(matrix_dir)
+    all_blocks = [f['block'] for f in folds]
+
+    store = ResultsStore(os.path.join(results_dir, f"{os.path.basename(matrix_dir)}-{model_name}.jsonl"))
+    workers = workers or os.cpu_count() or 1
+    space = SEARCH_SPACES[model_name]
+
+    if strategy == 'grid':
+        candidates = grid_candidates(space)
+    else:
+        candidates = random_candidates(space, n_trials if strategy == 'random' else len(grid_candidates(space)))
+
+    start = time.perf_counter()
+    if strategy == 'halving':
+        # Cheap first rungs on the latest few folds, full walk-forward only for the survivors
+        for rung, n_folds in enumerate(halving_rungs(len(candidates), len(all_blocks))):
+            blocks = all_blocks[-n_folds:]
+            print(f"🪜 Rung {rung + 1}: {len(candidates)} configs on the latest {n_folds} folds")
+            records = evaluate(model_name, candidates, blocks, matrix_dir, store, workers)
+            if n_folds == len(all_blocks):
+                break
+            keep = max(1, math.ceil(len(candidates) / HALVING_ETA))
+            ranked = sorted(zip(records, candidates), key=lambda rc: rc[0]['log_loss'])
+            candidates = [params for _, params in ranked[:keep]]
+    else:
+        print(f"🔎 {strategy.title()} search: {len(candidates)} configs on {len(all_blocks)} folds, {workers} worker(s)")
+        records = evaluate(model_name, candidates, all_blocks, matrix_dir, store, workers)
+
+    best = min(records, key=lambda r: r['log_loss'])
+    print(f"\n🏆 Best {model_name}: {best['params']}")
+    print(f"   Walk-forward log-loss {best['log_loss']:.4f}, accuracy {best['accuracy']:.2%}, "
+          f"Brier {best['brier']:.4f}  [{time.perf_counter() - start:.1f} s]")
+
+    if save_best:
+        params = {**backtest.MODEL_SPECS[model_name]['params'], **best['params']}
+        model_registry.save_best_params(model_name, params, {
+            k: round(best[k], 4) for k in ('log_loss', 'accuracy', 'brier')}, league.best_params_file)
+        print(f"💾 Saved to {league.best_params_file} (used the next time the {league.id} predictor trains)")
+    return best
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the predictors with walk-forward validation.")
+    parser.add_argument('--model', choices=sorted(SEARCH_SPACES), default='stats_rf')
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    parser.add_argument('--strategy', choices=['grid', 'random', 'halving'], default='halving')
+    parser.add_argument('--trials', type=int, default=RANDOM_TRIALS, help="Configs to try with --strategy random.")
+    parser.add_argument('--workers', type=int, help="Processes to use (default: all cores).")
+    parser.add_argument('--blocks-per-season', type=int, default=BLOCKS_PER_SEASON,
+                        help="Folds per season (> 1 needs a Date or Matchday column).")
+    parser.add_argument('--dry-run', action='store_true', help="Don't save the winning params.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        return search(args.model, args.strategy, args.trials, args.workers, args.blocks_per_season,
+                      save_best=not args.dry_run, league=args.league)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
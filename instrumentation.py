@@ -0,0 +1,245 @@
+"""
+Stage timing for the whole pipeline: where does a slow rebuild spend its time?
+
+    with instrumentation.stage('features.elo', rows=len(df)):
+        ...
+
+    @instrumentation.stage('train.advanced_rf')
+    def train_model(): ...
+
+Every stage appends one JSON line to npfl_metrics.jsonl: wall time, CPU time, the
+process's peak memory (and how much the stage raised it), row count, the enclosing
+stage and the run it belongs to. Then:
+
+    python instrumentation.py                      (slowest stages across all runs)
+    python instrumentation.py --last 5 --stage features
+    python npfl.py --profile features.elo features (cProfile + tracemalloc for that one stage;
+                                                    or set NPFL_PROFILE_STAGE=features.elo)
+
+Set NPFL_METRICS=0 to turn recording off.
+"""
+import argparse
+import functools
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource   # Unix only; peak memory is left out elsewhere
+except ImportError:
+    resource = None
+
+# CONFIGURATION
+METRICS_FILE = 'npfl_metrics.jsonl'
+PROFILE_DIR = 'profiles'
+PROFILE_ENV = 'NPFL_PROFILE_STAGE'   # Stage name to profile
+ENABLED_ENV = 'NPFL_METRICS'         # "0" turns recording off
+PROFILE_TOP = 15                     # Functions / allocation sites shown for a profiled stage
+
+RUN_ID = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+COMMAND = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+
+_local = threading.local()   # Open stages per thread (the server scores batches on worker threads)
+
+
+def _open_stages():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def peak_rss_mb():
+    """Highest resident memory this process has reached so far (MB), or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)   # bytes on macOS, KB on Linux
+
+
+def _count_rows(result):
+    if hasattr(result, 'shape') and len(getattr(result, 'shape')):
+        return int(result.shape[0])
+    if isinstance(result, (list, tuple)) and result and hasattr(result[0], 'shape'):
+        return int(result[0].shape[0])
+    return None
+
+
+class stage:
+    """
+    Context manager (or decorator) that records one pipeline stage.
+    Set .rows inside the block when the row count is only known at the end.
+    """
+
+    def __init__(self, name, rows=None, **tags):
+        self.name = name
+        self.rows = rows
+        self.tags = tags
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(self.name, self.rows, **self.tags) as s:   # Fresh instance per call
+                result = fn(*args, **kwargs)
+                if s.rows is None:
+                    s.rows = _count_rows(result)
+                return result
+        return wrapper
+
+    def __enter__(self):
+        stack = _open_stages()
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+
+        self.profiler = None
+        if os.environ.get(PROFILE_ENV) == self.name:
+            self._start_profile()
+
+        self.started = time.time()
+        self._rss_before = peak_rss_mb()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        rss = peak_rss_mb()
+        _open_stages().pop()
+
+        record = {
+            'run': RUN_ID,
+            'command': COMMAND,
+            'stage': self.name,
+            'parent': self.parent,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'wall_ms': round(wall * 1000, 3),
+            'cpu_ms': round(cpu * 1000, 3),
+            'peak_rss_mb': rss,
+            'rss_growth_mb': round(rss - self._rss_before, 1) if rss is not None else None,
+            'rows': self.rows,
+            'ok': exc_type is None,
+            **self.tags,
+        }
+        if self.profiler:
+            record.update(self._finish_profile())
+        write_record(record)
+        return False
+
+    # --- OPT-IN PROFILING (one stage at a time) ---
+
+    def _start_profile(self):
+        import cProfile
+        import tracemalloc
+        self._own_tracemalloc = not tracemalloc.is_tracing()
+        if self._own_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._snapshot = tracemalloc.take_snapshot()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def _finish_profile(self):
+        import pstats
+        import tracemalloc
+        self.profiler.disable()
+        _, py_peak = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().compare_to(self._snapshot, 'lineno')[:PROFILE_TOP]
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{self.name}-{RUN_ID}.prof")
+        self.profiler.dump_stats(path)
+
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        print(f"\n🔬 PROFILE: {self.name} (saved to {path}, open with snakeviz or pstats)")
+        print(out.getvalue().strip())
+        print(f"\n🧮 Python peak memory in {self.name}: {py_peak / 1e6:.1f} MB. Biggest allocation growth:")
+        for stat in allocations:
+            print(f"   {stat}")
+        return {'py_peak_mb': round(py_peak / 1e6, 1), 'profile': path}
+
+
+def write_record(record, path=None):
+    if os.environ.get(ENABLED_ENV, '1') == '0':
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with open(path or METRICS_FILE, 'a', encoding='utf-8') as f:   # One short append per stage
+        f.write(line)
+
+
+def load_records(path=METRICS_FILE):
+    records = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue   # A line cut short by a crash
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def summarize(records, last_runs=None, stage_prefix=None):
+    """Per-stage stats across runs, slowest (median wall time) first."""
+    import pandas as pd
+
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    if last_runs:
+        df = df[df['run'].isin(df['run'].drop_duplicates().tail(last_runs))]
+    if stage_prefix:
+        df = df[df['stage'].str.startswith(stage_prefix)]
+    if df.empty:
+        return df
+
+    summary = df.groupby('stage').agg(
+        calls=('wall_ms', 'size'),
+        runs=('run', 'nunique'),
+        median_ms=('wall_ms', 'median'),
+        max_ms=('wall_ms', 'max'),
+        total_ms=('wall_ms', 'sum'),
+        cpu_ms=('cpu_ms', 'median'),
+        peak_rss_mb=('peak_rss_mb', 'max'),
+        rss_growth_mb=('rss_growth_mb', 'max'),
+        rows=('rows', 'median'),
+        failed=('ok', lambda ok: int((~ok.astype(bool)).sum())),
+    )
+    return summary.sort_values('median_ms', ascending=False).round(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Show the slowest pipeline stages recorded in the metrics file.")
+    parser.add_argument('--file', default=METRICS_FILE)
+    parser.add_argument('--last', type=int, help="Only the last N runs (processes).")
+    parser.add_argument('--stage', help="Only stages starting with this (e.g. features).")
+    parser.add_argument('--top', type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    records = load_records(args.file)
+    summary = summarize(records, args.last, args.stage)
+    if summary.empty:
+        print(f"ℹ️ No stage metrics in {args.file} yet. Run part of the pipeline first.")
+        return summary
+
+    import pandas as pd
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        runs = len({r.get('run') for r in records})
+        print(f"⏱️ SLOWEST STAGES ({runs} run(s), {len(records)} records in {args.file})")
+        print(summary.head(args.top).to_string())
+    print("\nProfile one stage with: python npfl.py --profile <stage> <command>")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Runs the whole pipeline for several leagues at once, one process per league:
+
+    python league_pipeline.py                            (every league in leagues.py)
+    python league_pipeline.py --leagues npfl,gpl --workers 2
+    python league_pipeline.py --offline                  (cached pages only)
+    python league_pipeline.py --skip-scrape              (rebuild from each league's match store)
+
+For each league: scrape its season pages -> upsert into <id>_match_store/ ->
+incremental features -> train (or load) its models. Leagues share nothing but the
+page cache, so they never wait on each other and one failing doesn't stop the rest.
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import leagues
+import page_fetcher
+
+LOG_LINES = 8   # Tail of each league's output shown in the report
+
+
+def run_league(league_id, offline=False, cache_dir=page_fetcher.CACHE_DIR, skip_scrape=False,
+               base_url=None):
+    """Scrape -> store -> features -> models for one league. Returns a summary dict (never raises)."""
+    import advanced_predictor
+    import data_validation
+    import feature_engineering
+    import goals_model
+    import match_store
+    import npfl_scraper
+    import team_resolver
+
+    league = leagues.get_league(league_id)
+    start = time.perf_counter()
+    log = io.StringIO()
+    summary = {'league': league.id, 'ok': False, 'scraped': 0, 'matches': 0, 'teams': 0}
+
+    try:
+        with contextlib.redirect_stdout(log):
+            # 1. SCRAPE (every finished season plus the live one)
+            scraped = []
+            if not skip_scrape:
+                seasons = league.all_seasons()
+                if base_url:
+                    seasons = [(label, link.replace(npfl_scraper.WIKIPEDIA_BASE, base_url.rstrip('/'), 1))
+                               for label, link in seasons]
+                resolver = team_resolver.load_resolver(alias_file=league.alias_file)
+                scraped = npfl_scraper.scrape_many_seasons(
+                    seasons, cache=page_fetcher.PageCache(cache_dir), offline=offline, resolver=resolver)
+
+            # 2. UPSERT into this league's own partitions
+            if scraped:
+                new_matches = pd.concat(scraped, ignore_index=True)
+                data_validation.check_upsert(new_matches, league)   # Nothing is written if this fails
+                match_store.upsert_matches(new_matches, store_dir=league.store_dir)
+                summary['scraped'] = len(new_matches)
+            else:
+                new_matches = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+
+            # 3. FEATURES (incremental when there is saved state, full rebuild otherwise)
+            df = feature_engineering.update_features(new_matches, league)
+            if df is None:
+                raise RuntimeError(f"no match data in {league.store_dir}/")
+
+            # 4. MODELS (reused when their inputs haven't changed)
+            advanced_predictor.load_and_train(league)
+            goals_model.load_or_fit(league)
+
+        summary.update(ok=True, matches=len(df),
+                       teams=len(set(df['Home_Team']) | set(df['Away_Team'])))
+    except Exception:
+        log.write(traceback.format_exc())
+
+    summary['seconds'] = round(time.perf_counter() - start, 2)
+    summary['log'] = log.getvalue().strip().splitlines()[-LOG_LINES:]
+    return summary
+
+
+def run_all(league_ids=None, workers=None, **kwargs):
+    """Runs every league in its own process. Returns the summaries in the order given."""
+    league_ids = league_ids or list(leagues.LEAGUES)
+    for league_id in league_ids:
+        leagues.get_league(league_id)   # Fail fast on typos
+
+    workers = min(workers or os.cpu_count() or 1, len(league_ids))
+    if workers == 1:
+        return [run_league(league_id, **kwargs) for league_id in league_ids]
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(run_league, league_id, **kwargs) for league_id in league_ids]
+        return [f.result() for f in futures]
+
+
+def print_report(summaries):
+    print("\n" + "=" * 60)
+    print("🌍 LEAGUE PIPELINES")
+    print("=" * 60)
+    for s in summaries:
+        league = leagues.get_league(s['league'])
+        if s['ok']:
+            print(f"✅ {league.name}: {s['matches']} matches, {s['teams']} teams "
+                  f"({s['scraped']} scraped) in {s['seconds']:.1f} s")
+        else:
+            print(f"❌ {league.name} failed after {s['seconds']:.1f} s:")
+            for line in s['log']:
+                print(f"   {line}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape, update and train every league in parallel.")
+    parser.add_argument('--leagues', help=f"Comma-separated league IDs (default: {','.join(leagues.LEAGUES)}).")
+    parser.add_argument('--workers', type=int, help="Leagues run at once (default: one per league, up to the cores).")
+    parser.add_argument('--offline', action='store_true', help="Only use cached pages; never touch the network.")
+    parser.add_argument('--skip-scrape', action='store_true', help="Skip scraping; rebuild from the match stores.")
+    parser.add_argument('--cache-dir', default=page_fetcher.CACHE_DIR)
+    parser.add_argument('--base-url', help="Fetch season pages from a mirror instead of Wikipedia.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    league_ids = args.leagues.split(',') if args.leagues else None
+    print(f"🚀 Running pipelines for {', '.join(league_ids or leagues.LEAGUES)}...")
+
+    start = time.perf_counter()
+    summaries = run_all(league_ids, args.workers, offline=args.offline, cache_dir=args.cache_dir,
+                        skip_scrape=args.skip_scrape, base_url=args.base_url)
+    print_report(summaries)
+    print(f"\n⏱️ {len(summaries)} league(s) in {time.perf_counter() - start:.1f} s")
+    return summaries
+
+
+if __name__ == "__main__":
+    main()
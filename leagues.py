@@ -0,0 +1,93 @@
+"""
+League registry: which leagues we track, where their pages are, and where their data lives.
+
+Every league gets its own files, named after its ID:
+    <id>_match_store/  <id>_training_data.csv  <id>_feature_state.json  <id>_elo.npz  <id>_team_ids.json  <id>_rankings.npz
+and its own model folder, tuned hyperparameters and alias table. The NPFL keeps the names it always had.
+
+To add a league, add an entry to LEAGUES (and optionally an <id>_team_aliases.json).
+"""
+import os
+
+import model_registry
+
+DEFAULT_LEAGUE = 'npfl'
+WIKIPEDIA = "https://en.wikipedia.org/wiki/"
+
+
+def wikipedia_season(start_year, title):
+    """("2024-25", ".../wiki/2024%E2%80%9325_<title>") for a season page titled "2024–25 <title>"."""
+    label = f"{start_year}-{(start_year + 1) % 100:02d}"
+    return label, f"{WIKIPEDIA}{start_year}%E2%80%93{(start_year + 1) % 100:02d}_{title}"
+
+
+class League:
+    def __init__(self, league_id, name, seasons, current_season=None, alias_file=None,
+                 top_spots=3, relegation_spots=4):
+        self.id = league_id
+        self.name = name
+        self.seasons = list(seasons)              # Finished seasons: [(label, url), ...]
+        self.current_season = current_season      # The live season: (label, url)
+        self.top_spots = top_spots
+        self.relegation_spots = relegation_spots
+
+        self.store_dir = f"{league_id}_match_store"
+        self.legacy_file = f"{league_id}_historical_data.csv"
+        self.training_file = f"{league_id}_training_data.csv"
+        self.state_file = f"{league_id}_feature_state.json"
+        self.elo_file = f"{league_id}_elo.npz"
+        self.team_ids_file = f"{league_id}_team_ids.json"
+        self.rankings_file = f"{league_id}_rankings.npz"
+        self.alias_file = alias_file or f"{league_id}_team_aliases.json"
+        self.registry_dir = (model_registry.REGISTRY_DIR if league_id == DEFAULT_LEAGUE
+                             else os.path.join(model_registry.REGISTRY_DIR, league_id))
+        self.best_params_file = (model_registry.BEST_PARAMS_FILE if league_id == DEFAULT_LEAGUE
+                                 else f"{league_id}_best_params.json")
+
+    def all_seasons(self):
+        """Every season page to scrape, oldest first, including the live one."""
+        pages = sorted(self.seasons)
+        if self.current_season and self.current_season not in pages:
+            pages.append(self.current_season)
+        return pages
+
+    def __repr__(self):
+        return f"League({self.id!r}, {len(self.all_seasons())} seasons)"
+
+
+LEAGUES = {
+    'npfl': League(
+        'npfl', "Nigeria Premier Football League",
+        seasons=[
+            wikipedia_season(2024, "Nigeria_Premier_Football_League"),
+            wikipedia_season(2023, "Nigeria_Premier_Football_League"),
+            wikipedia_season(2022, "Nigeria_Professional_Football_League"),
+            wikipedia_season(2021, "Nigeria_Professional_Football_League"),
+        ],
+        current_season=wikipedia_season(2025, "Nigeria_Premier_Football_League"),
+        alias_file='team_aliases.json',
+    ),
+    'gpl': League(
+        'gpl', "Ghana Premier League",
+        seasons=[wikipedia_season(year, "Ghana_Premier_League") for year in (2021, 2022, 2023, 2024)],
+        current_season=wikipedia_season(2025, "Ghana_Premier_League"),
+        relegation_spots=3,
+    ),
+    'psl': League(
+        'psl', "South African Premiership",
+        seasons=[wikipedia_season(year, "South_African_Premiership") for year in (2021, 2022, 2023, 2024)],
+        current_season=wikipedia_season(2025, "South_African_Premiership"),
+        top_spots=3, relegation_spots=1,
+    ),
+}
+
+
+def get_league(league=None):
+    """Accepts a League, a league ID, or None (the NPFL)."""
+    if isinstance(league, League):
+        return league
+    league_id = league or DEFAULT_LEAGUE
+    try:
+        return LEAGUES[league_id]
+    except KeyError:
+        raise ValueError(f"Unknown league '{league_id}'. Known: {', '.join(sorted(LEAGUES))}") from None
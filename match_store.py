@@ -0,0 +1,147 @@
+import glob
+import os
+
+import pandas as pd
+
+import instrumentation
+import matrix_parser
+
+# CONFIGURATION
+STORE_DIR = 'npfl_match_store'           # One CSV per season lives here
+LEGACY_FILE = 'npfl_historical_data.csv' # The old single master file (used to seed the store)
+KEY_COLUMNS = ['Season', 'Home_Team', 'Away_Team']
+
+# Reading with explicit types skips pandas' type sniffing and keeps goals small
+DTYPES = {
+    'Season': str,
+    'Home_Team': str,
+    'Away_Team': str,
+    'Home_Goals': matrix_parser.GOAL_DTYPE,
+    'Away_Goals': matrix_parser.GOAL_DTYPE,
+    'Outcome': str,
+}
+
+
+def partition_path(season, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{season}.csv")
+
+
+def list_seasons(store_dir=STORE_DIR):
+    """Seasons in the store, oldest first ('2021-22' sorts before '2022-23')."""
+    files = glob.glob(os.path.join(store_dir, '*.csv'))
+    return sorted(os.path.splitext(os.path.basename(f))[0] for f in files)
+
+
+def read_partition(season, store_dir=STORE_DIR):
+    try:
+        return pd.read_csv(partition_path(season, store_dir), dtype=DTYPES)
+    except FileNotFoundError:
+        return matrix_parser.empty_matches()
+
+
+def write_partition(df, season, store_dir=STORE_DIR):
+    """
+    Writes one season atomically: temp file first, then a rename.
+    A crash mid-write leaves the old partition untouched.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    path = partition_path(season, store_dir)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    df[matrix_parser.MATCH_COLUMNS].to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _seeded_seasons(store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    # If the store is empty it is seeded once from the old master CSV
+    available = list_seasons(store_dir)
+    if not available and os.path.exists(legacy_file):
+        migrate_legacy_csv(legacy_file, store_dir)
+        available = list_seasons(store_dir)
+    return available
+
+
+def partition_files(store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """Paths of every season partition (e.g. for fingerprinting the data a model was trained on)."""
+    return [partition_path(season, store_dir) for season in _seeded_seasons(store_dir, legacy_file)]
+
+
+def load_matches(seasons=None, store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """
+    Loads matches from the store, only reading the seasons asked for (default: all).
+    If the store is empty it is seeded once from the old master CSV.
+    """
+    available = _seeded_seasons(store_dir, legacy_file)
+
+    if seasons is not None:
+        wanted = set(seasons)
+        available = [s for s in available if s in wanted]
+
+    if not available:
+        raise FileNotFoundError(f"No match data found in {store_dir}/")
+
+    frames = [read_partition(season, store_dir) for season in available]
+    return pd.concat(frames, ignore_index=True)
+
+
+def time_column(df):
+    """'Matchday' or 'Date' if the matches carry their real order, else None (results matrices don't)."""
+    return next((col for col in ('Matchday', 'Date') if col in df.columns), None)
+
+
+def sort_chronologically(df):
+    """
+    Orders matches oldest first: by Season, then by Date or Matchday when we have them.
+    Results matrices carry no dates, so within a season the stored order is kept (stable sort).
+    """
+    order = ['Season'] + [col for col in ['Date', 'Matchday'] if col in df.columns]
+    return df.sort_values(order, kind='stable')
+
+
+def upsert_matches(new_matches, store_dir=STORE_DIR):
+    """
+    Adds/updates matches keyed on (Season, Home_Team, Away_Team).
+    Only the seasons present in new_matches are read and rewritten.
+    Returns {season: (matches_before, matches_after)}.
+    """
+    with instrumentation.stage('store.upsert', rows=len(new_matches)):
+        return _upsert(new_matches, store_dir)
+
+
+def merge_matches(existing, new_matches):
+    """
+    existing + new_matches as upsert_matches would store them: the newest score wins,
+    but at the match's original position (so a corrected result doesn't jump to the end).
+    """
+    combined = pd.concat([existing, new_matches[matrix_parser.MATCH_COLUMNS]], ignore_index=True)
+    position = combined.groupby(KEY_COLUMNS, sort=False).ngroup()
+    return (combined.assign(_Position=position)
+            .drop_duplicates(subset=KEY_COLUMNS, keep='last')
+            .sort_values('_Position', kind='stable')
+            .drop(columns='_Position')
+            .reset_index(drop=True))
+
+
+def _upsert(new_matches, store_dir):
+    summary = {}
+    for season, season_df in new_matches.groupby('Season', sort=True):
+        existing = read_partition(season, store_dir)
+        combined = merge_matches(existing, season_df)
+        write_partition(combined, season, store_dir)
+        summary[season] = (len(existing), len(combined))
+    return summary
+
+
+def migrate_legacy_csv(legacy_file=LEGACY_FILE, store_dir=STORE_DIR):
+    """Splits the old single master CSV into one partition per season."""
+    print(f"📦 Seeding {store_dir}/ from {legacy_file}...")
+    df = pd.read_csv(legacy_file, dtype=DTYPES)
+    summary = upsert_matches(df, store_dir)
+    print(f"   Wrote {len(summary)} season partitions ({len(df)} matches).")
+    return summary
+
+
+def export_csv(filename=LEGACY_FILE, store_dir=STORE_DIR):
+    """Writes a single-file snapshot of the whole store (for sharing / spreadsheets)."""
+    df = load_matches(store_dir=store_dir)
+    df.to_csv(filename, index=False)
+    return len(df)
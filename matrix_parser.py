@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+# Column order and types of every match table we write
+MATCH_COLUMNS = ['Season', 'Home_Team', 'Away_Team', 'Home_Goals', 'Away_Goals', 'Outcome']
+GOAL_DTYPE = 'int16'
+
+# "2–1", "2-1", " 2 – 1 " (after citations are removed)
+SCORE_PATTERN = r'^\s*(\d+)\s*[–-]\s*(\d+)\s*$'
+CITATION_PATTERN = r'\[.*?\]|\(.*?\)'   # [a] footnotes and (citation) notes
+
+
+def empty_matches():
+    return pd.DataFrame({
+        'Season': pd.Series(dtype=str),
+        'Home_Team': pd.Series(dtype=str),
+        'Away_Team': pd.Series(dtype=str),
+        'Home_Goals': pd.Series(dtype=GOAL_DTYPE),
+        'Away_Goals': pd.Series(dtype=GOAL_DTYPE),
+        'Outcome': pd.Series(dtype=str),
+    })
+
+
+def melt_results_matrix(table, season_label):
+    """
+    Turns a Wikipedia results matrix (Home teams down, Away teams across) into one row per match.
+    The whole matrix is processed at once instead of cell by cell.
+
+    Like the old loop, the Away Team for column j is the Home Team at row j
+    (column headers are abbreviations), and the diagonal is skipped.
+    """
+    # First column holds the Home Team names
+    results_matrix = table.set_index(table.columns[0])
+    teams = results_matrix.index.astype(str).to_numpy()
+
+    # Safety clamp: only use the square part of the matrix
+    n_teams = min(len(teams), len(results_matrix.columns))
+    if n_teams == 0:
+        return empty_matches()
+    cells = results_matrix.iloc[:n_teams, :n_teams].to_numpy(dtype=object)
+
+    # 1. STACK: flatten the matrix, dropping the diagonal
+    rows, cols = np.divmod(np.arange(n_teams * n_teams), n_teams)
+    off_diagonal = rows != cols
+    rows, cols = rows[off_diagonal], cols[off_diagonal]
+    scores = pd.Series(cells.ravel()[off_diagonal])
+
+    # 2. CLEAN & PARSE: strip citations, then pull out "H–A"
+    scores = scores.fillna('').astype(str)
+    scores = scores.str.replace(CITATION_PATTERN, '', regex=True)
+    goals = scores.str.extract(SCORE_PATTERN).to_numpy(dtype=object)
+    played = pd.notna(goals[:, 0])
+
+    home_goals = goals[played, 0].astype(GOAL_DTYPE)
+    away_goals = goals[played, 1].astype(GOAL_DTYPE)
+
+    # 3. OUTCOME as a column
+    outcome = np.select(
+        [home_goals > away_goals, home_goals < away_goals],
+        ['Home Win', 'Away Win'],
+        default='Draw',
+    )
+
+    return pd.DataFrame({
+        'Season': season_label,
+        'Home_Team': teams[rows[played]],
+        'Away_Team': teams[cols[played]],
+        'Home_Goals': home_goals,
+        'Away_Goals': away_goals,
+        'Outcome': outcome,
+    })
@@ -0,0 +1,109 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+
+# CONFIGURATION
+REGISTRY_DIR = 'model_artifacts'
+MAX_ARTIFACTS = 3   # Old versions kept per model name (older ones are deleted)
+BEST_PARAMS_FILE = 'best_params.json'   # Winning hyperparameters from hyperparam_search.py
+
+
+def fingerprint(data_paths, feature_cols, params):
+    """
+    Hash of everything that decides what the trained model looks like:
+    the bytes of the training file(s), the feature list and the hyperparameters.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(data_paths):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    digest.update(json.dumps(list(feature_cols)).encode('utf-8'))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(key, registry_dir=REGISTRY_DIR, suffix='.pkl'):
+    return os.path.join(registry_dir, f"{key}{suffix}")
+
+
+def load_artifact(key, registry_dir=REGISTRY_DIR):
+    """Returns the saved payload, or None if missing/unreadable (e.g. saved by another sklearn version)."""
+    path = artifact_path(key, registry_dir)
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable model artifact {path}: {e}")
+        return None
+
+    os.utime(path)  # Mark as recently used so pruning keeps it
+    return payload
+
+
+def save_artifact(key, payload, registry_dir=REGISTRY_DIR):
+    os.makedirs(registry_dir, exist_ok=True)
+    path = artifact_path(key, registry_dir)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def prune(name, keep=MAX_ARTIFACTS, registry_dir=REGISTRY_DIR):
+    """Deletes all but the `keep` most recently used artifacts of one model (and their side files)."""
+    artifacts = glob.glob(os.path.join(registry_dir, f"{name}-*.pkl"))
+    artifacts.sort(key=os.path.getmtime, reverse=True)
+    for path in artifacts[keep:]:
+        key = os.path.splitext(os.path.basename(path))[0]
+        for related in glob.glob(os.path.join(registry_dir, f"{key}.*")):
+            os.remove(related)
+
+
+def load_best_params(name, path=BEST_PARAMS_FILE):
+    """Tuned hyperparameters for one model ({} if it was never tuned)."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get(name, {}).get('params', {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_best_params(name, params, metrics=None, path=BEST_PARAMS_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            best = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        best = {}
+    best[name] = {'params': params, 'metrics': metrics or {}}
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(best, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_or_train(name, data_paths, feature_cols, params, train_fn, registry_dir=REGISTRY_DIR):
+    """
+    Returns (key, payload). Loads the artifact matching the current data/features/params,
+    or calls train_fn() on a cache miss and saves what it returns.
+    """
+    key = f"{name}-{fingerprint(data_paths, feature_cols, params)}"
+
+    start = time.perf_counter()
+    payload = load_artifact(key, registry_dir)
+    if payload is not None:
+        print(f"⚡ Loaded saved model {key} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return key, payload
+
+    payload = train_fn()
+    save_artifact(key, payload, registry_dir)
+    prune(name, registry_dir=registry_dir)
+    print(f"💾 Saved model {key} ({time.perf_counter() - start:.1f} s to train)")
+    return key, payload
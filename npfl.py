@@ -0,0 +1,80 @@
+"""
+One entry point for the whole project:
+
+    python npfl.py predict              (interactive matchday predictor)
+    python npfl.py predict --advanced   (attack/defense stats engine)
+    python npfl.py serve | rank | elo | simulate | update | watch | features | goals | scrape | pipeline | audit | validate | accuracy | backtest | tune | baseline | build | stages
+    python npfl.py --profile features.elo features   (cProfile + tracemalloc for one stage)
+
+Only argparse is imported up front. Each subcommand imports its own module (and with it
+pandas / sklearn / matplotlib) when it runs, so `--help` and light commands start instantly.
+"""
+import argparse
+import importlib
+import os
+
+# name: (module, function, help, forwards extra command-line arguments?)
+COMMANDS = {
+    'predict': ('predict_matchday', 'main',
+                "Predict fixtures (--advanced for the stats engine; --league/--fixtures/--output/--report are passed through).", True),
+    'serve': ('prediction_server', 'main',
+              "Run the HTTP prediction service (--league/--host/--port/--window-ms are passed through).", True),
+    'rank': ('power_rankings', 'main', "Fit the ranking model and draw npfl_rankings.png (--fit-only/--chart-only/--season/--league are passed through).", True),
+    'simulate': ('season_simulator', 'main', "Monte Carlo title/top-3/relegation odds (--sims/--source/--workers are passed through).", True),
+    'elo': ('elo_ratings', 'main', "Rebuild Elo ratings and draw npfl_elo_rankings.png (--league is passed through).", True),
+    'update': ('update_season', 'update_master_file', "Scrape the current season and update the data.", False),
+    'watch': ('season_watch', 'main', "Poll the live season page and update only when results change (--interval/--once/--base-url are passed through).", True),
+    'features': ('feature_engineering', 'add_features', "Rebuild npfl_training_data.csv.", False),
+    'scrape': ('npfl_scraper', 'main', "Scrape all historical seasons from Wikipedia.", True),
+    'pipeline': ('league_pipeline', 'main', "Scrape, update and train every league in parallel (--leagues/--offline/--skip-scrape are passed through).", True),
+    'goals': ('goals_model', 'main', "Fit the Dixon-Coles goals model and show team strengths (--league is passed through).", True),
+    'audit': ('data_cleaning', 'main', "Sanity-check the match data and team names (--league is passed through).", True),
+    'validate': ('data_validation', 'main', "Integrity checks on the match data (exit 1 on errors; --league/--json are passed through).", True),
+    'accuracy': ('check_accuracy', 'main', "Check the Random Forest for overfitting.", False),
+    'backtest': ('backtest', 'main', "Walk-forward backtest (--model/--league/--blocks-per-season/--workers are passed through).", True),
+    'tune': ('hyperparam_search', 'main', "Hyperparameter search (--model/--league/--strategy/--trials/--workers are passed through).", True),
+    'baseline': ('first_model', 'main', "Train the baseline team-ID model.", False),
+    'build': ('orchestrator', 'main', "Rebuild only the stale stages, in parallel (targets/--force/--dry-run/--league are passed through).", True),
+    'stages': ('instrumentation', 'main', "Show the slowest pipeline stages across runs (--last/--stage/--top are passed through).", True),
+}
+
+
+def load_command(name, advanced=False):
+    """Imports the module behind a subcommand (this is where the heavy imports happen)."""
+    module_name, func_name, _, _ = COMMANDS[name]
+    if name == 'predict' and advanced:
+        module_name = 'advanced_predictor'
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='npfl', description="NPFL match prediction toolkit.")
+    parser.add_argument('--profile', metavar='STAGE',
+                        help="Profile one pipeline stage (e.g. features.elo) with cProfile and tracemalloc.")
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    for name, (_, _, help_text, _) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        if name == 'predict':
+            sub.add_argument('--advanced', action='store_true', help="Use the attack/defense stats engine.")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+
+    forwards_args = COMMANDS[args.command][3]
+    if extra and not forwards_args:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.profile:
+        os.environ['NPFL_PROFILE_STAGE'] = args.profile   # Read by instrumentation.stage
+    command = load_command(args.command, advanced=getattr(args, 'advanced', False))
+    return command(extra) if forwards_args else command()
+
+
+if __name__ == "__main__":
+    main()
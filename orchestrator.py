@@ -0,0 +1,349 @@
+"""
+Rebuilds only what is out of date, like `make` for a league's pipeline.
+
+    python orchestrator.py                       (everything that is stale)
+    python orchestrator.py rankings simulate     (just these, plus whatever they need)
+    python orchestrator.py --force features      (rerun a stage even if it looks current)
+    python orchestrator.py --dry-run             (show what would run)
+    python orchestrator.py --league gpl          (another league: its own files, state and logs)
+
+Each stage declares the stages it depends on, the files it reads and the files it writes
+(an output can be a glob, e.g. one model's files in the registry).
+A stage's fingerprint is a hash of:
+    - its code: the stage's module plus every project module it imports (found by scanning
+      the source, nothing is imported),
+    - its parameters,
+    - the contents of its input files,
+    - the fingerprints of the stages it depends on.
+A stage is skipped when its fingerprint matches the last successful run and its outputs
+are still there, unchanged. Stages whose dependencies are done run in parallel (one
+process each), with their output in pipeline_logs/<stage>.log (pipeline_logs/<league>/ for
+leagues other than the NPFL).
+
+File hashes are cached by (size, mtime), and nothing heavy is imported unless a stage
+actually runs, so a no-change rebuild takes a few tens of milliseconds.
+
+`scrape` is the source of the data. It only runs when the match store is missing or
+with --force scrape (use update_season.py / league_pipeline.py for routine refreshes).
+"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import leagues
+
+# CONFIGURATION
+STATE_FILE = '.pipeline_state.json'
+LOG_DIR = 'pipeline_logs'
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+NPFL_ONLY = ('accuracy', 'baseline')   # Reports that only know the NPFL's files
+
+
+def league_stages(league=None):
+    """
+    name: module/function to call, stages it needs, files it reads and writes, and its
+    arguments ('args' = a CLI argv, 'kwargs' = keyword arguments), all for one league.
+    """
+    league = leagues.get_league(league)
+    store, registry = league.store_dir, league.registry_dir
+    argv, kwargs = ['--league', league.id], {'league': league.id}
+    stages = {
+        'scrape': {'call': ('npfl_scraper', 'main'), 'args': argv, 'deps': [],
+                   'inputs': [league.alias_file], 'outputs': [store], 'source': True},
+        'audit': {'call': ('data_cleaning', 'text_audit'), 'kwargs': kwargs, 'deps': ['scrape'],
+                  'inputs': [store, league.alias_file], 'outputs': []},
+        'validate': {'call': ('data_validation', 'check_store'), 'kwargs': kwargs, 'deps': ['scrape'],
+                     'inputs': [store, league.alias_file], 'outputs': []},
+        'features': {'call': ('feature_engineering', 'add_features'), 'kwargs': kwargs, 'deps': ['validate'],
+                     'inputs': [store],
+                     'outputs': [league.training_file, league.state_file, league.elo_file]},
+        'elo': {'call': ('elo_ratings', 'main'), 'args': argv, 'deps': ['features'],
+                'inputs': [store], 'outputs': [f"{league.id}_elo_rankings.png"]},
+        'rankings': {'call': ('power_rankings', 'fit_rankings'), 'kwargs': kwargs, 'deps': ['validate'],
+                     'inputs': [store], 'outputs': [league.rankings_file]},
+        'rankings_chart': {'call': ('power_rankings', 'plot_rankings'), 'kwargs': kwargs, 'deps': ['rankings'],
+                           'inputs': [league.rankings_file], 'outputs': [f"{league.id}_rankings.png"]},
+        'backtest': {'call': ('backtest', 'main'), 'args': argv + ['--output', f"{league.id}_backtest.json"],
+                     'deps': ['validate'], 'inputs': [store], 'outputs': [f"{league.id}_backtest.json"]},
+        'accuracy': {'call': ('check_accuracy', 'main'), 'deps': ['validate'],
+                     'inputs': [store], 'outputs': []},
+        'baseline': {'call': ('first_model', 'main'), 'deps': ['validate'],
+                     'inputs': [store], 'outputs': []},
+        'advanced_model': {'call': ('advanced_predictor', 'load_and_train'), 'kwargs': kwargs, 'deps': ['features'],
+                           'inputs': [league.training_file, league.best_params_file],
+                           'outputs': [os.path.join(registry, 'advanced_rf-*.pkl')]},
+        'matchday_model': {'call': ('predict_matchday', 'load_and_train'), 'kwargs': kwargs, 'deps': ['validate'],
+                           'inputs': [store, league.best_params_file],
+                           'outputs': [os.path.join(registry, 'matchday_logreg-*.pkl')]},
+        'goals': {'call': ('goals_model', 'load_or_fit'), 'kwargs': kwargs, 'deps': ['validate'],
+                  'inputs': [store], 'outputs': [os.path.join(registry, 'goals_dixon_coles-*.pkl')]},
+        'simulate': {'call': ('season_simulator', 'main'), 'args': argv, 'deps': ['goals'],
+                     'inputs': [store], 'outputs': [f"{league.id}_season_odds.csv"]},
+    }
+    if league.id != leagues.DEFAULT_LEAGUE:
+        for name in NPFL_ONLY:
+            del stages[name]
+    return stages
+
+
+def state_file(league=None):
+    league_id = leagues.get_league(league).id
+    return STATE_FILE if league_id == leagues.DEFAULT_LEAGUE else f".pipeline_state.{league_id}.json"
+
+
+def log_dir(league=None):
+    league_id = leagues.get_league(league).id
+    return LOG_DIR if league_id == leagues.DEFAULT_LEAGUE else os.path.join(LOG_DIR, league_id)
+
+
+STAGES = league_stages(leagues.DEFAULT_LEAGUE)
+
+IMPORT_RE = re.compile(r'^\s*(?:import|from)\s+([A-Za-z_]\w*)', re.MULTILINE)
+
+
+# --- FINGERPRINTS ---
+
+class FileHasher:
+    """sha256 of files, remembered by (size, mtime) so unchanged files are never re-read."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+        self.used = set()
+
+    def file_hash(self, path):
+        self.used.add(path)
+        st = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.cache[path] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def live(self):
+        """The cache without files this run never looked at (deleted partitions, old outputs)."""
+        return {path: entry for path, entry in self.cache.items() if path in self.used}
+
+    def path_hashes(self, path):
+        """{file: hash} for a file, or every file under a directory (hidden and temp files skipped)."""
+        if os.path.isfile(path):
+            return {path: self.file_hash(path)}
+        hashes = {}
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for name in sorted(files):
+                if not name.startswith('.') and '.tmp' not in name:
+                    full = os.path.join(root, name)
+                    hashes[full] = self.file_hash(full)
+        return hashes
+
+
+def code_files(module, code_dir=CODE_DIR, seen=None):
+    """The module's file plus every project module it imports (transitively)."""
+    seen = set() if seen is None else seen
+    path = os.path.join(code_dir, f"{module}.py")
+    if module in seen or not os.path.exists(path):
+        return seen
+    seen.add(module)
+    with open(path, encoding='utf-8') as f:
+        for imported in IMPORT_RE.findall(f.read()):
+            code_files(imported, code_dir, seen)
+    return seen
+
+
+def fingerprint(name, spec, hasher, dep_fingerprints):
+    digest = hashlib.sha256(name.encode('utf-8'))
+    for module in sorted(code_files(spec['call'][0])):
+        digest.update(f"code:{module}:{hasher.file_hash(os.path.join(CODE_DIR, module + '.py'))}".encode('utf-8'))
+    digest.update(json.dumps({'call': spec['call'], 'args': spec.get('args'), 'kwargs': spec.get('kwargs')},
+                             sort_keys=True).encode('utf-8'))
+    for path in spec['inputs']:
+        hashes = hasher.path_hashes(path) if os.path.exists(path) else {path: 'missing'}
+        digest.update(json.dumps(hashes, sort_keys=True).encode('utf-8'))
+    for dep in spec['deps']:
+        digest.update(f"dep:{dep}:{dep_fingerprints.get(dep)}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def output_hashes(spec, hasher):
+    """{file: hash} of every output, or None if one is missing (a glob that matches nothing counts as missing)."""
+    hashes = {}
+    for pattern in spec['outputs']:
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not paths or not all(os.path.exists(path) for path in paths):
+            return None
+        for path in paths:
+            hashes.update(hasher.path_hashes(path))
+    return hashes
+
+
+# --- STATE ---
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'stages': {}, 'files': {}}
+
+
+def save_state(state, path=STATE_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# --- RUNNING ---
+
+def run_stage(name, spec, logs=LOG_DIR):
+    """Runs in a worker process. Imports the stage's module only now, logs its output to a file."""
+    import importlib
+    import instrumentation
+
+    os.makedirs(logs, exist_ok=True)
+    log_path = os.path.join(logs, f"{name}.log")
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log), \
+            contextlib.redirect_stderr(log), instrumentation.stage(f"build.{name}"):
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+        module_name, func_name = spec['call']
+        func = getattr(importlib.import_module(module_name), func_name)
+        func(spec['args']) if 'args' in spec else func(**spec.get('kwargs', {}))
+    return time.perf_counter() - start
+
+
+def wanted_stages(targets, stages=None):
+    """The targets plus everything they depend on, in declaration order."""
+    stages = STAGES if stages is None else stages
+    wanted = set()
+
+    def visit(name):
+        if name not in stages:
+            raise ValueError(f"Unknown stage '{name}'. Known: {', '.join(stages)}")
+        if name not in wanted:
+            wanted.add(name)
+            for dep in stages[name]['deps']:
+                visit(dep)
+
+    for target in targets or stages:
+        visit(target)
+    return [name for name in stages if name in wanted]
+
+
+def is_current(name, spec, fp, state, hasher, force):
+    if name in force:
+        return False
+    previous = state['stages'].get(name)
+    if spec.get('source'):
+        return output_hashes(spec, hasher) is not None   # Only (re)built on request
+    return bool(previous and previous['fingerprint'] == fp and output_hashes(spec, hasher) == previous['outputs'])
+
+
+def build(targets=None, force=(), workers=None, dry_run=False, league=None):
+    """Runs every stale stage (and skips the rest). Returns {stage: 'skipped' | 'ran' | 'failed' | 'blocked'}."""
+    start = time.perf_counter()
+    stages = league_stages(league)
+    order = wanted_stages(targets, stages)
+    force = set(force)
+    path, logs = state_file(league), log_dir(league)
+    state = load_state(path)
+    hasher = FileHasher(state.get('files'))
+
+    fingerprints, status = {}, {}
+    pending = list(order)
+    running = {}
+    workers = workers or os.cpu_count() or 1
+
+    pool = None if dry_run else ProcessPoolExecutor(workers)
+    try:
+        while pending or running:
+            # Schedule every stage whose dependencies are finished
+            progressed = False
+            for name in list(pending):
+                spec = stages[name]
+                deps = [status.get(d) for d in spec['deps'] if d in order]
+                if any(d is None or d == 'running' for d in deps):
+                    continue
+                pending.remove(name)
+                progressed = True
+                if any(d in ('failed', 'blocked') for d in deps):
+                    status[name] = 'blocked'
+                    print(f"⛔ {name:<15} blocked (a dependency failed)")
+                    continue
+
+                fingerprints[name] = fingerprint(name, spec, hasher, fingerprints)
+                if is_current(name, spec, fingerprints[name], state, hasher, force):
+                    status[name] = 'skipped'
+                    print(f"⏭️ {name:<15} up to date")
+                elif dry_run:
+                    status[name] = 'ran'
+                    print(f"🔜 {name:<15} would run")
+                else:
+                    status[name] = 'running'
+                    running[pool.submit(run_stage, name, spec, logs)] = name
+                    print(f"▶️ {name:<15} running...")
+
+            if not running:
+                if not progressed:
+                    break   # Nothing running and nothing schedulable (can't happen with a valid DAG)
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                spec = stages[name]
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    status[name] = 'failed'
+                    state['stages'].pop(name, None)
+                    print(f"❌ {name:<15} failed: {e} (see {os.path.join(logs, name + '.log')})")
+                    continue
+                status[name] = 'ran'
+                # Re-hash after the run: a stage may touch its own inputs (e.g. seeding the store)
+                fingerprints[name] = fingerprint(name, spec, hasher, fingerprints)
+                state['stages'][name] = {'fingerprint': fingerprints[name], 'outputs': output_hashes(spec, hasher),
+                                         'seconds': round(seconds, 2),
+                                         'finished': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                print(f"✅ {name:<15} done in {seconds:.1f} s")
+                save_state({**state, 'files': hasher.live()}, path)   # Progress survives a crash mid-build
+    finally:
+        if pool:
+            pool.shutdown()
+
+    if not dry_run:
+        save_state({**state, 'files': hasher.live()}, path)
+    counts = {outcome: sum(s == outcome for s in status.values()) for outcome in ('ran', 'skipped', 'failed', 'blocked')}
+    print(f"\n🏁 {counts['ran']} ran, {counts['skipped']} up to date, {counts['failed']} failed, "
+          f"{counts['blocked']} blocked in {time.perf_counter() - start:.2f} s")
+    return status
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild only the stale parts of the pipeline.")
+    parser.add_argument('targets', nargs='*', help=f"Stages to bring up to date (default: all of {', '.join(STAGES)}).")
+    parser.add_argument('--force', default='', help="Comma-separated stages to rerun even if current.")
+    parser.add_argument('--workers', type=int, help="Stages run at once (default: all cores).")
+    parser.add_argument('--dry-run', action='store_true', help="Only show what would run.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    force = [s for s in args.force.split(',') if s]
+    return build(args.targets, force, args.workers, args.dry_run, args.league)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# CONFIGURATION
+CACHE_DIR = '.page_cache'
+CACHE_TTL_SECONDS = 7 * 24 * 3600   # Finished seasons don't change, a week is plenty
+MAX_WORKERS = 4                     # Be polite to Wikipedia
+REQUEST_TIMEOUT = 30
+
+# Wikipedia returns 403 Forbidden without a browser-like User-Agent
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def make_session(max_workers=MAX_WORKERS, retries=3):
+    """
+    Builds one keep-alive session shared by every worker.
+    The connection pool is sized to the worker count so threads never queue for a socket.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET'],
+    )
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class PageCache:
+    """
+    Content-addressed disk cache for fetched HTML.
+    - blobs/<sha256 of body>.html holds the page (identical pages are stored once)
+    - index/<sha256 of url>.json points a URL at its blob, with the fetch time and HTTP validators
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.index_dir = os.path.join(cache_dir, 'index')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    def _index_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.index_dir, f"{key}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, f"{digest}.html")
+
+    def entry(self, url):
+        """Returns the index entry for a URL (or None if we never fetched it)."""
+        try:
+            with open(self._index_path(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, entry):
+        return entry is not None and (time.time() - entry['fetched_at']) < self.ttl
+
+    def read(self, url, allow_stale=False):
+        """Returns cached HTML for a URL, or None if missing (or expired, unless allow_stale)."""
+        entry = self.entry(url)
+        if entry is None or not (allow_stale or self.is_fresh(entry)):
+            return None
+        try:
+            with open(self._blob_path(entry['sha256']), encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, url, html, etag=None, last_modified=None):
+        digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            _atomic_write(blob_path, html)
+
+        entry = {
+            'url': url,
+            'sha256': digest,
+            'fetched_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+        _atomic_write(self._index_path(url), json.dumps(entry))
+        return entry
+
+    def forget(self, url):
+        """Drops a URL's index entry, so the next fetch is a full (unconditional) one."""
+        try:
+            os.remove(self._index_path(url))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, url):
+        """Marks a cached page as freshly validated (e.g. after a 304 Not Modified)."""
+        entry = self.entry(url)
+        if entry is not None:
+            entry['fetched_at'] = time.time()
+            _atomic_write(self._index_path(url), json.dumps(entry))
+        return entry
+
+
+def _atomic_write(path, text):
+    # Write to a temp file first so a crash never leaves half a page in the cache
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def fetch_page(url, session=None, cache=None, offline=False):
+    """
+    Returns the HTML for one URL.
+    Fresh cache hits never touch the network. In offline mode, stale pages are fine too.
+    """
+    if cache is not None:
+        html = cache.read(url, allow_stale=offline)
+        if html is not None:
+            return html
+    if offline:
+        raise FileNotFoundError(f"{url} is not in the page cache (offline mode)")
+
+    session = session or make_session()
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+
+    if cache is not None:
+        cache.write(url, response.text,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'))
+    return response.text
+
+
+def fetch_if_modified(url, session=None, cache=None, conditional=True):
+    """
+    Conditional GET with the ETag / Last-Modified saved in the cache.
+    Returns (html, True) if the page changed (and caches it), or (None, False) on 304 Not Modified.
+    """
+    entry = cache.entry(url) if cache is not None and conditional else None
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+
+    session = session or make_session()
+    response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304:
+        if cache is not None:
+            cache.touch(url)
+        return None, False
+    response.raise_for_status()
+
+    if cache is not None:
+        cache.write(url, response.text,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'))
+    return response.text, True
+
+
+def fetch_pages(urls, max_workers=MAX_WORKERS, cache=None, offline=False, session=None):
+    """
+    Fetches many URLs at once through a bounded thread pool sharing one session.
+    Returns {url: html or Exception} so one bad page doesn't sink the whole backfill.
+    """
+    session = session or make_session(max_workers)
+
+    def _fetch(url):
+        try:
+            return fetch_page(url, session=session, cache=cache, offline=offline)
+        except Exception as e:
+            return e
+
+    unique_urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pages = list(pool.map(_fetch, unique_urls))
+    return dict(zip(unique_urls, pages))
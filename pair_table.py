@@ -0,0 +1,107 @@
+import os
+import time
+
+import numpy as np
+
+import model_registry
+
+
+class PairTable:
+    """
+    Every possible Home vs Away fixture, scored once right after training.
+    - probs[h, a]     = probability of each outcome (same order as classes)
+    - exp_goals[h, a] = [expected home goals, expected away goals] (optional)
+    The diagonal (a team playing itself) and teams without stats are NaN.
+    """
+
+    def __init__(self, teams, classes, probs, exp_goals=None, model_key=None):
+        self.teams = list(teams)
+        self.classes = list(classes)
+        self.probs = probs
+        self.exp_goals = exp_goals
+        self.model_key = model_key
+        self.index = {team: i for i, team in enumerate(self.teams)}
+
+    def lookup(self, home, away):
+        """Returns ({outcome: probability}, (home xG, away xG) or None) for one fixture."""
+        h, a = self.index[home], self.index[away]
+        probs = self.probs[h, a]
+        if np.isnan(probs).any():
+            raise KeyError(f"No prediction for {home} vs {away}")
+        exp = None if self.exp_goals is None else tuple(self.exp_goals[h, a])
+        return dict(zip(self.classes, probs)), exp
+
+    def lookup_many(self, homes, aways):
+        """Vectorized lookup: arrays of team names in, (F x classes) probabilities out."""
+        h = np.array([self.index[t] for t in homes], dtype=np.intp)
+        a = np.array([self.index[t] for t in aways], dtype=np.intp)
+        exp = None if self.exp_goals is None else self.exp_goals[h, a]
+        return self.probs[h, a], exp
+
+    def save(self, path):
+        arrays = {
+            'teams': np.array(self.teams),
+            'classes': np.array(self.classes),
+            'probs': self.probs,
+            'model_key': np.array(self.model_key or ''),
+        }
+        if self.exp_goals is not None:
+            arrays['exp_goals'] = self.exp_goals
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            exp_goals = data['exp_goals'] if 'exp_goals' in data.files else None
+            return cls(data['teams'].tolist(), data['classes'].tolist(), data['probs'],
+                       exp_goals, str(data['model_key']))
+
+
+def build_pair_table(model, teams, make_features, exp_goals_fn=None, model_key=None):
+    """
+    Scores all N x N pairings with one predict_proba call.
+    make_features(homes, aways) must return the model's feature matrix (NaN rows = no stats).
+    exp_goals_fn(features) may return an (rows x 2) array of expected goals.
+    """
+    n = len(teams)
+    teams_arr = np.array(teams, dtype=object)
+    h_idx, a_idx = np.divmod(np.arange(n * n), n)
+    features = make_features(teams_arr[h_idx], teams_arr[a_idx])
+
+    # Only score real fixtures where both teams have stats
+    valid = (h_idx != a_idx) & ~np.isnan(np.asarray(features, dtype=float)).any(axis=1)
+    n_classes = len(model.classes_)
+
+    probs = np.full((n * n, n_classes), np.nan)
+    if valid.any():
+        probs[valid] = model.predict_proba(features[valid])
+
+    exp_goals = None
+    if exp_goals_fn is not None:
+        exp_goals = np.full((n * n, 2), np.nan)
+        exp_goals[valid] = exp_goals_fn(features[valid])
+        exp_goals = exp_goals.reshape(n, n, 2)
+
+    return PairTable(teams, list(model.classes_), probs.reshape(n, n, n_classes), exp_goals, model_key)
+
+
+def load_or_build(model_key, model, teams, make_features, exp_goals_fn=None,
+                  registry_dir=model_registry.REGISTRY_DIR):
+    """
+    The table is saved next to the model artifact under the same key.
+    A new model (retrained, or new ratings in the training file) has a new key,
+    so a stale table is never picked up.
+    """
+    path = model_registry.artifact_path(model_key, registry_dir, suffix='.pairs.npz')
+    if os.path.exists(path):
+        table = PairTable.load(path)
+        if table.model_key == model_key and table.teams == list(teams):
+            return table
+
+    start = time.perf_counter()
+    table = build_pair_table(model, teams, make_features, exp_goals_fn, model_key)
+    table.save(path)
+    print(f"📐 Precomputed {len(teams)}x{len(teams)} fixture table ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    return table
@@ -1,56 +1,219 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.linear_model import LogisticRegression
-
-# 1. RELOAD & PREP DATA
-print("📊 Loading data...")
-df = pd.read_csv('npfl_historical_data.csv')
-df['Home_Team_Code'] = df['Home_Team'].astype('category').cat.codes
-df['Away_Team_Code'] = df['Away_Team'].astype('category').cat.codes
-
-# 2. TRAIN A BETTER MODEL (ONE-HOT ENCODING)
-# To get a "Power Ranking," we need to give every team its own column
-print("🧠 Training the Ranking Model...")
-model_data = pd.get_dummies(df[['Home_Team', 'Away_Team']], prefix=['Home', 'Away'])
-X = model_data
-y = df['Outcome']
-
-model = LogisticRegression(max_iter=1000)
-model.fit(X, y)
-
-# 3. EXTRACT "STRENGTH" SCORES
-# We look at who predicts a "Home Win" most strongly.
-home_win_index = list(model.classes_).index('Home Win')
-home_coeffs = model.coef_[home_win_index]
-
-feature_names = X.columns
-team_scores = []
-
-for i, name in enumerate(feature_names):
-    if "Home_" in name:
-        clean_name = name.replace("Home_", "")
-        score = home_coeffs[i]
-        team_scores.append({'Team': clean_name, 'Score': score})
-
-# 4. CREATE THE RANKING
-ranking_df = pd.DataFrame(team_scores).sort_values(by='Score', ascending=False)
-
-# 5. VISUALIZE AND SAVE
-print("🎨 Generating Graph...")
-plt.figure(figsize=(12, 10))
-sns.barplot(data=ranking_df.head(15), x='Score', y='Team', palette='viridis')
-plt.title('Top 15 Strongest Home Teams (NPFL Historical Data)', fontsize=15)
-plt.xlabel('Strength Score (Coefficient)')
-plt.axvline(0, color='k', linestyle='--') # Add a center line
-
-# SAVE INSTEAD OF SHOW (Prevents Crashes)
-filename = 'npfl_rankings.png'
-plt.savefig(filename)
-print(f"✅ Graph saved as '{filename}' in your folder.")
-
-print("\n🏆 TOP 5 STRONGEST TEAMS (HOME):")
-print(ranking_df.head(5)[['Team', 'Score']])
-
-print("\n📉 BOTTOM 5 WEAKEST TEAMS (HOME):")
-print(ranking_df.tail(5)[['Team', 'Score']])
\ No newline at end of file
+"""
+Power rankings: a multinomial logistic regression on team IDs, one coefficient per team.
+
+    python power_rankings.py                 (fit, save npfl_rankings.npz, draw npfl_rankings.png)
+    python power_rankings.py --fit-only      (coefficients only, no plotting libraries)
+    python power_rankings.py --chart-only    (redraw from the saved coefficients, no sklearn)
+    python power_rankings.py --chart-only --season 2023-24
+
+The design is a sparse matrix with two non-zeros per match (home ID, away ID) over the global
+team dictionary, fitted with saga. Every season is fitted on its own, warm-started from the
+season before, then all seasons together. Seasons whose matches haven't changed keep their
+saved coefficients, so a new matchday only refits the live season and the overall table.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import compact_matches
+import instrumentation
+import leagues
+
+# CONFIGURATION
+OVERALL = 'All'   # Label of the all-seasons fit in the saved series
+MODEL_PARAMS = {'solver': 'saga', 'C': 1.0, 'tol': 1e-4, 'max_iter': 1000}
+
+
+def chart_file(league=None):
+    return f"{leagues.get_league(league).id}_rankings.png"
+
+
+def design_matrix(home_ids, away_ids, n_teams):
+    """CSR one-hot design: home team in columns [0, n_teams), away team in [n_teams, 2 * n_teams)."""
+    from scipy import sparse
+
+    rows = len(home_ids)
+    indices = np.empty(2 * rows, dtype=np.int32)
+    indices[0::2] = home_ids
+    indices[1::2] = n_teams + np.asarray(away_ids, dtype=np.int32)
+    indptr = np.arange(0, 2 * rows + 1, 2, dtype=np.int32)
+    return sparse.csr_matrix((np.ones(2 * rows), indices, indptr), shape=(rows, 2 * n_teams))
+
+
+def fit_key(home_ids, away_ids, outcomes):
+    """Hash of one fit's matches and settings: equal keys give equal coefficients."""
+    digest = hashlib.sha256(json.dumps(MODEL_PARAMS, sort_keys=True).encode())
+    for arr in (home_ids, away_ids, outcomes):
+        digest.update(np.ascontiguousarray(arr, dtype=np.int16).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def load_series(path):
+    """Saved coefficients as a dict of arrays, or None if there is no (readable) file."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+
+
+def save_series(series, path):
+    tmp_path = f"{path}.tmp{os.getpid()}.npz"
+    np.savez_compressed(tmp_path, **series)
+    os.replace(tmp_path, path)
+
+
+def _saved_fits(path, n_teams):
+    """key -> (home coefs, away coefs, intercept) from the last run, padded to today's team count."""
+    saved = load_series(path)
+    if saved is None:
+        return {}
+    pad = ((0, 0), (0, n_teams - saved['home_coef'].shape[-1]))   # Team IDs only ever grow
+    return {key: (np.pad(home, pad), np.pad(away, pad), intercept)
+            for key, home, away, intercept in zip(saved['keys'].tolist(), saved['home_coef'],
+                                                  saved['away_coef'], saved['intercept'])}
+
+
+def fit_rankings(league=None, path=None):
+    """
+    Fits every season (oldest first, each warm-started from the last) and then all seasons.
+    Saves the coefficient series to <league>_rankings.npz and returns the overall ranking.
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    league = leagues.get_league(league)
+    path = path or league.rankings_file
+
+    # 1. RELOAD & PREP DATA
+    # Team IDs come straight from the compact frame's team dictionary: no dummy columns
+    print("📊 Loading data...")
+    df = compact_matches.load_compact(league=league)
+    teams = df['Home_Team'].cat.categories.tolist()
+    n_teams = len(teams)
+    home, away = compact_matches.team_codes(df)
+    outcome = df['Outcome'].cat.codes.to_numpy()   # Outcome enum values
+    season_codes = df['Season'].cat.codes.to_numpy()
+    seasons = df['Season'].cat.categories.tolist()
+    X = design_matrix(home, away, n_teams)
+
+    # 2. TRAIN ONE MODEL PER SEASON, THEN ALL SEASONS (WARM-STARTED)
+    print("🧠 Training the Ranking Model...")
+    saved = _saved_fits(path, n_teams)
+    model = LogisticRegression(warm_start=True, **MODEL_PARAMS)
+    fits = [(season, season_codes == i) for i, season in enumerate(seasons)]
+    fits.append((OVERALL, np.ones(len(df), dtype=bool)))
+
+    series = {'keys': [], 'home_coef': [], 'away_coef': [], 'intercept': [], 'played': []}
+    refitted = 0
+    for season, mask in fits:
+        key = fit_key(home[mask], away[mask], outcome[mask])
+        if key in saved:
+            home_coef, away_coef, intercept = saved[key]
+            model.coef_ = np.hstack([home_coef, away_coef])   # Next fit starts from here
+            model.intercept_ = intercept
+        else:
+            with instrumentation.stage('rank.fit', rows=int(mask.sum()), season=season):
+                model.fit(X[mask], outcome[mask])
+            refitted += 1
+        series['keys'].append(key)
+        series['home_coef'].append(model.coef_[:, :n_teams])
+        series['away_coef'].append(model.coef_[:, n_teams:])
+        series['intercept'].append(model.intercept_)
+        series['played'].append(np.bincount(home[mask], minlength=n_teams) > 0)
+
+    # 3. SAVE THE COEFFICIENTS (the chart step reads these)
+    save_series({'teams': np.array(teams), 'seasons': np.array(seasons + [OVERALL]),
+                 **{name: np.array(values) for name, values in series.items()}}, path)
+    print(f"💾 Coefficients for {len(fits)} fits saved to '{path}' ({refitted} refitted, "
+          f"{len(fits) - refitted} unchanged).")
+    return ranking_table(path)
+
+
+def ranking_table(path=None, season=OVERALL):
+    """
+    Teams by strength for one season (or OVERALL), strongest first.
+    Score = the team's home-side coefficient for a Home Win.
+    """
+    path = path or leagues.get_league().rankings_file
+    series = load_series(path)
+    if series is None:
+        raise FileNotFoundError(f"No saved coefficients in {path}. Run power_rankings.py first.")
+    labels = series['seasons'].tolist()
+    if season not in labels:
+        raise ValueError(f"No rankings for season '{season}'. Saved: {', '.join(labels)}")
+
+    # 4. EXTRACT "STRENGTH" SCORES
+    # We look at who predicts a "Home Win" most strongly.
+    i = labels.index(season)
+    played = series['played'][i]
+    ranking_df = pd.DataFrame({
+        'Team': series['teams'][played],
+        'Score': series['home_coef'][i][compact_matches.Outcome.HOME_WIN][played],
+    })
+
+    # 5. CREATE THE RANKING
+    return ranking_df.sort_values(by='Score', ascending=False).reset_index(drop=True)
+
+
+@instrumentation.stage('rank.plot')
+def plot_rankings(path=None, season=OVERALL, filename=None, league=None):
+    """Draws the top 15 from the saved coefficients. Needs no model and no sklearn."""
+    league = leagues.get_league(league)
+    ranking_df = ranking_table(path or league.rankings_file, season)
+
+    # Plotting libraries are only loaded when we actually draw the chart
+    import matplotlib
+    matplotlib.use('Agg')  # Headless: no window needed
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # 6. VISUALIZE AND SAVE
+    print("🎨 Generating Graph...")
+    period = 'Historical Data' if season == OVERALL else season
+    plt.figure(figsize=(12, 10))
+    sns.barplot(data=ranking_df.head(15), x='Score', y='Team', palette='viridis')
+    plt.title(f'Top 15 Strongest Home Teams ({league.id.upper()} {period})', fontsize=15)
+    plt.xlabel('Strength Score (Coefficient)')
+    plt.axvline(0, color='k', linestyle='--') # Add a center line
+
+    # SAVE INSTEAD OF SHOW (Prevents Crashes)
+    filename = filename or chart_file(league)
+    plt.savefig(filename)
+    plt.close()
+    print(f"✅ Graph saved as '{filename}' in your folder.")
+    return ranking_df
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the team ranking model and draw the rankings chart.")
+    step = parser.add_mutually_exclusive_group()
+    step.add_argument('--fit-only', action='store_true', help="Save the coefficients without drawing the chart.")
+    step.add_argument('--chart-only', action='store_true', help="Redraw the chart from the saved coefficients.")
+    parser.add_argument('--season', default=OVERALL, help=f"Season to chart (default: {OVERALL}, every season).")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    league = leagues.get_league(args.league)
+    if not args.chart_only:
+        fit_rankings(league)
+    if args.fit_only:
+        ranking_df = ranking_table(league.rankings_file, args.season)
+    else:
+        ranking_df = plot_rankings(season=args.season, league=league)
+
+    print("\n🏆 TOP 5 STRONGEST TEAMS (HOME):")
+    print(ranking_df.head(5)[['Team', 'Score']])
+
+    print("\n📉 BOTTOM 5 WEAKEST TEAMS (HOME):")
+    print(ranking_df.tail(5)[['Team', 'Score']])
+    return ranking_df
+
+if __name__ == "__main__":
+    main()
@@ -1,116 +1,163 @@
-import pandas as pd
-import numpy as np
-from sklearn.linear_model import LogisticRegression
-import difflib # For fixing typos
-
-# --- CONFIGURATION ---
-CSV_FILENAME = 'npfl_historical_data.csv'
-
-def load_and_train():
-    print("⏳ Loading data and training the brain...")
-    df = pd.read_csv(CSV_FILENAME)
-    
-    # Encode teams
-    # We need the full list of category names to ensure consistent coding
-    all_teams = pd.concat([df['Home_Team'], df['Away_Team']]).astype('category')
-    
-    # Create the map: Name -> Code
-    team_to_code = {team: code for code, team in enumerate(all_teams.cat.categories)}
-    code_to_team = {code: team for team, code in team_to_code.items()}
-    
-    # Map the dataframe
-    df['Home_Team_Code'] = df['Home_Team'].map(team_to_code)
-    df['Away_Team_Code'] = df['Away_Team'].map(team_to_code)
-    
-    # Train Model
-    X = df[['Home_Team_Code', 'Away_Team_Code']]
-    y = df['Outcome']
-    
-    model = LogisticRegression(max_iter=1000)
-    model.fit(X, y)
-    
-    return model, team_to_code, list(team_to_code.keys())
-
-def get_closest_team(user_input, team_list):
-    # Finds the closest match to what you typed (e.g. "Remo" -> "Remo Stars")
-    matches = difflib.get_close_matches(user_input, team_list, n=1, cutoff=0.4)
-    return matches[0] if matches else None
-
-def main():
-    model, team_map, team_list = load_and_train()
-    
-    print("\n" + "="*50)
-    print("⚽ NPFL MATCHDAY PREDICTOR v1.0 ⚽")
-    print("="*50)
-    print(f"Loaded {len(team_list)} teams.")
-    print("Type 'done' when you have entered all matches.\n")
-    
-    predictions = []
-
-    while True:
-        print("-" * 30)
-        home_input = input("🏠 Enter HOME Team: ").strip()
-        if home_input.lower() == 'done':
-            break
-            
-        home_team = get_closest_team(home_input, team_list)
-        if not home_team:
-            print("❌ Team not found. Try again.")
-            continue
-        print(f"   Selected: {home_team}")
-
-        away_input = input("✈️ Enter AWAY Team: ").strip()
-        away_team = get_closest_team(away_input, team_list)
-        if not away_team:
-            print("❌ Team not found. Try again.")
-            continue
-        print(f"   Selected: {away_team}")
-        
-        # Predict
-        h_code = team_map[home_team]
-        a_code = team_map[away_team]
-        
-        input_data = pd.DataFrame([[h_code, a_code]], columns=['Home_Team_Code', 'Away_Team_Code'])
-        
-        # Get Probabilities
-        probs = model.predict_proba(input_data)[0]
-        classes = model.classes_
-        
-        # Create a nice dictionary of results
-        result_probs = dict(zip(classes, probs))
-        
-        # Find the most likely outcome
-        winner = max(result_probs, key=result_probs.get)
-        confidence = result_probs[winner]
-        
-        print(f"\n🔮 PREDICTION: {winner} ({confidence:.1%})")
-        
-        predictions.append({
-            'Home': home_team,
-            'Away': away_team,
-            'Prediction': winner,
-            'Confidence': confidence,
-            'Full_Probs': result_probs
-        })
-
-    # --- GENERATE REPORT ---
-    if predictions:
-        print("\n\n" + "="*50)
-        print("📢 COPY THIS FOR SOCIAL MEDIA:")
-        print("="*50)
-        print("🤖 AI PREDICTIONS (NPFL Week X)")
-        print(f"Model Accuracy: ~68% (Historical Baseline)\n")
-        
-        for p in predictions:
-            # Add an emoji based on confidence
-            emoji = "🔒" if p['Confidence'] > 0.7 else "⚠️" if p['Confidence'] < 0.5 else "✅"
-            
-            # Format: Home vs Away: Winner (XX%)
-            line = f"{p['Home']} vs {p['Away']}: {p['Prediction']} {p['Confidence']:.0%} {emoji}"
-            print(line)
-            
-        print("\n#NPFL #NaijaBallboy #DataScience")
-        print("="*50)
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import argparse
+
+import pandas as pd
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+import batch_predict
+import instrumentation
+import leagues
+import match_store
+import model_registry
+import pair_table
+import team_resolver
+
+# Model settings (part of the saved-model key, so changing them retrains)
+FEATURE_COLS = ['Home_Team_Code', 'Away_Team_Code']
+MODEL_PARAMS = {'model': 'LogisticRegression', 'max_iter': 1000}
+
+def model_params(league=None):
+    """The defaults plus the league's tuned settings from hyperparam_search.py."""
+    league = leagues.get_league(league)
+    return {**MODEL_PARAMS, **model_registry.load_best_params('team_id_logreg', league.best_params_file)}
+
+def train_model(league=None, params=MODEL_PARAMS):
+    league = leagues.get_league(league)
+    df = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    
+    # Encode teams
+    # We need the full list of category names to ensure consistent coding
+    all_teams = pd.concat([df['Home_Team'], df['Away_Team']]).astype('category')
+    
+    # Create the map: Name -> Code
+    team_to_code = {team: code for code, team in enumerate(all_teams.cat.categories)}
+    
+    # Map the dataframe
+    df['Home_Team_Code'] = df['Home_Team'].map(team_to_code)
+    df['Away_Team_Code'] = df['Away_Team'].map(team_to_code)
+    
+    # Train Model
+    X = df[FEATURE_COLS]
+    y = df['Outcome']
+    
+    model = LogisticRegression(**{k: v for k, v in params.items() if k != 'model'})
+    with instrumentation.stage('train.matchday_logreg', rows=len(X)):
+        model.fit(X, y)
+    
+    return {'model': model, 'team_to_code': team_to_code}
+
+@instrumentation.stage('load.matchday_logreg')
+def load_and_train(league=None):
+    league = leagues.get_league(league)
+    print("⏳ Loading data and training the brain...")
+    
+    # Reuse the saved model if the match data hasn't changed since it was trained
+    params = model_params(league)
+    model_key, artifact = model_registry.load_or_train(
+        'matchday_logreg', match_store.partition_files(league.store_dir, league.legacy_file),
+        FEATURE_COLS, params, lambda: train_model(league, params), league.registry_dir)
+    
+    model = artifact['model']
+    team_to_code = artifact['team_to_code']
+    team_list = list(team_to_code.keys())
+    
+    # Score every possible fixture once, so lookups are just array indexing
+    with instrumentation.stage('load.pair_table', rows=len(team_list) ** 2):
+        pairs = pair_table.load_or_build(
+            model_key, model, team_list,
+            make_features=lambda homes, aways: build_features(team_to_code, homes, aways),
+            registry_dir=league.registry_dir)
+    return model, team_to_code, team_list, pairs
+
+def build_features(team_map, homes, aways):
+    return pd.DataFrame({
+        'Home_Team_Code': pd.Series(homes).map(team_map).to_numpy(),
+        'Away_Team_Code': pd.Series(aways).map(team_map).to_numpy(),
+    })
+
+@instrumentation.stage('predict.batch')
+def predict_batch(pairs, fixtures):
+    """Looks every fixture (already resolved to known team names) up in the precomputed table."""
+    probs, _ = pairs.lookup_many(fixtures['Home'], fixtures['Away'])
+    
+    # A team "playing itself" has no prediction
+    invalid = np.isnan(probs).any(axis=1)
+    if invalid.any():
+        print(f"⚠️ Skipped {int(invalid.sum())} invalid fixtures.")
+    fixtures = fixtures[~invalid].reset_index(drop=True)
+    return batch_predict.add_prediction_columns(fixtures, probs[~invalid], pairs.classes)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NPFL matchday predictor (team-ID model).")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    args = batch_predict.add_batch_arguments(parser).parse_args(argv)
+    if not batch_predict.fixtures_exist(args.fixtures): return
+
+    league = leagues.get_league(args.league)
+    model, team_map, team_list, pairs = load_and_train(league)
+    # Fixes typos (e.g. "Remo" -> "Remo Stars")
+    resolver = team_resolver.load_resolver(team_list, alias_file=league.alias_file)
+    
+    # --- BATCH MODE (no prompts) ---
+    if args.fixtures:
+        batch_predict.run_batch(
+            args.fixtures,
+            resolve_fn=resolver.resolve,
+            predict_fn=lambda fixtures: predict_batch(pairs, fixtures),
+            output_path=args.output, report_path=args.report)
+        return
+    
+    print("\n" + "="*50)
+    print("⚽ NPFL MATCHDAY PREDICTOR v1.0 ⚽")
+    print("="*50)
+    print(f"Loaded {len(team_list)} teams.")
+    print("Type 'done' when you have entered all matches.\n")
+    
+    predictions = []
+
+    while True:
+        print("-" * 30)
+        home_input = input("🏠 Enter HOME Team: ").strip()
+        if home_input.lower() == 'done':
+            break
+            
+        home_team = resolver.resolve(home_input)
+        if not home_team:
+            print("❌ Team not found. Try again.")
+            continue
+        print(f"   Selected: {home_team}")
+
+        away_input = input("✈️ Enter AWAY Team: ").strip()
+        away_team = resolver.resolve(away_input)
+        if not away_team:
+            print("❌ Team not found. Try again.")
+            continue
+        print(f"   Selected: {away_team}")
+        
+        # Predict (precomputed probabilities for this pairing)
+        try:
+            result_probs, _ = pairs.lookup(home_team, away_team)
+        except KeyError:
+            print("❌ A team can't play itself. Try again.")
+            continue
+        
+        # Find the most likely outcome
+        winner = max(result_probs, key=result_probs.get)
+        confidence = result_probs[winner]
+        
+        print(f"\n🔮 PREDICTION: {winner} ({confidence:.1%})")
+        
+        predictions.append({
+            'Home': home_team,
+            'Away': away_team,
+            'Prediction': winner,
+            'Confidence': confidence,
+            'Full_Probs': result_probs
+        })
+
+    # --- GENERATE REPORT ---
+    if predictions:
+        print("\n\n" + batch_predict.format_social_report(predictions))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Local prediction service for bots and dashboards.
+
+    python prediction_server.py                  (http://127.0.0.1:8000)
+    python npfl.py serve --port 8080
+    python prediction_server.py --league gpl
+
+    GET  /predict?home=Rivers&away=Enyimba
+    POST /predict   {"home": "Rivers", "away": "Enyimba"}  or  {"fixtures": [{"home": ..., "away": ...}, ...]}
+    GET  /teams | /health | /metrics
+
+The model and the team stats are loaded once. Requests that arrive within a few
+milliseconds of each other are scored together with ONE predict_proba call on the
+packed NumPy copy of the forest (forest_export.py), with no DataFrames in the loop.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import advanced_predictor
+import forest_export
+import goals_model
+import leagues
+import team_resolver
+
+# CONFIGURATION
+HOST = '127.0.0.1'
+PORT = 8000
+BATCH_WINDOW_MS = 5      # How long the first request in a batch waits for company
+MAX_BATCH_SIZE = 256
+LATENCY_SAMPLES = 10000  # Latencies kept for the p50/p99 in /metrics
+MAX_BODY_BYTES = 1_000_000
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class PredictionError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Metrics:
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.fixtures = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=samples)   # Seconds, per HTTP request
+
+    def observe(self, seconds, ok=True):
+        self.requests += 1
+        self.errors += not ok
+        self.latencies.append(seconds)
+
+    def snapshot(self, queue_depth):
+        lat = np.array(self.latencies) * 1000
+        p50, p99 = (np.percentile(lat, [50, 99]).round(2).tolist() if len(lat) else (None, None))
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'requests': self.requests,
+            'errors': self.errors,
+            'fixtures_scored': self.fixtures,
+            'batches': self.batches,
+            'mean_batch_size': round(self.fixtures / self.batches, 2) if self.batches else 0,
+            'latency_ms': {'p50': p50, 'p99': p99, 'samples': len(lat)},
+            'queue_depth': queue_depth,
+        }
+
+
+class MicroBatcher:
+    """
+    Collects fixtures from concurrent requests and scores them together.
+    predict_fn(homes, aways) -> (probs, exp_goals) runs in a worker thread,
+    so the server keeps accepting connections while the model works.
+    """
+
+    def __init__(self, predict_fn, metrics, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+        self.predict_fn = predict_fn
+        self.metrics = metrics
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, fixtures):
+        """fixtures: list of (home, away). Returns one (probs, exp_goals) row per fixture."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for fixture in fixtures:
+            future = loop.create_future()
+            self.queue.put_nowait((fixture, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Grab anything else already waiting without sleeping again
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            homes = [home for (home, _), _ in batch]
+            aways = [away for (_, away), _ in batch]
+            try:
+                probs, exp_goals = await loop.run_in_executor(None, self.predict_fn, homes, aways)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.metrics.batches += 1
+            self.metrics.fixtures += len(batch)
+            for i, (_, future) in enumerate(batch):
+                if not future.done():   # The client may have hung up
+                    future.set_result((probs[i], None if exp_goals is None else exp_goals[i]))
+
+
+def make_predict_fn(forest, team_stats, goals=None):
+    """
+    One predict_proba call (and one expected-goals calculation) for the whole batch.
+    The stats table is turned into arrays once, so a batch is just row indexing.
+    With a goals model, expected goals are its fitted rates (like the CLI predictors).
+    """
+    teams = list(team_stats)
+    index = {team: i for i, team in enumerate(teams)}
+    stats = advanced_predictor.build_features(team_stats, teams, teams)   # Row i: team i's home and away stats
+    home_stats = stats[['Home_Attack', 'Home_Defense']].to_numpy(float)
+    away_stats = stats[['Away_Attack', 'Away_Defense']].to_numpy(float)
+
+    def predict(homes, aways):
+        h = np.fromiter((index[t] for t in homes), dtype=np.intp, count=len(homes))
+        a = np.fromiter((index[t] for t in aways), dtype=np.intp, count=len(aways))
+        X = np.hstack([home_stats[h], away_stats[a]])   # FEATURE_COLS order
+        if goals is not None:
+            exp_goals = np.column_stack(goals.rates(homes, aways))
+        else:
+            exp_goals = advanced_predictor.expected_goals(dict(zip(advanced_predictor.FEATURE_COLS, X.T)))
+        return forest.predict_proba(X), exp_goals
+    return predict
+
+
+class PredictionService:
+    def __init__(self, forest, team_stats, teams, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE, goals=None,
+                 league=None):
+        self.classes = list(forest.classes)
+        self.team_stats = team_stats
+        self.teams = sorted(teams)
+        self.resolver = team_resolver.load_resolver(teams, leagues.get_league(league).alias_file)
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(make_predict_fn(forest, team_stats, goals), self.metrics, window_ms, max_batch)
+
+    def resolve(self, home_input, away_input):
+        if not home_input or not away_input:
+            raise PredictionError(400, "Each fixture needs 'home' and 'away'.")
+        home, away = self.resolver.resolve(home_input), self.resolver.resolve(away_input)
+        for typed, team in ((home_input, home), (away_input, away)):
+            if team is None:
+                raise PredictionError(404, f"Unknown team: {typed}")
+        if home == away:
+            raise PredictionError(400, "A team can't play itself.")
+        # The forest needs home stats for the home side and away stats for the away side
+        if 'Home_Attack' not in self.team_stats[home] or 'Away_Attack' not in self.team_stats[away]:
+            raise PredictionError(404, f"Missing stats for {home} vs {away}.")
+        return home, away
+
+    async def predict(self, fixtures):
+        resolved = [self.resolve(str(f.get('home', '')).strip(), str(f.get('away', '')).strip())
+                    for f in fixtures]
+        rows = await self.batcher.submit(resolved)
+
+        results = []
+        for (home, away), (probs, exp) in zip(resolved, rows):
+            best = int(np.argmax(probs))
+            result = {
+                'home': home,
+                'away': away,
+                'probabilities': {c: round(float(p), 4) for c, p in zip(self.classes, probs)},
+                'prediction': self.classes[best],
+                'confidence': round(float(probs[best]), 4),
+            }
+            if exp is not None:
+                result['expected_goals'] = {'home': round(float(exp[0]), 2), 'away': round(float(exp[1]), 2)}
+            results.append(result)
+        return results
+
+    async def handle(self, method, target, body):
+        """Routes one request. Returns (status, JSON-able payload)."""
+        url = urlsplit(target)
+
+        if url.path == '/health':
+            return 200, {'status': 'ok', 'teams': len(self.teams)}
+        if url.path == '/teams':
+            return 200, {'teams': self.teams}
+        if url.path == '/metrics':
+            return 200, self.metrics.snapshot(self.batcher.queue.qsize())
+        if url.path != '/predict':
+            return 404, {'error': f"No route for {url.path}"}
+
+        if method == 'GET':
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            return 200, (await self.predict([query]))[0]
+        if method != 'POST':
+            return 405, {'error': "Use GET or POST."}
+
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': "Body must be JSON."}
+        if isinstance(payload, dict) and 'fixtures' in payload:
+            if not isinstance(payload['fixtures'], list):
+                return 400, {'error': "'fixtures' must be a list."}
+            if not all(isinstance(f, dict) for f in payload['fixtures']):
+                return 400, {'error': "Each fixture must be an object with 'home' and 'away'."}
+            return 200, {'predictions': await self.predict(payload['fixtures'])}
+        if isinstance(payload, dict):
+            return 200, (await self.predict([payload]))[0]
+        return 400, {'error': "Send {'home', 'away'} or {'fixtures': [...]}."}
+
+
+async def read_request(reader):
+    """Parses one HTTP/1.1 request. Returns (method, target, headers, body) or None when the client is gone."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise PredictionError(413, "Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode('latin-1') + body)
+
+
+async def serve_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except PredictionError as e:
+                write_response(writer, e.status, {'error': str(e)}, keep_alive=False)
+                break
+            except (ValueError, asyncio.IncompleteReadError):
+                write_response(writer, 400, {'error': "Malformed request."}, keep_alive=False)
+                break
+            if request is None:
+                break
+
+            method, target, headers, body = request
+            keep_alive = headers.get('connection', '').lower() != 'close'
+
+            start = time.perf_counter()
+            try:
+                status, payload = await service.handle(method, target, body)
+            except PredictionError as e:
+                status, payload = e.status, {'error': str(e)}
+            except Exception as e:
+                status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+            if urlsplit(target).path == '/predict':
+                service.metrics.observe(time.perf_counter() - start, ok=status == 200)
+
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run_server(service, host=HOST, port=PORT, ready=None):
+    service.batcher.start()
+    server = await asyncio.start_server(
+        lambda r, w: serve_connection(service, r, w), host, port)
+    print(f"🌐 Serving predictions on http://{host}:{port} (batch window {service.batcher.window * 1000:.0f} ms)")
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.batcher.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve match predictions over HTTP.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--window-ms', type=float, default=BATCH_WINDOW_MS,
+                        help="How long to wait for more requests before scoring a batch.")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH_SIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    league = leagues.get_league(args.league)
+    model, team_stats, team_list, pairs = advanced_predictor.load_and_train(league)
+    if not model:
+        return
+    forest = forest_export.load_or_export(pairs.model_key, model, league.registry_dir)
+    goals = goals_model.load_or_fit(league)   # Expected goals, same as the CLI predictors
+
+    service = PredictionService(forest, team_stats, team_list, args.window_ms, args.max_batch, goals, league)
+    try:
+        asyncio.run(run_server(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Monte Carlo season simulator: title, top-3 and relegation odds for every team.
+
+    python season_simulator.py                        (100,000 seasons, current season, goals model)
+    python season_simulator.py --sims 500000 --workers 4
+    python season_simulator.py --source forest        (outcome probabilities from the Random Forest)
+    python season_simulator.py --league gpl           (another league's store, models and table rules)
+
+1. The current table comes from the matches already played this season.
+2. Every remaining fixture gets its scoreline (goals model) or outcome (forest) probabilities.
+3. Seasons are sampled in chunks of CHUNK_SIZE as NumPy arrays (simulations x fixtures),
+   spread over worker processes, so memory stays flat however many seasons are run.
+4. Final positions use the tiebreakers in order: points, goal difference, goals scored,
+   then a random draw.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+import leagues
+import match_store
+
+# CONFIGURATION
+N_SIMULATIONS = 100_000
+CHUNK_SIZE = 10_000        # Seasons per chunk (memory ~ CHUNK_SIZE x fixtures)
+SEED = 42
+# Top and relegation places are each league's table rules (leagues.py)
+
+
+def odds_file(league=None):
+    return f"{leagues.get_league(league).id}_season_odds.csv"
+
+
+def league_table(played, teams):
+    """Points, goal difference and goals scored so far for each team (in `teams` order)."""
+    table = pd.DataFrame(0, index=teams, columns=['Played', 'Points', 'GD', 'GF'])
+    for team_col, gf_col, ga_col in [('Home_Team', 'Home_Goals', 'Away_Goals'),
+                                     ('Away_Team', 'Away_Goals', 'Home_Goals')]:
+        gf, ga = played[gf_col].astype(int), played[ga_col].astype(int)
+        side = pd.DataFrame({
+            'Played': 1,
+            'Points': np.where(gf > ga, 3, np.where(gf == ga, 1, 0)),
+            'GD': gf - ga,
+            'GF': gf,
+        }).groupby(played[team_col].to_numpy()).sum()
+        table = table.add(side.reindex(teams, fill_value=0), fill_value=0)
+    return table.astype(int)
+
+
+def remaining_fixtures(played, teams):
+    """Every Home vs Away pairing of a double round-robin that hasn't been played yet."""
+    done = set(zip(played['Home_Team'], played['Away_Team']))
+    return pd.DataFrame([(h, a) for h in teams for a in teams if h != a and (h, a) not in done],
+                        columns=['Home', 'Away'])
+
+
+# --- SAMPLING ---
+
+def sample_chunk(task):
+    """
+    Simulates one chunk of seasons. Returns per-team counts:
+    (position counts [teams x teams], total points [teams]).
+    """
+    (n_sims, seed, base, home_idx, away_idx, cdf, score_home, score_away) = task
+    rng = np.random.default_rng(seed)
+    n_teams = base.shape[0]
+
+    # One uniform draw per fixture per season, turned into an outcome/scoreline via the fixture's CDF
+    u = rng.random((n_sims, len(home_idx)))
+    picks = np.empty(u.shape, dtype=np.int16)
+    for f in range(len(home_idx)):
+        picks[:, f] = np.searchsorted(cdf[f], u[:, f], side='right')
+    picks = np.minimum(picks, cdf.shape[1] - 1)   # Guards against float round-off at the top
+    hg, ag = score_home[picks], score_away[picks]
+
+    home_pts = np.where(hg > ag, 3, np.where(hg == ag, 1, 0)).astype(np.float32)
+    away_pts = np.where(ag > hg, 3, np.where(hg == ag, 1, 0)).astype(np.float32)
+
+    # Fixture -> team accumulation as matrix products (sims x fixtures) @ (fixtures x teams)
+    home_onehot = np.zeros((len(home_idx), n_teams), dtype=np.float32)
+    away_onehot = np.zeros((len(away_idx), n_teams), dtype=np.float32)
+    home_onehot[np.arange(len(home_idx)), home_idx] = 1
+    away_onehot[np.arange(len(away_idx)), away_idx] = 1
+
+    points = base[:, 0] + home_pts @ home_onehot + away_pts @ away_onehot
+    gd = base[:, 1] + (hg - ag).astype(np.float32) @ home_onehot + (ag - hg).astype(np.float32) @ away_onehot
+    gf = base[:, 2] + hg.astype(np.float32) @ home_onehot + ag.astype(np.float32) @ away_onehot
+
+    # TIEBREAKERS: points, then goal difference, then goals scored, then drawing lots.
+    # Packed into one sortable number per team (each component fits in its own range).
+    key = ((points.astype(np.float64) * 1024 + (gd + 512)) * 1024 + gf) + rng.random(points.shape)
+    order = np.argsort(-key, axis=1)                    # order[s, p] = team finishing in position p
+    positions = np.empty_like(order)
+    positions[np.arange(n_sims)[:, None], order] = np.arange(n_teams)
+
+    position_counts = np.stack([np.bincount(positions[:, t], minlength=n_teams) for t in range(n_teams)])
+    return position_counts, points.sum(axis=0, dtype=np.float64)
+
+
+def goals_distribution(homes, aways, league=None):
+    """Per-fixture CDF over scorelines (0-0, 0-1, ...) from the Dixon-Coles goals model."""
+    import goals_model
+    model = goals_model.load_or_fit(league)
+    grid = model.scoreline_grid(homes, aways)
+    g = grid.shape[1]
+    score_home, score_away = np.divmod(np.arange(g * g), g)
+    return np.cumsum(grid.reshape(len(grid), -1), axis=1), score_home, score_away
+
+
+def forest_distribution(homes, aways, league=None):
+    """
+    Per-fixture CDF over Away Win / Draw / Home Win from the Random Forest's fixture table.
+    Outcomes only: each is played as a 0-1 / 0-0 / 1-0, so goal difference barely moves.
+    """
+    import advanced_predictor
+    _, _, _, pairs = advanced_predictor.load_and_train(league)
+    probs, _ = pairs.lookup_many(homes, aways)
+    probs = np.where(np.isnan(probs), 1 / 3, probs)   # Teams without stats: coin toss
+    classes = list(pairs.classes)
+    cdf = np.cumsum(probs[:, [classes.index(c) for c in ['Away Win', 'Draw', 'Home Win']]], axis=1)
+    return cdf, np.array([0, 0, 1]), np.array([1, 0, 0])
+
+
+SOURCES = {'goals': goals_distribution, 'forest': forest_distribution}
+
+
+@instrumentation.stage('simulate')
+def simulate(season=None, n_sims=N_SIMULATIONS, source='goals', workers=None, chunk_size=CHUNK_SIZE,
+             seed=SEED, fixtures=None, matches=None, league=None):
+    """Returns a DataFrame of per-team odds, best title chances first."""
+    league = leagues.get_league(league)
+    if matches is None:
+        matches = match_store.load_matches(store_dir=league.store_dir, legacy_file=league.legacy_file)
+    season = season or match_store.list_seasons(league.store_dir)[-1]
+    played = matches[matches['Season'] == season]
+    teams = sorted(set(played['Home_Team']) | set(played['Away_Team']))
+    if fixtures is None:
+        fixtures = remaining_fixtures(played, teams)
+    else:
+        import batch_predict
+        import team_resolver
+        fixtures, unknown = batch_predict.resolve_fixture_teams(fixtures, team_resolver.load_resolver(teams, alias_file=league.alias_file).resolve)
+        if unknown:
+            print(f"⚠️ Skipped fixtures with teams not in {season}: {', '.join(unknown)}")
+
+    table = league_table(played, teams)
+    index = {team: i for i, team in enumerate(teams)}
+    home_idx = fixtures['Home'].map(index).to_numpy()
+    away_idx = fixtures['Away'].map(index).to_numpy()
+    cdf, score_home, score_away = SOURCES[source](fixtures['Home'].to_numpy(), fixtures['Away'].to_numpy(), league)
+    cdf = cdf / cdf[:, -1:]   # Exactly 1 at the end of every row
+
+    print(f"🎲 Simulating {n_sims:,} x {season} ({len(played)} played, {len(fixtures)} to go, {source} model)...")
+    start = time.perf_counter()
+
+    base = table[['Points', 'GD', 'GF']].to_numpy(np.float32)
+    sizes = [min(chunk_size, n_sims - i) for i in range(0, n_sims, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(size, s, base, home_idx, away_idx, cdf, score_home, score_away) for size, s in zip(sizes, seeds)]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        results = list(map(sample_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(sample_chunk, tasks))
+
+    position_counts = sum(r[0] for r in results)
+    total_points = sum(r[1] for r in results)
+    share = position_counts / n_sims
+    n_teams = len(teams)
+
+    odds = pd.DataFrame({
+        'Team': teams,
+        'Played': table['Played'].to_numpy(),
+        'Points': table['Points'].to_numpy(),
+        'Exp_Points': (total_points / n_sims).round(1),
+        'Title': share[:, 0],
+        f'Top_{league.top_spots}': share[:, :league.top_spots].sum(axis=1),
+        'Relegation': share[:, n_teams - league.relegation_spots:].sum(axis=1),
+        'Avg_Position': (share @ np.arange(1, n_teams + 1)).round(2),
+    }).sort_values(['Title', 'Exp_Points'], ascending=False).reset_index(drop=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"⚡ {n_sims:,} seasons in {elapsed:.2f} s ({n_sims / elapsed:,.0f} seasons/sec, {workers} worker(s))")
+    return odds
+
+
+def print_odds(odds):
+    print("\n" + "=" * 70)
+    print("🏆 END-OF-SEASON ODDS")
+    print("=" * 70)
+    shown = odds.copy()
+    for col in ['Title', *[c for c in odds.columns if c.startswith('Top_')], 'Relegation']:
+        shown[col] = shown[col].map(lambda p: f"{p:.1%}")
+    print(shown.to_string(index=False))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the rest of the season many times.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    parser.add_argument('--season', help="Season label (default: the latest in the store).")
+    parser.add_argument('--sims', type=int, default=N_SIMULATIONS)
+    parser.add_argument('--source', choices=sorted(SOURCES), default='goals',
+                        help="goals = Dixon-Coles scorelines, forest = Random Forest outcomes.")
+    parser.add_argument('--workers', type=int, help="Processes to use (default: all cores).")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--fixtures', help="CSV/JSON of remaining fixtures (default: every unplayed pairing).")
+    parser.add_argument('--output', help="Where to save the odds (default: <league>_season_odds.csv).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fixtures = None
+    if args.fixtures:
+        import batch_predict
+        fixtures = batch_predict.load_fixtures(args.fixtures)
+
+    league = leagues.get_league(args.league)
+    odds = simulate(args.season, args.sims, args.source, args.workers, args.chunk_size, args.seed, fixtures,
+                    league=league)
+    print_odds(odds)
+    output = args.output or odds_file(league)
+    odds.to_csv(output, index=False)
+    print(f"\n💾 Saved odds to {output}")
+    return odds
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Watches the live season page and updates the data only when its results table changes.
+
+    python season_watch.py                         (poll every 5 minutes until Ctrl+C)
+    python season_watch.py --once                  (a single poll, e.g. from cron)
+    python npfl.py watch --interval 60 --base-url http://127.0.0.1:8765   (against a local stand-in)
+
+Each poll is a conditional GET (If-None-Match / If-Modified-Since from the page cache), so
+an unchanged page costs one empty 304 response. When the page has changed, only the
+results-matrix <table> is cut out and hashed: edits elsewhere on the page (prose,
+standings, references) stop there. A changed table is parsed on its own (not the whole
+page), upserted into the season's partition, pushed through update_features, and the
+models are refreshed. Between polls the process just sleeps.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+import instrumentation
+import leagues
+import npfl_scraper
+import page_fetcher
+
+# CONFIGURATION
+POLL_SECONDS = 300
+MIN_CELLS = 64              # A results matrix is at least 8 x 8
+MIN_SCORE_SHARE = 0.05      # Same idea as the scraper's dash-density filter
+
+TABLE_PATTERN = re.compile(r'<table\b.*?</table\s*>', re.IGNORECASE | re.DOTALL)
+CELL_PATTERN = re.compile(r'<t[dh]\b', re.IGNORECASE)
+SCORE_CELL_PATTERN = re.compile(r'>\s*\d{1,2}\s*[–-]\s*\d{1,2}\s*[<\[]')   # >2–1< or >2–1[a]
+
+
+def state_file(league):
+    return f"{league.id}_watch_state.json"
+
+
+def load_state(league):
+    try:
+        with open(state_file(league), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(league, state):
+    path = state_file(league)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def results_fragment(html):
+    """
+    The page's results-matrix table(s) as raw HTML, found with a regex scan instead of
+    parsing the page. None if nothing on the page looks like a results matrix.
+    """
+    tables = []
+    for table in TABLE_PATTERN.findall(html):
+        cells = len(CELL_PATTERN.findall(table))
+        if cells >= MIN_CELLS and len(SCORE_CELL_PATTERN.findall(table)) >= MIN_SCORE_SHARE * cells:
+            tables.append(table)
+    return '\n'.join(tables) or None
+
+
+def fragment_hash(fragment):
+    return hashlib.sha256(' '.join(fragment.split()).encode('utf-8')).hexdigest()
+
+
+def live_page(league, base_url=None):
+    label, url = league.current_season
+    if base_url:
+        url = url.replace(npfl_scraper.WIKIPEDIA_BASE, base_url.rstrip('/'), 1)
+    return label, url
+
+
+def apply_update(fragment, label, league):
+    """Parse the table -> upsert -> incremental features -> models. Heavy modules load only here."""
+    import advanced_predictor
+    import data_validation
+    import feature_engineering
+    import goals_model
+    import match_store
+    import team_resolver
+
+    resolver = team_resolver.load_resolver(alias_file=league.alias_file)
+    matches = npfl_scraper.parse_season_html(fragment, label, resolver)
+    if matches.empty:
+        raise ValueError(f"the results table for {label} gave no matches")
+
+    with instrumentation.stage('watch.apply', rows=len(matches), season=label):
+        data_validation.check_upsert(matches, league)   # Bad rows never reach the store
+        summary = match_store.upsert_matches(matches, store_dir=league.store_dir)
+        for season, (before, after) in summary.items():
+            print(f"💾 {match_store.partition_path(season, league.store_dir)}: {after} matches ({after - before:+d})")
+        feature_engineering.update_features(matches, league)
+        advanced_predictor.load_and_train(league)
+        goals_model.load_or_fit(league)
+    return matches
+
+
+def poll_once(league=None, session=None, cache=None, base_url=None):
+    """
+    One poll. Returns 'not_modified' (304), 'unchanged' (page edited, results table the same),
+    'updated', 'no_table' or 'failed'.
+    """
+    league = leagues.get_league(league)
+    cache = cache or page_fetcher.PageCache()
+    label, url = live_page(league, base_url)
+    state = load_state(league)
+
+    with instrumentation.stage('watch.poll', season=label) as poll:
+        # Without a saved hash for this URL, fetch in full so the table is always looked at once
+        html, changed = page_fetcher.fetch_if_modified(url, session, cache, conditional=state.get('url') == url)
+        if not changed:
+            poll.tags['status'] = 'not_modified'
+            return 'not_modified'
+
+        fragment = results_fragment(html)
+        digest = fragment_hash(fragment) if fragment else None
+        if fragment is None:
+            status = 'no_table'
+        elif digest == state.get('fragment_sha256') and state.get('url') == url:
+            status = 'unchanged'
+        else:
+            status = 'changed'
+        poll.tags['status'] = status
+    if status != 'changed':
+        return status
+
+    try:
+        apply_update(fragment, label, league)
+    except Exception as e:
+        # Forget the validators so the next poll fetches in full and tries again
+        cache.forget(url)
+        print(f"❌ Update for {label} failed: {e}")
+        return 'failed'
+
+    save_state(league, {'url': url, 'season': label, 'fragment_sha256': digest,
+                        'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')})
+    return 'updated'
+
+
+def watch(league=None, interval=POLL_SECONDS, polls=None, base_url=None, cache_dir=page_fetcher.CACHE_DIR):
+    """Polls until stopped (or `polls` times). Returns {status: count}."""
+    league = leagues.get_league(league)
+    session = page_fetcher.make_session(max_workers=1)   # One keep-alive connection for every poll
+    cache = page_fetcher.PageCache(cache_dir)
+    label, url = live_page(league, base_url)
+    print(f"👀 Watching {league.name} {label} every {interval:g} s: {url}")
+
+    counts = {}
+    done = 0
+    while polls is None or done < polls:
+        if done:
+            time.sleep(interval)
+        try:
+            status = poll_once(league, session, cache, base_url)
+        except Exception as e:   # Network trouble: try again next time
+            print(f"⚠️ {time.strftime('%H:%M:%S')} poll failed: {e}")
+            status = 'error'
+        if status in ('not_modified', 'unchanged'):
+            print(f"💤 {time.strftime('%H:%M:%S')} {status.replace('_', ' ')}")
+        elif status == 'updated':
+            print(f"✅ {time.strftime('%H:%M:%S')} results changed: store, features and models updated")
+        elif status == 'no_table':
+            print(f"⚠️ {time.strftime('%H:%M:%S')} no results table on the page")
+        counts[status] = counts.get(status, 0) + 1
+        done += 1
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Poll the live season page and update only when results change.")
+    parser.add_argument('--league', default=leagues.DEFAULT_LEAGUE, choices=sorted(leagues.LEAGUES))
+    parser.add_argument('--interval', type=float, default=POLL_SECONDS, help="Seconds between polls.")
+    parser.add_argument('--polls', type=int, help="Stop after this many polls (default: run until Ctrl+C).")
+    parser.add_argument('--once', action='store_true', help="Poll once and exit.")
+    parser.add_argument('--base-url', help="Poll a mirror / local stand-in instead of Wikipedia.")
+    parser.add_argument('--cache-dir', default=page_fetcher.CACHE_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    counts = {}
+    try:
+        counts = watch(args.league, args.interval, 1 if args.once else args.polls, args.base_url, args.cache_dir)
+    except KeyboardInterrupt:
+        print("\n👋 Watch stopped.")
+    if counts:
+        print("📋 Polls: " + ', '.join(f"{status} {n}" for status, n in sorted(counts.items())))
+    return counts
+
+
+if __name__ == "__main__":
+    main()
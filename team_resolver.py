@@ -0,0 +1,183 @@
+import difflib
+import json
+import re
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+
+# CONFIGURATION
+ALIAS_FILE = 'team_aliases.json'   # {"Canonical Name": ["Alias 1", "Alias 2", ...]}
+FUZZY_CUTOFF = 0.4                 # Same cutoff the old difflib typo-fixer used
+MAX_CANDIDATES = 5                 # Fuzzy candidates (by shared n-grams) scored in detail
+
+# Spelling variants that mean the same thing
+ABBREVIATIONS = {
+    'utd': 'united',
+    'intl': 'international',
+}
+NOISE_TOKENS = {'fc', 'sc', 'the'}   # Single tokens; "F.C." / "F C" are folded into 'fc' first
+
+# Wikipedia decorations around team names: [a] footnotes, (C) champions, (R) relegated
+DECORATION_PATTERN = re.compile(r'\[.*?\]|\((?:c|r|q|p|x|y)\)', re.IGNORECASE)
+
+
+def clean_name(name):
+    """Strips Wikipedia decorations and extra spaces, keeping the name readable."""
+    name = DECORATION_PATTERN.sub('', str(name))
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def normalize(name):
+    """
+    The lookup key for a name: lowercase, no accents or punctuation,
+    abbreviations expanded and "FC"-style noise removed.
+    "Enyimba Int'l F.C." -> "enyimba international"
+    """
+    name = unicodedata.normalize('NFKD', clean_name(name)).encode('ascii', 'ignore').decode('ascii')
+    name = name.lower().replace('&', ' and ').replace("'", '')
+    name = re.sub(r'\bf\.?\s*c\b\.?', ' fc ', name)   # "F.C.", "F. C.", "F C" -> fc
+    tokens = re.sub(r'[^a-z0-9]+', ' ', name).split()
+    tokens = [ABBREVIATIONS.get(t, t) for t in tokens if t not in NOISE_TOKENS]
+    return ' '.join(tokens)
+
+
+def ngrams(key, n=3):
+    padded = f"  {key} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class TeamResolver:
+    """
+    Turns whatever someone typed (or Wikipedia printed) into one canonical team name.
+    1. Exact match on the normalized name or a known alias (a dict lookup).
+    2. Otherwise, an n-gram index narrows the teams down to a few candidates,
+       and only those are scored with difflib.
+    Results are memoized, so resolving the same name again is free.
+    """
+
+    def __init__(self, teams=(), aliases=None, cutoff=FUZZY_CUTOFF):
+        self.cutoff = cutoff
+        self.canonical = []
+        self.exact = {}      # normalized name/alias -> canonical name
+        self.index = {}      # trigram -> set of normalized keys
+        self._memo = {}
+
+        # Aliases first, so a known alias passed in `teams` isn't mistaken for a new team
+        for team, team_aliases in (aliases or {}).items():
+            self.add_team(team)
+            for alias in team_aliases:
+                self.add_alias(alias, team)
+        for team in teams:
+            self.add_team(team)
+
+    def add_team(self, team):
+        if normalize(team) in self.exact:
+            return  # Already known (as itself or as an alias of another team)
+        self.canonical.append(team)
+        self.add_alias(team, team)
+
+    def add_alias(self, alias, team):
+        key = normalize(alias)
+        if not key or self.exact.get(key) == team:
+            return
+        self.exact[key] = team
+        for gram in ngrams(key):
+            self.index.setdefault(gram, set()).add(key)
+        self._memo.clear()
+
+    def canonicalize(self, name):
+        """Exact/alias match only (safe for ingest). Unknown names come back cleaned, not guessed."""
+        return self.exact.get(normalize(name), clean_name(name))
+
+    def resolve(self, name):
+        """Best canonical match for a (possibly misspelled) name, or None."""
+        if name in self._memo:
+            return self._memo[name]
+
+        key = normalize(name)
+        team = self.exact.get(key)
+        if team is None and key:
+            team = self._fuzzy(key)
+
+        self._memo[name] = team
+        return team
+
+    def resolve_many(self, names):
+        return [self.resolve(name) for name in names]
+
+    def _fuzzy(self, key):
+        # Count shared n-grams per known key, then score only the best few in detail
+        shared = Counter()
+        for gram in ngrams(key):
+            shared.update(self.index.get(gram, ()))
+
+        best_team, best_score = None, self.cutoff
+        for candidate, _ in shared.most_common(MAX_CANDIDATES):
+            score = difflib.SequenceMatcher(None, key, candidate).ratio()
+            if score >= best_score:
+                best_team, best_score = self.exact[candidate], score
+        return best_team
+
+    def collisions(self, names):
+        """
+        Groups of distinct spellings that resolve to the same canonical team.
+        e.g. {"Enyimba": ["Enyimba", "Enyimba Int'l"]}
+        """
+        groups = {}
+        for name in set(names):
+            key = normalize(name)
+            groups.setdefault(self.exact.get(key, key), set()).add(name)
+
+        # Label each group by its canonical name (or its longest spelling if it has none)
+        return {(group if group in self.canonical else max(spellings, key=len)): sorted(spellings)
+                for group, spellings in groups.items() if len(spellings) > 1}
+
+    def near_duplicates(self, names, threshold=0.9):
+        """Pairs of names NOT in the alias table that still look like the same team."""
+        keys = {}
+        for name in set(names):
+            keys.setdefault(normalize(name), name)
+
+        probe = TeamResolver(cutoff=threshold)
+        pairs = []
+        for key, name in sorted(keys.items()):
+            match = probe.resolve(name)
+            if match is not None and normalize(match) != key:
+                pairs.append((match, name))
+            probe.add_team(name)
+        return pairs
+
+
+def canonicalize_teams(matches, resolver=None):
+    """
+    Rewrites Home_Team / Away_Team to canonical names (exact/alias matches only).
+    Each distinct name is looked up once, so this is cheap even for many seasons.
+    """
+    resolver = resolver or load_resolver()
+    names = pd.unique(pd.concat([matches['Home_Team'], matches['Away_Team']]))
+    lookup = {name: resolver.canonicalize(name) for name in names}
+    return matches.assign(Home_Team=matches['Home_Team'].map(lookup),
+                          Away_Team=matches['Away_Team'].map(lookup))
+
+
+def load_aliases(alias_file=ALIAS_FILE):
+    try:
+        with open(alias_file, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_resolver(teams=None, alias_file=ALIAS_FILE):
+    """
+    Resolver over the given teams and their aliases, so every answer is one of `teams`
+    (e.g. only teams the model has stats for). With no teams: everything in the alias table.
+    """
+    aliases = load_aliases(alias_file)
+    if teams is None:
+        return TeamResolver(aliases=aliases)
+
+    teams = list(teams)
+    known = set(teams)
+    return TeamResolver(teams, {team: names for team, names in aliases.items() if team in known})